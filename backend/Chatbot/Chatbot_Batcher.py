@@ -0,0 +1,78 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Collect concurrent single-sequence requests into padded batches.
+
+    submit() queues one token-id sequence and blocks until the batch holding it
+    has been run through predict_fn; enqueue() returns a Future instead, so
+    async callers can await it without tying up a thread. A batch is dispatched as soon as
+    max_batch sequences are waiting or max_wait_ms has passed since the first
+    one arrived, so max_wait_ms trades a little latency for larger batches.
+    Sequences are right-padded with zeros to the longest one in the batch.
+    """
+
+    def __init__(self, predict_fn, max_batch=16, max_wait_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.pending = queue.Queue()
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, sequence):
+        return self.enqueue(sequence).result()
+
+    def enqueue(self, sequence):
+        future = Future()
+        self.pending.put((np.asarray(sequence, dtype=np.int32), future))
+        return future
+
+    def run(self):
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.run_batch(batch)
+
+    def run_batch(self, batch):
+        length = max(len(sequence) for sequence, _ in batch)
+        inputs = np.zeros((len(batch), length), dtype=np.int32)
+        for row, (sequence, _) in enumerate(batch):
+            inputs[row, :len(sequence)] = sequence
+
+        try:
+            outputs = self.predict_fn(inputs)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        with self.lock:
+            self.batches += 1
+            self.items += len(batch)
+        for row, (_, future) in enumerate(batch):
+            future.set_result(outputs[row])
+
+    def stats(self):
+        with self.lock:
+            return {
+                'batches': self.batches,
+                'requests': self.items,
+                'mean_batch_size': self.items / self.batches if self.batches else 0.0
+            }
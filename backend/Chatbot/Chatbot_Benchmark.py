@@ -0,0 +1,334 @@
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def load_questions(path='data.json'):
+    with open(path) as f:
+        return [item['question'] for item in json.load(f)]
+
+
+def percentile_ms(latencies, p):
+    return 1000 * float(np.percentile(latencies, p))
+
+
+def run_clients(call, questions, clients, requests_per_client):
+    """Call call(question) from several threads; return (throughput, latencies)"""
+    def client(offset):
+        latencies = []
+        for i in range(requests_per_client):
+            start = time.perf_counter()
+            call(questions[(offset + i) % len(questions)])
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(client, range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies = [latency for result in results for latency in result]
+    return len(latencies) / elapsed, latencies
+
+
+def benchmark_batching(args):
+    """Throughput and latency of model.predict per request vs. micro-batched direct calls"""
+    import Chatbot_Usage as usage
+    from Chatbot_Batcher import MicroBatcher
+    import tensorflow as tf
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
+
+    usage.model_ready.wait()
+    model = tf.keras.models.load_model('improved_model.keras', compile=False)
+    questions = load_questions()
+
+    def encode(question):
+        sequence = usage.tokenizer.texts_to_sequences([question])
+        return pad_sequences(sequence, maxlen=usage.max_len, padding='post')
+
+    def predict_per_request(question):
+        input_seq = encode(question)
+        model.predict([input_seq, input_seq], verbose=0)
+
+    # Warm up both paths so tracing isn't counted
+    predict_per_request(questions[0])
+    usage.predict_tokens(encode(questions[0]))
+
+    print(f"{'mode':<28}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'mean batch':>12}")
+    throughput, latencies = run_clients(predict_per_request, questions, 1, args.requests)
+    print(f"{'model.predict, 1 client':<28}{throughput:>10.1f}{percentile_ms(latencies, 50):>10.1f}"
+          f"{percentile_ms(latencies, 95):>10.1f}{1:>12.1f}")
+
+    for max_batch in args.max_batch:
+        for max_wait_ms in args.max_wait_ms:
+            batcher = MicroBatcher(usage.predict_tokens,
+                                   max_batch=max_batch, max_wait_ms=max_wait_ms)
+            throughput, latencies = run_clients(lambda q: batcher.submit(encode(q)[0]), questions,
+                                                args.clients, args.requests)
+            label = f"batch<={max_batch}, wait {max_wait_ms:g}ms"
+            print(f"{label:<28}{throughput:>10.1f}{percentile_ms(latencies, 50):>10.1f}"
+                  f"{percentile_ms(latencies, 95):>10.1f}{batcher.stats()['mean_batch_size']:>12.1f}")
+
+
+def benchmark_variants(args):
+    """Token accuracy on data.json vs. CPU latency for the .keras model and exported variants"""
+    os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+    from Chatbot_Model import load_predictor
+    from Chatbot_Tokenizer import VocabTokenizer, pad_post
+
+    max_len = 47
+    with open('data.json') as f:
+        data = json.load(f)
+    tokenizer = VocabTokenizer.load('tokenizer.json')
+    questions = pad_post(tokenizer.texts_to_sequences([item['question'] for item in data]), max_len)
+    answers = pad_post(tokenizer.texts_to_sequences([item['answer'] for item in data]), max_len)
+    answer_tokens = answers != 0
+
+    paths = [path for path in args.models if os.path.exists(path)]
+    reference = None
+    print(f"{'model':<24}{'MB':>8}{'load s':>8}{'token acc':>11}{'agree':>8}"
+          f"{'1-req p50 ms':>14}{f'batch {args.batch_size} ms':>14}")
+    for path in paths:
+        start = time.perf_counter()
+        predict = load_predictor(path)
+        predict(questions[:1])
+        load_seconds = time.perf_counter() - start
+
+        outputs = np.concatenate([predict(questions[i:i + args.batch_size])
+                                  for i in range(0, len(questions), args.batch_size)])
+        if reference is None:
+            reference = outputs
+        accuracy = float((outputs == answers)[answer_tokens].mean())
+        agreement = float((outputs == reference).mean())
+
+        single = []
+        for i in range(args.requests):
+            start = time.perf_counter()
+            predict(questions[i % len(questions)][None])
+            single.append(time.perf_counter() - start)
+        batched = []
+        for i in range(max(1, args.requests // 10)):
+            start = time.perf_counter()
+            predict(questions[:args.batch_size])
+            batched.append(time.perf_counter() - start)
+
+        print(f"{os.path.basename(path):<24}{os.path.getsize(path) / 1e6:>8.1f}{load_seconds:>8.2f}"
+              f"{accuracy:>11.3f}{agreement:>8.3f}{percentile_ms(single, 50):>14.1f}"
+              f"{percentile_ms(batched, 50):>14.1f}")
+
+
+def masked_stand_in(path, vocab_size, embedding_dim=100):
+    """Save an untrained model with Chatbot_Training.py's masked layout and layer sizes.
+
+    Latency doesn't depend on the weights, so this times buckets before a
+    masked model has been trained.
+    """
+    import tensorflow as tf
+    from tensorflow.keras.layers import Input, Embedding, LSTM, Dense, Bidirectional, Concatenate
+
+    encoder_inputs = Input(shape=(None,))
+    encoder_embedding = Embedding(vocab_size, embedding_dim, mask_zero=True)(encoder_inputs)
+    encoder_outputs, forward_h, forward_c, backward_h, backward_c = Bidirectional(
+        LSTM(1024, return_sequences=True, return_state=True))(encoder_embedding)
+    decoder_inputs = Input(shape=(None,))
+    decoder_embedding = Embedding(vocab_size, embedding_dim)(decoder_inputs)
+    decoder_outputs, _, _ = LSTM(2048, return_sequences=True, return_state=True)(
+        decoder_embedding, initial_state=[Concatenate()([forward_h, backward_h]),
+                                          Concatenate()([forward_c, backward_c])])
+    attention = tf.keras.layers.Attention(use_scale=True)([decoder_outputs, encoder_outputs])
+    outputs = Dense(vocab_size, activation='softmax')(Concatenate()([decoder_outputs, attention]))
+    tf.keras.Model([encoder_inputs, decoder_inputs], outputs).save(path)
+
+
+def benchmark_lengths(args):
+    """Single-request latency by question length: bucketed encoder vs. full max_len padding"""
+    os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+    from Chatbot_Model import encoder_is_masked, load_predictor
+    from Chatbot_Tokenizer import VocabTokenizer
+    import tensorflow as tf
+
+    max_len = 47
+    vocab_size = len(VocabTokenizer.load('tokenizer.json').word_index) + 1
+    if args.masked_stand_in:
+        args.model = os.path.join(tempfile.mkdtemp(), 'masked_stand_in.keras')
+        masked_stand_in(args.model, vocab_size)
+    if not encoder_is_masked(tf.keras.models.load_model(args.model, compile=False)):
+        print(f"{args.model} has no encoder mask, so it is always padded to {max_len}; "
+              "retrain with Chatbot_Training.py to benefit from buckets, or time them "
+              "with --masked-stand-in")
+        return
+    padded = load_predictor(args.model, max_len, [max_len])
+    bucketed = load_predictor(args.model, max_len, args.buckets)
+
+    rng = np.random.default_rng(0)
+    print(f"{'tokens':>8}{'padded p50 ms':>16}{'bucketed p50 ms':>18}{'speedup':>10}{'same output':>13}")
+    for length in args.lengths:
+        questions = rng.integers(1, vocab_size, size=(args.requests, 1, length), dtype=np.int32)
+        timings = {}
+        for name, predict in (('padded', padded), ('bucketed', bucketed)):
+            predict(questions[0])
+            latencies = []
+            outputs = []
+            for question in questions:
+                start = time.perf_counter()
+                outputs.append(predict(question))
+                latencies.append(time.perf_counter() - start)
+            timings[name] = (percentile_ms(latencies, 50), np.concatenate(outputs))
+        same = float((timings['padded'][1] == timings['bucketed'][1]).mean())
+        print(f"{length:>8}{timings['padded'][0]:>16.1f}{timings['bucketed'][0]:>18.1f}"
+              f"{timings['padded'][0] / timings['bucketed'][0]:>9.2f}x{same:>13.3f}")
+
+
+def benchmark_decoding(args):
+    """Answer tokens per second on data.json: one-pass decoding vs. step-wise greedy and beam search"""
+    os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+    from Chatbot_Model import load_predictor
+    from Chatbot_Tokenizer import VocabTokenizer, pad_post
+
+    max_len = 47
+    tokenizer = VocabTokenizer.load('tokenizer.json')
+    questions = pad_post(tokenizer.texts_to_sequences(load_questions()), max_len)[:args.questions]
+
+    reference = None
+    print(f"{'decoder':<12}{'batch':>7}{'seconds':>10}{'tokens/s':>10}{'same answer':>13}")
+    for decoder in args.decoders:
+        predict = load_predictor(args.model, max_len, args.buckets, decoder, args.beam_width)
+        predict(questions[:1])
+        for batch_size in args.batch_sizes:
+            start = time.perf_counter()
+            answers = []
+            for i in range(0, len(questions), batch_size):
+                outputs = predict(questions[i:i + batch_size])
+                # Up to the first 0: the one-pass output keeps predicting past the end of
+                # the answer, while step-wise decoding pads everything after it
+                answers.extend(tuple(itertools.takewhile(bool, row)) for row in outputs)
+            seconds = time.perf_counter() - start
+            if reference is None:
+                reference = answers
+            tokens = sum(len(answer) for answer in answers)
+            same = np.mean([a == b for a, b in zip(answers, reference)])
+            print(f"{decoder:<12}{batch_size:>7}{seconds:>10.2f}{tokens / seconds:>10.1f}{same:>13.3f}")
+
+
+def benchmark_retrieval(args):
+    """Hit rate, precision and latency of the TF-IDF fast path on perturbed data.json questions"""
+    from Chatbot_Retrieval import RetrievalIndex
+
+    index = RetrievalIndex.load()
+    questions = load_questions()
+    rng = np.random.default_rng(0)
+
+    def perturb(question):
+        # Drop one word and change case/punctuation, like a user retyping the question
+        words = question.rstrip('?').split()
+        if len(words) > 3:
+            del words[rng.integers(len(words))]
+        return ' '.join(words).lower()
+
+    queries = [(row, perturb(question)) for row, question in enumerate(questions)]
+    best = [(row, index.search(query, 1)[0]) for row, query in queries]
+    latencies = []
+    for _, query in queries:
+        start = time.perf_counter()
+        index.search(query, 1)
+        latencies.append(time.perf_counter() - start)
+
+    print(f"{len(queries)} perturbed questions, search p50 {percentile_ms(latencies, 50):.3f} ms, "
+          f"p95 {percentile_ms(latencies, 95):.3f} ms")
+    print(f"{'threshold':>10}{'hit rate':>10}{'precision':>11}")
+    for threshold in args.thresholds:
+        hits = [(row, match) for row, (match, score) in best if score >= threshold]
+        precision = np.mean([row == match for row, match in hits]) if hits else 0.0
+        print(f"{threshold:>10.2f}{len(hits) / len(best):>10.3f}{precision:>11.3f}")
+
+
+COLD_START_SCRIPT = '''
+import json, time
+start = time.perf_counter()
+import Chatbot_Usage as usage
+imported = time.perf_counter() - start
+usage.model_ready.wait()
+print(json.dumps({"routes_servable": imported, **usage.startup_timings}))
+'''
+
+TOKENIZER_SCRIPTS = {
+    'pickle': "import pickle; pickle.load(open('tokenizer.pkl', 'rb'))",
+    'json': "from Chatbot_Tokenizer import VocabTokenizer; VocabTokenizer.load('tokenizer.json')",
+}
+
+
+def benchmark_cold_start(args):
+    """Seconds from process start until routes are servable and the model is ready"""
+    for run in range(args.runs):
+        output = subprocess.run([sys.executable, '-c', COLD_START_SCRIPT],
+                                capture_output=True, text=True, check=True).stdout
+        timings = json.loads(output.strip().splitlines()[-1])
+        print(f"run {run + 1}: " + ", ".join(f"{k}={v:.2f}s" for k, v in timings.items()))
+
+    # A fresh interpreter per load, since unpickling the Keras tokenizer drags in TensorFlow
+    for name, script in TOKENIZER_SCRIPTS.items():
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', script], check=True, capture_output=True)
+        print(f"tokenizer from {name}: {time.perf_counter() - start:.2f}s including interpreter start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chatbot inference benchmarks (run from backend/Chatbot)")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    batching = subparsers.add_parser('batching', help=benchmark_batching.__doc__)
+    batching.add_argument('--clients', type=int, default=16)
+    batching.add_argument('--requests', type=int, default=20, help="requests per client")
+    batching.add_argument('--max-batch', type=int, nargs='+', default=[1, 8, 32])
+    batching.add_argument('--max-wait-ms', type=float, nargs='+', default=[2, 10])
+    batching.set_defaults(func=benchmark_batching)
+
+    variants = subparsers.add_parser('variants', help=benchmark_variants.__doc__)
+    variants.add_argument('--models', nargs='+',
+                          default=['improved_model.keras', 'chatbot_fp32.tflite',
+                                   'chatbot_fp16.tflite', 'chatbot_int8.tflite'],
+                          help="the first one found is the reference for the agree column")
+    variants.add_argument('--requests', type=int, default=50)
+    variants.add_argument('--batch-size', type=int, default=32)
+    variants.set_defaults(func=benchmark_variants)
+
+    lengths = subparsers.add_parser('lengths', help=benchmark_lengths.__doc__)
+    lengths.add_argument('--model', default='improved_model.keras')
+    lengths.add_argument('--lengths', type=int, nargs='+', default=[2, 4, 8, 16, 32, 47])
+    lengths.add_argument('--buckets', type=int, nargs='+', default=[8, 16, 32, 47])
+    lengths.add_argument('--requests', type=int, default=20)
+    lengths.add_argument('--masked-stand-in', action='store_true',
+                         help="time an untrained model with the masked encoder instead of --model")
+    lengths.set_defaults(func=benchmark_lengths)
+
+    decoding = subparsers.add_parser('decoding', help=benchmark_decoding.__doc__)
+    decoding.add_argument('--model', default='improved_model.keras')
+    decoding.add_argument('--decoders', nargs='+', choices=['full', 'greedy', 'beam'],
+                          default=['full', 'greedy', 'beam'], help="the first one is the reference")
+    decoding.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 16])
+    decoding.add_argument('--beam-width', type=int, default=4)
+    decoding.add_argument('--buckets', type=int, nargs='+', default=[8, 16, 32, 47])
+    decoding.add_argument('--questions', type=int, default=64, help="how many data.json questions to answer")
+    decoding.set_defaults(func=benchmark_decoding)
+
+    retrieval = subparsers.add_parser('retrieval', help=benchmark_retrieval.__doc__)
+    retrieval.add_argument('--thresholds', type=float, nargs='+', default=[0.4, 0.5, 0.6, 0.7, 0.8])
+    retrieval.set_defaults(func=benchmark_retrieval)
+
+    cold_start = subparsers.add_parser('cold-start', help=benchmark_cold_start.__doc__)
+    cold_start.add_argument('--runs', type=int, default=3)
+    cold_start.set_defaults(func=benchmark_cold_start)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """LRU cache of chatbot responses keyed on the question's token ids.
+
+    Keying on tokenizer output rather than raw text means questions that only
+    differ in case, punctuation or out-of-vocabulary words share an entry.
+    Entries expire after ttl seconds (0 disables expiry) and the least
+    recently used ones are evicted beyond max_entries. Pinned entries, such
+    as precomputed answers for the training questions, never expire.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.pinned = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key in self.pinned:
+                self.hits += 1
+                return self.pinned[key]
+            entry = self.entries.get(key)
+            if entry is not None and (not self.ttl or time.monotonic() - entry[0] < self.ttl):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, response):
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic(), response)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def pin(self, key, response):
+        with self.lock:
+            self.pinned[key] = response
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self.entries),
+                'pinned': len(self.pinned),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl
+            }
@@ -0,0 +1,32 @@
+import tensorflow as tf
+
+# Upper edges of the length buckets; longer examples share one last bucket
+BUCKET_BOUNDARIES = [8, 16, 24, 32, 48, 64]
+
+
+def bucketed_dataset(examples, batch_size=16, boundaries=BUCKET_BOUNDARIES,
+                     shuffle_buffer=10000, repeat=False):
+    """tf.data pipeline of ((encoder_ids, decoder_ids), target_ids) batches.
+
+    examples is a callable returning an iterator of (encoder, decoder, target)
+    int token-id lists, with decoder and target of equal length; it is called
+    again for every epoch, so it can stream from disk. Examples are grouped
+    by length so each batch is zero-padded only to its own longest sequence,
+    and targets stay integer ids for sparse_categorical_crossentropy instead
+    of (batch, length, vocab_size) one-hot tensors.
+    """
+    signature = (tf.TensorSpec([None], tf.int32),) * 3
+    dataset = tf.data.Dataset.from_generator(examples, output_signature=signature)
+    if shuffle_buffer:
+        dataset = dataset.shuffle(shuffle_buffer)
+    if repeat:
+        dataset = dataset.repeat()
+    dataset = dataset.bucket_by_sequence_length(
+        element_length_func=lambda encoder, decoder, target: tf.maximum(tf.shape(encoder)[0], tf.shape(decoder)[0]),
+        bucket_boundaries=boundaries,
+        bucket_batch_sizes=[batch_size] * (len(boundaries) + 1),
+        pad_to_bucket_boundary=False
+    )
+    dataset = dataset.map(lambda encoder, decoder, target: ((encoder, decoder), target),
+                          num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.prefetch(tf.data.AUTOTUNE)
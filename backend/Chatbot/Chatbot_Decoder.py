@@ -0,0 +1,181 @@
+import numpy as np
+import tensorflow as tf
+
+
+def layers_of(model, kind):
+    """Top-level layers of the given type, in the model's topological order"""
+    return [layer for layer in model.layers if isinstance(layer, kind)]
+
+
+def fed_by(layers, tensor):
+    """The layer among layers whose input is tensor"""
+    return next(layer for layer in layers if layer.input is tensor)
+
+
+class IncrementalDecoder:
+    """Step-wise decoding for the chatbot's seq2seq models.
+
+    The encoder runs once per batch. Its final states seed the decoder LSTM
+    cell, and its outputs are kept as the attention keys and values. Attention
+    scale and padding bias are folded in up front. The decoder then advances
+    one token at a time and stops as soon as every sequence has produced
+    end_token.
+
+    Two decoder layouts are supported:
+      start_token=None  the decoder reads the question, position by position,
+                        and writes the answer at the same positions. This is how
+                        Chatbot_Training.py trains; the answer ends at the first 0.
+      start_token=id    the decoder is autoregressive, starting from start_token
+                        and reading back its own predictions (others/Code4.py).
+
+    Layers are found by type, as Chatbot_Training.py and Code4.py build them:
+    the encoder is the Bidirectional LSTM (or else the first LSTM) and the
+    decoder is the last LSTM. The embeddings are told apart by which model
+    input they read, and the output layer is the last Dense. encoder replaces
+    the model's own encoder: a callable from token ids to the encoder RNN's
+    outputs, e.g. the unrolled one Chatbot_Export.py builds.
+    """
+
+    def __init__(self, model, start_token=None, end_token=0, max_len=47, masked_encoder=False, encoder=None):
+        self.start_token = start_token
+        self.end_token = end_token
+        self.max_len = max_len
+
+        lstms = layers_of(model, tf.keras.layers.LSTM)
+        bidirectional = layers_of(model, tf.keras.layers.Bidirectional)
+        if not lstms or len(lstms) + len(bidirectional) < 2:
+            raise ValueError("expected an LSTM encoder and an LSTM decoder")
+        self.lstm = lstms[-1]
+        encoder_rnn = bidirectional[0] if bidirectional else lstms[0]
+        if not encoder_rnn.return_state:
+            raise ValueError("the encoder LSTM must return its states")
+        self.bidirectional = bool(bidirectional)
+
+        embeddings = layers_of(model, tf.keras.layers.Embedding)
+        self.embedding = fed_by(embeddings, model.inputs[1])
+        self.dense = layers_of(model, tf.keras.layers.Dense)[-1]
+
+        self.attention = next(iter(layers_of(model, tf.keras.layers.Attention)), None)
+        if self.attention is not None:
+            if self.attention.score_mode != 'dot':
+                raise ValueError("only dot-product attention is supported")
+            if not encoder_rnn.return_sequences:
+                raise ValueError("attention needs the encoder's full output sequence")
+        # [sequence or last output, states...]; the Bidirectional layout's
+        # forward and backward states are concatenated in _encode, as in training
+        self.encoder = encoder or tf.keras.Model(model.inputs[0], encoder_rnn.output)
+        self.masked_encoder = masked_encoder
+
+        signature = [tf.TensorSpec([None, None], tf.int32)] * 2
+        self.encode = tf.function(self._encode, reduce_retracing=True)
+        self.step = tf.function(self._step, reduce_retracing=True)
+        self.greedy_loop = tf.function(self._greedy_loop, input_signature=signature)
+
+    def _encode(self, encoder_seq, repeats=1):
+        """Run the encoder once; return (h, c, keys, values, bias), each repeated per beam"""
+        outputs = self.encoder(encoder_seq, training=False)
+        if self.bidirectional:
+            _, forward_h, forward_c, backward_h, backward_c = outputs
+            h = tf.concat([forward_h, backward_h], axis=-1)
+            c = tf.concat([forward_c, backward_c], axis=-1)
+        else:
+            _, h, c = outputs
+        keys = values = bias = None
+        if self.attention is not None:
+            values = outputs[0]
+            keys = values * self.attention.scale if self.attention.use_scale else values
+            # Large negative score on padded positions, as Attention does with a value mask
+            if self.masked_encoder:
+                bias = -1e9 * tf.cast(tf.equal(encoder_seq, 0), values.dtype)
+            else:
+                bias = tf.zeros(tf.shape(encoder_seq), values.dtype)
+        if repeats > 1:
+            h, c, keys, values, bias = (None if t is None else tf.repeat(t, repeats, axis=0)
+                                        for t in (h, c, keys, values, bias))
+        return h, c, keys, values, bias
+
+    def _step(self, tokens, h, c, keys, values, bias):
+        x = self.embedding(tokens)
+        output, (h, c) = self.lstm.cell(x, [h, c], training=False)
+        if keys is not None:
+            scores = tf.einsum('nd,nvd->nv', output, keys) + bias
+            context = tf.einsum('nv,nvd->nd', tf.nn.softmax(scores), values)
+            output = tf.concat([output, context], axis=-1)
+        probs = self.dense(output)
+        return tf.math.log(probs + 1e-12), h, c
+
+    def step_inputs(self, decoder_seq, t, previous):
+        return decoder_seq[:, t] if self.start_token is None else previous
+
+    def decoder_inputs(self, encoder_seq, decoder_seq, repeats=1):
+        """int32 arrays for a batch, with the question-fed decoder input padded to max_len"""
+        encoder_seq = np.asarray(encoder_seq, dtype=np.int32)
+        decoder_seq = encoder_seq if decoder_seq is None else np.asarray(decoder_seq, dtype=np.int32)
+        padded = np.zeros((len(decoder_seq), self.max_len), dtype=np.int32)
+        length = min(decoder_seq.shape[1], self.max_len)
+        padded[:, :length] = decoder_seq[:, :length]
+        return encoder_seq, np.repeat(padded, repeats, axis=0)
+
+    def _greedy_loop(self, encoder_seq, decoder_seq):
+        # The whole loop is one graph, so a step costs no Python round trip
+        h, c, keys, values, bias = self._encode(encoder_seq)
+        n = tf.shape(encoder_seq)[0]
+        tokens = tf.fill([n], self.start_token or 0)
+        finished = tf.zeros([n], tf.bool)
+        outputs = tf.TensorArray(tf.int32, size=0, dynamic_size=True)
+        t = 0
+        while t < self.max_len and not tf.reduce_all(finished):
+            log_probs, h, c = self._step(self.step_inputs(decoder_seq, t, tokens), h, c, keys, values, bias)
+            tokens = tf.where(finished, 0, tf.argmax(log_probs, axis=-1, output_type=tf.int32))
+            outputs = outputs.write(t, tokens)
+            finished = finished | tf.equal(tokens, self.end_token)
+            t += 1
+        return tf.transpose(outputs.stack())
+
+    def greedy(self, encoder_seq, decoder_seq=None):
+        """Most likely token at each step; returns (n, steps) int32 ids, 0 after the end"""
+        return self.greedy_loop(*self.decoder_inputs(encoder_seq, decoder_seq)).numpy()
+
+    def beam_search(self, encoder_seq, decoder_seq=None, beam_width=4, length_penalty=0.0):
+        """Batched beam search; returns the best (n, steps) int32 ids per sequence.
+
+        All n * beam_width hypotheses advance in one step call. Scores are
+        summed log-probabilities divided by length ** length_penalty.
+        """
+        n, k = len(encoder_seq), beam_width
+        encoder_seq, decoder_seq = self.decoder_inputs(encoder_seq, decoder_seq, repeats=k)
+        h, c, keys, values, bias = self.encode(encoder_seq, repeats=k)
+
+        # Only the first beam is live at the start so the k beams don't duplicate it
+        scores = np.full((n, k), -np.inf)
+        scores[:, 0] = 0.0
+        lengths = np.zeros((n, k))
+        finished = np.zeros((n, k), dtype=bool)
+        history = np.zeros((n, k, 0), dtype=np.int32)
+        tokens = np.full(n * k, self.start_token or 0, dtype=np.int32)
+
+        for t in range(self.max_len):
+            log_probs, h, c = self.step(self.step_inputs(decoder_seq, t, tokens), h, c, keys, values, bias)
+            log_probs = log_probs.numpy().reshape(n, k, -1)
+            vocab_size = log_probs.shape[-1]
+            # A finished hypothesis only extends with padding, at no cost
+            log_probs[finished] = -np.inf
+            log_probs[finished, 0] = 0.0
+
+            total = (scores[:, :, None] + log_probs).reshape(n, -1)
+            best = np.argpartition(-total, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(total, best, axis=1)
+            beams, tokens = best // vocab_size, (best % vocab_size).astype(np.int32)
+
+            rows = np.arange(n)[:, None]
+            history = np.concatenate([history[rows, beams], tokens[:, :, None]], axis=2)
+            lengths = lengths[rows, beams] + ~finished[rows, beams]
+            finished = finished[rows, beams] | (tokens == self.end_token)
+            flat = (rows * k + beams).reshape(-1)
+            h, c = tf.gather(h, flat), tf.gather(c, flat)
+            tokens = tokens.reshape(-1)
+            if finished.all():
+                break
+
+        normalized = scores / np.maximum(lengths, 1) ** length_penalty
+        return history[np.arange(n), np.argmax(normalized, axis=1)]
@@ -0,0 +1,143 @@
+import argparse
+import json
+import os
+
+import tensorflow as tf
+
+from Chatbot_Decoder import IncrementalDecoder, fed_by, layers_of
+from Chatbot_Model import TFLitePredictor
+from Chatbot_Tokenizer import VocabTokenizer, pad_post
+
+VARIANTS = ('fp32', 'fp16', 'int8')
+
+
+def unrolled_rnn(cell, inputs, mask, reverse=False):
+    """Step an LSTM cell over every position of inputs; return (outputs, h, c).
+
+    Where mask is False the state is carried over and the output is zero, as
+    a Keras RNN does with a mask. The loop is unrolled in Python, so TFLite
+    sees plain matmuls instead of the while loop and TensorList ops of a
+    dynamic-length layer, which it can't lower to builtin ops.
+    """
+    h = c = tf.zeros([tf.shape(inputs)[0], cell.units], inputs.dtype)
+    outputs = [None] * inputs.shape[1]
+    steps = range(inputs.shape[1])
+    for t in reversed(steps) if reverse else steps:
+        output, (new_h, new_c) = cell(inputs[:, t], [h, c], training=False)
+        keep = mask[:, t:t + 1]
+        h, c = tf.where(keep, new_h, h), tf.where(keep, new_c, c)
+        outputs[t] = tf.where(keep, output, tf.zeros_like(output))
+    return tf.stack(outputs, axis=1), h, c
+
+
+def unrolled_encoder(model, masked):
+    """Encoder with the same outputs as the model's encoder RNN, built from unrolled_rnn.
+
+    Keras' own unroll=True mishandles masks (the Bidirectional outputs drift
+    from the dynamic layer), so the padding mask is applied explicitly.
+    """
+    embedding = fed_by(layers_of(model, tf.keras.layers.Embedding), model.inputs[0])
+    bidirectional = layers_of(model, tf.keras.layers.Bidirectional)
+    if bidirectional and bidirectional[0].merge_mode != 'concat':
+        raise ValueError("only a concatenating Bidirectional encoder is supported")
+
+    def encode(encoder_seq, training=False):
+        inputs = embedding(encoder_seq)
+        mask = tf.not_equal(encoder_seq, 0) if masked else tf.ones_like(encoder_seq, tf.bool)
+        if not bidirectional:
+            return list(unrolled_rnn(layers_of(model, tf.keras.layers.LSTM)[0].cell, inputs, mask))
+        forward, forward_h, forward_c = unrolled_rnn(bidirectional[0].forward_layer.cell, inputs, mask)
+        backward, backward_h, backward_c = unrolled_rnn(bidirectional[0].backward_layer.cell, inputs, mask,
+                                                        reverse=True)
+        return [tf.concat([forward, backward], axis=-1), forward_h, forward_c, backward_h, backward_c]
+
+    return encode
+
+
+def predict_function(model, max_len):
+    """Inference-only graph over max_len positions with the argmax in-graph.
+
+    The decoder reads the question position by position, as the .keras model
+    does in one pass, with IncrementalDecoder's steps unrolled over max_len.
+    """
+    masked = fed_by(layers_of(model, tf.keras.layers.Embedding), model.inputs[0]).mask_zero
+    engine = IncrementalDecoder(model, max_len=max_len, masked_encoder=masked,
+                                encoder=unrolled_encoder(model, masked))
+
+    @tf.function(input_signature=[tf.TensorSpec([None, max_len], tf.int32, name='input_seq')])
+    def predict(input_seq):
+        # The Python bodies are traced inline, so each weight is folded in once
+        # rather than into every nested function call
+        h, c, keys, values, bias = engine.encode.python_function(input_seq)
+        tokens = []
+        for t in range(max_len):
+            log_probs, h, c = engine.step.python_function(input_seq[:, t], h, c, keys, values, bias)
+            tokens.append(tf.argmax(log_probs, axis=-1, output_type=tf.int32))
+        return {'tokens': tf.stack(tokens, axis=1)}
+
+    return predict.get_concrete_function()
+
+
+def convert(function, variant):
+    # Without a trackable object the converter freezes the variables into
+    # constants itself, so no optimizer or other training state is kept
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([function])
+    if variant == 'fp16':
+        # Weights stored as float16, dequantized to float32 when the model loads
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == 'int8':
+        # Dynamic range: int8 weights, activations quantized on the fly per batch
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    return converter.convert()
+
+
+def check_export(model, fp32, questions):
+    """Raise RuntimeError unless the fp32 export gives model.predict's tokens for every question"""
+    expected = model.predict([questions, questions], verbose=0).argmax(axis=-1)
+    actual = TFLitePredictor(model_content=fp32)(questions)
+    mismatched = int((actual != expected).sum())
+    if mismatched:
+        raise RuntimeError(f"the fp32 export disagrees with model.predict on {mismatched} of "
+                           f"{expected.size} tokens ({int((actual != expected).any(axis=1).sum())} "
+                           f"of {len(questions)} questions)")
+
+
+def load_questions(data_path, tokenizer_path, max_len):
+    with open(data_path) as f:
+        data = json.load(f)
+    tokenizer = VocabTokenizer.load(tokenizer_path)
+    return pad_post(tokenizer.texts_to_sequences([item['question'] for item in data]), max_len)
+
+
+def export_model(model_path='improved_model.keras', out_dir='.', variants=VARIANTS, max_len=47,
+                 data_path='data.json', tokenizer_path='tokenizer.json'):
+    """Write chatbot_<variant>.tflite for each variant; return the paths written.
+
+    Nothing is written unless the fp32 conversion matches model.predict token
+    for token on the questions in data_path.
+    """
+    model = tf.keras.models.load_model(model_path, compile=False)
+    function = predict_function(model, max_len)
+    fp32 = convert(function, 'fp32')
+    check_export(model, fp32, load_questions(data_path, tokenizer_path, max_len))
+
+    paths = []
+    for variant in variants:
+        path = os.path.join(out_dir, f'chatbot_{variant}.tflite')
+        with open(path, 'wb') as f:
+            f.write(fp32 if variant == 'fp32' else convert(function, variant))
+        paths.append(path)
+    return paths
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export the chatbot as inference-only TFLite models")
+    parser.add_argument('--model', default='improved_model.keras')
+    parser.add_argument('--out-dir', default='.')
+    parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument('--max-len', type=int, default=47)
+    parser.add_argument('--data', default='data.json', help="questions the fp32 export is checked on")
+    parser.add_argument('--tokenizer', default='tokenizer.json')
+    args = parser.parse_args()
+    for path in export_model(args.model, args.out_dir, args.variants, args.max_len, args.data, args.tokenizer):
+        print(f"Wrote {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
@@ -0,0 +1,190 @@
+import argparse
+import bisect
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+
+def store_paths(prefix):
+    return prefix + '.vectors.npy', prefix + '.words.bin', prefix + '.offsets.npy'
+
+
+def convert_glove(txt_path, prefix=None, chunk_lines=20000):
+    """Convert a GloVe text file into a binary store; return its prefix.
+
+    The store is three files next to each other:
+      <prefix>.vectors.npy  float32 matrix, one row per word in sorted order
+      <prefix>.words.bin    the sorted words, UTF-8, concatenated
+      <prefix>.offsets.npy  int64 start of each word in words.bin, plus the end
+    Words are sorted by their UTF-8 bytes so lookups can binary-search
+    words.bin without loading the vocabulary into Python objects.
+    """
+    prefix = prefix or os.path.splitext(txt_path)[0]
+    words = []
+    chunks = []
+    lines = []
+
+    def flush():
+        # One split over the whole chunk beats np.asarray per line
+        values = np.array(' '.join(lines).split(), dtype=np.float32)
+        chunks.append(values.reshape(len(lines), -1))
+        lines.clear()
+
+    with open(txt_path, encoding='utf-8') as f:
+        for line in f:
+            word, _, rest = line.rstrip('\n').partition(' ')
+            words.append(word.encode('utf-8'))
+            lines.append(rest)
+            if len(lines) == chunk_lines:
+                flush()
+    if lines:
+        flush()
+    vectors = np.concatenate(chunks)
+
+    # A later duplicate wins, as it would when building a dict from the file
+    latest = {word: row for row, word in enumerate(words)}
+    order = sorted(latest.values(), key=words.__getitem__)
+
+    vectors_path, words_path, offsets_path = store_paths(prefix)
+    np.save(vectors_path, vectors[order])
+    sorted_words = [words[row] for row in order]
+    offsets = np.zeros(len(sorted_words) + 1, dtype=np.int64)
+    np.cumsum([len(word) for word in sorted_words], out=offsets[1:])
+    np.save(offsets_path, offsets)
+    with open(words_path, 'wb') as f:
+        f.write(b''.join(sorted_words))
+    return prefix
+
+
+class GloveStore:
+    """Read-only view of a store written by convert_glove.
+
+    Vectors, words and offsets are memory-mapped, so opening the store costs
+    next to nothing and only the pages of rows actually looked up are read.
+    """
+
+    def __init__(self, prefix):
+        vectors_path, words_path, offsets_path = store_paths(prefix)
+        self.vectors = np.load(vectors_path, mmap_mode='r')
+        self.offsets = np.load(offsets_path, mmap_mode='r')
+        self.words = np.memmap(words_path, dtype=np.uint8, mode='r')
+        self.dim = self.vectors.shape[1]
+
+    @classmethod
+    def from_text(cls, txt_path):
+        """Open the store for a GloVe text file, converting it the first time"""
+        prefix = os.path.splitext(txt_path)[0]
+        if not all(os.path.exists(path) for path in store_paths(prefix)):
+            convert_glove(txt_path, prefix)
+        return cls(prefix)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        # The word at a row, as bytes; lets bisect search the store directly
+        return self.words[self.offsets[row]:self.offsets[row + 1]].tobytes()
+
+    def row(self, word):
+        """Row index of word, or -1 if it isn't in the vocabulary"""
+        key = word.encode('utf-8')
+        row = bisect.bisect_left(self, key)
+        return row if row < len(self) and self[row] == key else -1
+
+    def embedding_matrix(self, word_index, num_rows=None):
+        """(num_rows, dim) float32 matrix with row i holding the vector of the word with index i.
+
+        Words missing from GloVe, and row 0 (padding), stay zero.
+        """
+        num_rows = num_rows or max(word_index.values(), default=0) + 1
+        ids = np.fromiter(word_index.values(), dtype=np.int64, count=len(word_index))
+        rows = np.fromiter((self.row(word) for word in word_index), dtype=np.int64, count=len(word_index))
+        found = (rows >= 0) & (ids < num_rows)
+
+        matrix = np.zeros((num_rows, self.dim), dtype=np.float32)
+        # Sorted rows keep the reads from the memory map sequential
+        order = np.argsort(rows[found])
+        matrix[ids[found][order]] = self.vectors[rows[found][order]]
+        return matrix
+
+
+def text_embedding_matrix(txt_path, word_index, embedding_dim):
+    """The original approach: parse every line into a dict, then copy the rows needed"""
+    embeddings_index = {}
+    with open(txt_path, encoding='utf-8') as f:
+        for line in f:
+            values = line.split()
+            embeddings_index[values[0]] = np.asarray(values[1:], dtype='float32')
+    matrix = np.zeros((max(word_index.values(), default=0) + 1, embedding_dim), dtype=np.float32)
+    for word, i in word_index.items():
+        vector = embeddings_index.get(word)
+        if vector is not None:
+            matrix[i] = vector
+    return matrix
+
+
+BENCHMARK_SCRIPT = '''
+import json, resource, sys, time
+import numpy as np
+from Chatbot_Glove import GloveStore, text_embedding_matrix
+mode, txt_path, word_index_path, out_path = sys.argv[1:]
+with open(word_index_path) as f:
+    word_index = json.load(f)['word_index']
+start = time.perf_counter()
+if mode == 'text':
+    matrix = text_embedding_matrix(txt_path, word_index, 100)
+else:
+    matrix = GloveStore.from_text(txt_path).embedding_matrix(word_index)
+seconds = time.perf_counter() - start
+try:
+    # ru_maxrss survives fork/exec on Linux, so it would include the parent's peak
+    with open('/proc/self/status') as f:
+        max_rss_kb = next(int(line.split()[1]) for line in f if line.startswith('VmHWM:'))
+except OSError:
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+np.save(out_path, matrix)
+print(json.dumps({'seconds': seconds, 'max_rss_mb': max_rss_kb / 1024}))
+'''
+
+
+def benchmark(txt_path, word_index_path):
+    """Time and peak RSS of building embedding_matrix from text vs. the memory-mapped store"""
+    txt_path, word_index_path = os.path.abspath(txt_path), os.path.abspath(word_index_path)
+    if not all(os.path.exists(path) for path in store_paths(os.path.splitext(txt_path)[0])):
+        print("converting once (not included in the timings below)")
+        convert_glove(txt_path)
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    matrices = {}
+    for mode in ('text', 'memmap'):
+        out_path = os.path.join(here, f'.glove_benchmark_{mode}.npy')
+        # A fresh process per mode so peak RSS and page cache effects don't carry over
+        output = subprocess.run([sys.executable, '-c', BENCHMARK_SCRIPT, mode, txt_path, word_index_path, out_path],
+                                cwd=here, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        matrices[mode] = np.load(out_path)
+        os.remove(out_path)
+        print(f"{mode:<8} {result['seconds']:8.2f}s  peak RSS {result['max_rss_mb']:8.1f} MB")
+    print("matrices identical:", np.array_equal(matrices['text'], matrices['memmap']))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Binary, memory-mapped GloVe store")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    convert = subparsers.add_parser('convert', help=convert_glove.__doc__.splitlines()[0])
+    convert.add_argument('txt_path')
+    convert.add_argument('--prefix')
+    bench = subparsers.add_parser('benchmark', help=benchmark.__doc__)
+    bench.add_argument('txt_path')
+    bench.add_argument('--word-index', default='tokenizer.json',
+                       help="JSON file with a word_index, e.g. tokenizer.json")
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        prefix = convert_glove(args.txt_path, args.prefix)
+        print(f"Wrote {', '.join(store_paths(prefix))}")
+    else:
+        benchmark(args.txt_path, args.word_index)
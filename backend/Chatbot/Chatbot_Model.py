@@ -0,0 +1,113 @@
+import threading
+
+import numpy as np
+
+
+class TFLitePredictor:
+    """Run an exported chatbot_<variant>.tflite model on int32 token-id batches.
+
+    The interpreter is resized whenever the batch size changes. Inputs are
+    padded or cut to the fixed sequence length the model was exported with.
+    A TFLite interpreter isn't thread-safe, so calls are serialized.
+    """
+
+    def __init__(self, path=None, num_threads=None, model_content=None):
+        import tensorflow as tf
+        self.interpreter = tf.lite.Interpreter(model_path=path, model_content=model_content,
+                                               num_threads=num_threads)
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        self.seq_len = int(self.interpreter.get_input_details()[0]['shape_signature'][1])
+        self.batch_size = None
+        self.lock = threading.Lock()
+
+    def __call__(self, batch):
+        batch = np.asarray(batch, dtype=np.int32)
+        inputs = np.zeros((len(batch), self.seq_len), dtype=np.int32)
+        length = min(batch.shape[1], self.seq_len)
+        inputs[:, :length] = batch[:, :length]
+
+        with self.lock:
+            if len(inputs) != self.batch_size:
+                self.interpreter.resize_tensor_input(self.input_index, inputs.shape)
+                self.interpreter.allocate_tensors()
+                self.batch_size = len(inputs)
+            self.interpreter.set_tensor(self.input_index, inputs)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self.output_index).copy()
+
+
+def bucket_length(length, buckets):
+    """Smallest bucket that fits length, or length itself past the largest bucket"""
+    for bucket in buckets:
+        if length <= bucket:
+            return bucket
+    return length
+
+
+def encoder_is_masked(model):
+    """True if padding is masked out of the encoder, so trailing zeros don't change its output"""
+    if model.inputs[0].shape[1] is not None:
+        return False
+    import tensorflow as tf
+    return any(isinstance(layer, tf.keras.layers.Embedding) and layer.mask_zero for layer in model.layers)
+
+
+def keras_predictor(path, max_len=47, buckets=None, decoder='full', beam_width=4):
+    """Run a .keras model on a batch, returning token ids.
+
+    decoder='full' is one direct tf.function call over all max_len positions
+    with the argmax in-graph. 'greedy' and 'beam' decode step by step with
+    IncrementalDecoder and stop once every answer in the batch has ended.
+
+    The decoder may run for all max_len positions, since that is how many
+    tokens the answer can have. For models trained with a masked encoder the
+    encoder input is cut to the smallest of buckets that fits the longest
+    question in the batch, so it runs only as many steps as the question
+    needs. Older fixed-length models without a mask, improved_model.keras
+    among them, keep full padding because their encoder output depends on
+    it, so buckets change nothing for them.
+    """
+    import tensorflow as tf
+    model = tf.keras.models.load_model(path, compile=False)
+    masked = encoder_is_masked(model)
+    buckets = sorted(buckets or [max_len]) if masked else None
+    if decoder != 'full':
+        from Chatbot_Decoder import IncrementalDecoder
+        engine = IncrementalDecoder(model, max_len=max_len, masked_encoder=masked)
+
+    @tf.function(input_signature=[tf.TensorSpec([None, None], tf.int32), tf.TensorSpec([None, None], tf.int32)])
+    def predict(encoder_seq, decoder_seq):
+        # A direct call skips model.predict's per-call setup; argmax runs in-graph
+        # so only token ids come back instead of (batch, max_len, vocab) scores
+        prediction = model([encoder_seq, decoder_seq], training=False)
+        return tf.argmax(prediction, axis=-1, output_type=tf.int32)
+
+    def run(batch):
+        batch = np.asarray(batch, dtype=np.int32).reshape(len(batch), -1)
+        decoder_seq = np.zeros((len(batch), max_len), dtype=np.int32)
+        length = min(batch.shape[1], max_len)
+        decoder_seq[:, :length] = batch[:, :length]
+        encoder_seq = decoder_seq
+        if buckets:
+            used = np.flatnonzero(decoder_seq.any(axis=0))
+            encoder_seq = decoder_seq[:, :bucket_length(used[-1] + 1 if len(used) else 1, buckets)]
+        if decoder == 'greedy':
+            return engine.greedy(encoder_seq, decoder_seq)
+        if decoder == 'beam':
+            return engine.beam_search(encoder_seq, decoder_seq, beam_width)
+        return predict(encoder_seq, decoder_seq).numpy()
+
+    return run
+
+
+def load_predictor(path, max_len=47, buckets=None, decoder='full', beam_width=4):
+    """Return predict(batch) -> token ids for a .keras model or an exported .tflite variant.
+
+    batch holds one token-id sequence per row, zero-padded on the right to any
+    width. Exported .tflite models have a fixed length and always decode in
+    one pass, ignoring buckets and decoder.
+    """
+    if path.endswith('.tflite'):
+        return TFLitePredictor(path)
+    return keras_predictor(path, max_len, buckets, decoder, beam_width)
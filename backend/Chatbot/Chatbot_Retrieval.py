@@ -0,0 +1,113 @@
+import json
+import re
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def terms(text):
+    """Lowercased words plus adjacent word pairs, so word order counts a little"""
+    words = WORD_PATTERN.findall(text.lower())
+    return words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+
+
+class RetrievalIndex:
+    """TF-IDF nearest-question lookup over question/answer pairs.
+
+    Every stored question is one L2-normalized row of a dense float32 matrix,
+    so a query is scored against all of them with a single matrix-vector
+    product and the top k are picked with argpartition. answer() returns the
+    stored answer when the best cosine similarity reaches threshold, and None
+    otherwise so the caller can fall back to the model.
+    """
+
+    def __init__(self, questions, answers, threshold=0.6):
+        self.answers = list(answers)
+        self.threshold = threshold
+
+        documents = [terms(question) for question in questions]
+        self.vocabulary = {}
+        for document in documents:
+            for term in document:
+                self.vocabulary.setdefault(term, len(self.vocabulary))
+
+        counts = np.zeros((len(documents), len(self.vocabulary)), dtype=np.float32)
+        for row, document in enumerate(documents):
+            for term in document:
+                counts[row, self.vocabulary[term]] += 1
+        # Smoothed idf, as in scikit-learn's TfidfVectorizer
+        document_frequency = np.count_nonzero(counts, axis=0)
+        self.idf = (np.log((1 + len(documents)) / (1 + document_frequency)) + 1).astype(np.float32)
+        self.matrix = self.normalize(counts * self.idf)
+
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=1000)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path='data.json', threshold=0.6):
+        with open(path) as f:
+            data = json.load(f)
+        return cls([item['question'] for item in data], [item['answer'] for item in data], threshold)
+
+    @staticmethod
+    def normalize(matrix):
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    def vectorize(self, text):
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for term in terms(text):
+            column = self.vocabulary.get(term)
+            if column is not None:
+                vector[column] += 1
+        return self.normalize(vector * self.idf)
+
+    def search(self, text, k=1):
+        """The k most similar stored questions as [(row, cosine similarity)], best first"""
+        scores = self.matrix @ self.vectorize(text)
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top]
+
+    def answer(self, text):
+        """Stored answer of the closest question, or None below the threshold"""
+        start = time.perf_counter()
+        best = self.search(text, 1)
+        hit = bool(best) and best[0][1] >= self.threshold
+        with self.lock:
+            self.latencies.append(time.perf_counter() - start)
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return self.answers[best[0][0]] if hit else None
+
+    def stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            hits, misses = self.hits, self.misses
+
+        def percentile(p):
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))
+            return round(latencies[index] * 1000, 3)
+
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'threshold': self.threshold,
+            'questions': len(self.answers),
+            'terms': len(self.vocabulary),
+            'latency_ms': {'p50': percentile(50), 'p90': percentile(90), 'p99': percentile(99)}
+        }
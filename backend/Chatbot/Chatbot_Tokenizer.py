@@ -0,0 +1,84 @@
+import json
+import sys
+
+import numpy as np
+
+
+class VocabTokenizer:
+    """Minimal stand-in for the Keras Tokenizer, loaded from a JSON vocabulary.
+
+    Only what inference needs is kept: word_index, index_word and
+    texts_to_sequences with the same lowercasing, filtering, num_words and
+    oov_token rules as keras.preprocessing.text.Tokenizer. Loading it needs
+    neither pickle nor TensorFlow.
+    """
+
+    def __init__(self, word_index, filters='!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n',
+                 lower=True, split=' ', num_words=None, oov_token=None):
+        self.word_index = word_index
+        self.index_word = {index: word for word, index in word_index.items()}
+        self.filters = filters
+        self.lower = lower
+        self.split = split
+        self.num_words = num_words
+        self.oov_token = oov_token
+        self.translate_table = str.maketrans({c: split for c in filters})
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(**json.load(f))
+
+    def text_to_word_sequence(self, text):
+        if self.lower:
+            text = text.lower()
+        return [word for word in text.translate(self.translate_table).split(self.split) if word]
+
+    def texts_to_sequences(self, texts):
+        oov_index = self.word_index.get(self.oov_token) if self.oov_token is not None else None
+        sequences = []
+        for text in texts:
+            sequence = []
+            for word in self.text_to_word_sequence(text):
+                index = self.word_index.get(word)
+                if index is not None and (not self.num_words or index < self.num_words):
+                    sequence.append(index)
+                elif oov_index is not None:
+                    sequence.append(oov_index)
+            sequences.append(sequence)
+        return sequences
+
+
+def pad_post(sequences, maxlen):
+    """Same result as pad_sequences(sequences, maxlen, padding='post') for int ids"""
+    padded = np.zeros((len(sequences), maxlen), dtype=np.int32)
+    for row, sequence in enumerate(sequences):
+        # pad_sequences truncates from the front by default
+        trimmed = sequence[-maxlen:] if maxlen else []
+        padded[row, :len(trimmed)] = trimmed
+    return padded
+
+
+def export_tokenizer(pickle_path, json_path):
+    """Write the vocabulary and settings of a pickled Keras Tokenizer as JSON"""
+    import pickle
+    with open(pickle_path, 'rb') as f:
+        tokenizer = pickle.load(f)
+    config = {
+        'word_index': tokenizer.word_index,
+        'filters': tokenizer.filters,
+        'lower': tokenizer.lower,
+        'split': tokenizer.split,
+        'num_words': tokenizer.num_words,
+        'oov_token': tokenizer.oov_token
+    }
+    with open(json_path, 'w') as f:
+        json.dump(config, f)
+
+
+if __name__ == '__main__':
+    # Usage: python Chatbot_Tokenizer.py [tokenizer.pkl] [tokenizer.json]
+    pickle_path = sys.argv[1] if len(sys.argv) > 1 else 'tokenizer.pkl'
+    json_path = sys.argv[2] if len(sys.argv) > 2 else 'tokenizer.json'
+    export_tokenizer(pickle_path, json_path)
+    print(f"Wrote {json_path}")
@@ -6,6 +6,8 @@ from tensorflow.keras.preprocessing.sequence import pad_sequences
 from tensorflow.keras.models import Model
 from tensorflow.keras.layers import Input, Embedding, LSTM, Dense, Bidirectional, Concatenate
 from tensorflow.keras.optimizers import Adam
+from Chatbot_Dataset import bucketed_dataset
+from Chatbot_Glove import GloveStore
 
 # Load the data
 with open('NN1/data.json') as f:
@@ -22,44 +24,37 @@ tokenizer.fit_on_texts(questions + answers)
 question_sequences = tokenizer.texts_to_sequences(questions)
 answer_sequences = tokenizer.texts_to_sequences(answers)
 
-# Dynamically adjust max_len based on the longest sequence
+# Dynamically adjust max_len based on the longest sequence; only used to pad
+# questions in generate_response below, training batches are padded per bucket
 max_len = max(max(len(seq) for seq in question_sequences), max(len(seq) for seq in answer_sequences))
-
-# Pad the sequences
-question_sequences = pad_sequences(question_sequences, maxlen=max_len, padding='post')
-answer_sequences = pad_sequences(answer_sequences, maxlen=max_len, padding='post')
-
-# Convert answers to categorical (one-hot encoding)
 vocab_size = len(tokenizer.word_index) + 1
-answer_sequences = tf.keras.utils.to_categorical(answer_sequences, num_classes=vocab_size)
 
-# Load GloVe embeddings
+def training_examples():
+    # The decoder reads the question and emits the answer at the same positions,
+    # so both are zero-padded to the longer of the two. Targets stay integer ids
+    for question, answer in zip(question_sequences, answer_sequences):
+        length = max(len(question), len(answer))
+        yield question, question + [0] * (length - len(question)), answer + [0] * (length - len(answer))
+
+# Load GloVe embeddings from the memory-mapped store (converted from the
+# text file on first use); only the rows for our vocabulary are read
 embedding_dim = 100
-embeddings_index = {}
-with open('NN1\glove.6B.100d.txt', encoding='utf-8') as f:
-    for line in f:
-        values = line.split()
-        word = values[0]
-        coefs = np.asarray(values[1:], dtype='float32')
-        embeddings_index[word] = coefs
-
-embedding_matrix = np.zeros((vocab_size, embedding_dim))
-for word, i in tokenizer.word_index.items():
-    embedding_vector = embeddings_index.get(word)
-    if embedding_vector is not None:
-        embedding_matrix[i] = embedding_vector
+glove = GloveStore.from_text('NN1/glove.6B.100d.txt')
+embedding_matrix = glove.embedding_matrix(tokenizer.word_index, vocab_size)
 
 # Define the encoder
-encoder_inputs = Input(shape=(max_len,))
-encoder_embedding = Embedding(input_dim=vocab_size, output_dim=embedding_dim, weights=[embedding_matrix], input_length=max_len, trainable=False)(encoder_inputs)
+# mask_zero lets the encoder and attention skip the padding of each bucket
+encoder_inputs = Input(shape=(None,))
+encoder_embedding = Embedding(input_dim=vocab_size, output_dim=embedding_dim, weights=[embedding_matrix], mask_zero=True, trainable=False)(encoder_inputs)
 encoder_lstm = Bidirectional(LSTM(1024, return_sequences=True, return_state=True))
 encoder_outputs, forward_h, forward_c, backward_h, backward_c = encoder_lstm(encoder_embedding)
 state_h = Concatenate()([forward_h, backward_h])
 state_c = Concatenate()([forward_c, backward_c])
 
 # Define the decoder
-decoder_inputs = Input(shape=(max_len,))
-decoder_embedding = Embedding(input_dim=vocab_size, output_dim=embedding_dim, weights=[embedding_matrix], input_length=max_len, trainable=False)(decoder_inputs)
+# No mask here: the decoder is trained to emit 0 (padding) after the answer ends
+decoder_inputs = Input(shape=(None,))
+decoder_embedding = Embedding(input_dim=vocab_size, output_dim=embedding_dim, weights=[embedding_matrix], trainable=False)(decoder_inputs)
 decoder_lstm = LSTM(2048, return_sequences=True, return_state=True)
 decoder_outputs, _, _ = decoder_lstm(decoder_embedding, initial_state=[state_h, state_c])
 
@@ -75,13 +70,14 @@ decoder_outputs = decoder_dense(context_vector)
 model = Model([encoder_inputs, decoder_inputs], decoder_outputs)
 
 # Compile the model
-model.compile(optimizer=Adam(learning_rate=0.001), loss='categorical_crossentropy', metrics=['accuracy'])
+model.compile(optimizer=Adam(learning_rate=0.001), loss='sparse_categorical_crossentropy', metrics=['accuracy'])
 
 # Train the model
 batch_size = 16
 epochs = 70
 
-model.fit([question_sequences, question_sequences], answer_sequences, batch_size=batch_size, epochs=epochs, )
+dataset = bucketed_dataset(training_examples, batch_size=batch_size)
+model.fit(dataset, epochs=epochs)
 model.save('NN1/testmodel_1.keras')
 # Function to generate a response
 def generate_response(input_text):
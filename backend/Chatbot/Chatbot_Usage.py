@@ -1,59 +1,186 @@
+import time
+STARTED_AT = time.perf_counter()
+
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from flask_pymongo import PyMongo
-import numpy as np
-import tensorflow as tf
-from tensorflow.keras.preprocessing.sequence import pad_sequences
 import pickle
+import json
+import os
+import sys
+import threading
+
+# Shared plant catalogue routes live one directory up, next to FinalCode.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from plantRoutes import create_plants_blueprint
+from Chatbot_Batcher import MicroBatcher
+from Chatbot_Cache import ResponseCache
+from Chatbot_Model import load_predictor
+from Chatbot_Retrieval import RetrievalIndex
+from Chatbot_Tokenizer import VocabTokenizer, pad_post
 
 app = Flask(__name__)
 CORS(app)
 
 app.config["MONGO_URI"] = "mongodb://localhost:27017/Mpr_sem5"
 mongo = PyMongo(app)
+app.register_blueprint(create_plants_blueprint(mongo))
 
-with open('tokenizer.pkl', 'rb') as f:
-    tokenizer = pickle.load(f)
+# tokenizer.json (written by Chatbot_Tokenizer.py) loads without pickle or
+# TensorFlow; the pickled Keras tokenizer is only a fallback
+if os.path.exists('tokenizer.json'):
+    tokenizer = VocabTokenizer.load('tokenizer.json')
+else:
+    with open('tokenizer.pkl', 'rb') as f:
+        tokenizer = pickle.load(f)
+startup_timings = {'tokenizer_loaded': time.perf_counter() - STARTED_AT}
 
 max_len = 47
-model = tf.keras.models.load_model('improved_model.keras')
+predict_tokens = None
+batcher = None
+model_ready = threading.Event()
+model_error = None
 
-def generate_response(input_text):
-    input_seq = tokenizer.texts_to_sequences([input_text])
-    input_seq = pad_sequences(input_seq, maxlen=max_len, padding='post')
+# Concurrent requests are grouped into one forward pass of up to
+# CHATBOT_MAX_BATCH sequences, waiting at most CHATBOT_MAX_WAIT_MS to fill it
+CHATBOT_MAX_BATCH = int(os.environ.get('CHATBOT_MAX_BATCH', 16))
+CHATBOT_MAX_WAIT_MS = float(os.environ.get('CHATBOT_MAX_WAIT_MS', 5))
+# improved_model.keras, or a variant written by Chatbot_Export.py such as
+# chatbot_fp16.tflite or chatbot_int8.tflite
+CHATBOT_MODEL = os.environ.get('CHATBOT_MODEL', 'improved_model.keras')
+# Padded encoder lengths; a question runs through the encoder at the smallest
+# one that fits it. Only models trained with the masked encoder of
+# Chatbot_Training.py are bucketed: the shipped improved_model.keras has none,
+# so until it is retrained every question is still padded to max_len. The
+# decoder always runs max_len positions, since the answer may be that long.
+CHATBOT_BUCKETS = [int(b) for b in os.environ.get('CHATBOT_BUCKETS', '8,16,32,47').split(',')]
+# full: one pass over all max_len positions, which keeps any tokens predicted
+# after the first 0; greedy/beam (opt-in): step-wise decoding that stops when
+# the answer ends (beam keeps CHATBOT_BEAM_WIDTH hypotheses)
+CHATBOT_DECODER = os.environ.get('CHATBOT_DECODER', 'full')
+CHATBOT_BEAM_WIDTH = int(os.environ.get('CHATBOT_BEAM_WIDTH', 4))
+# How long /generate_response waits for a model that is still loading
+CHATBOT_READY_TIMEOUT = float(os.environ.get('CHATBOT_READY_TIMEOUT', 0))
+
+def load_model():
+    """Import TensorFlow, load and warm up the model off the request path"""
+    global predict_tokens, batcher, model_error
+    try:
+        # Imported on its own so its share of startup shows up separately
+        import tensorflow
+        startup_timings['tensorflow_imported'] = time.perf_counter() - STARTED_AT
+
+        predict = load_predictor(CHATBOT_MODEL, max_len, CHATBOT_BUCKETS, CHATBOT_DECODER, CHATBOT_BEAM_WIDTH)
+        startup_timings['model_loaded'] = time.perf_counter() - STARTED_AT
 
-    prediction = model.predict([input_seq, input_seq])
+        # Warm-up inference traces the function / allocates tensors before the first real request
+        predict(pad_post([[]], max_len))
+        predict_tokens = predict
+        startup_timings['warmed_up'] = time.perf_counter() - STARTED_AT
 
-    response_seq = np.argmax(prediction[0], axis=-1)
+        batcher = MicroBatcher(predict_tokens,
+                               max_batch=CHATBOT_MAX_BATCH, max_wait_ms=CHATBOT_MAX_WAIT_MS)
+        if os.environ.get('CHATBOT_PRECOMPUTE') == '1':
+            precompute_training_answers()
+            startup_timings['precomputed'] = time.perf_counter() - STARTED_AT
+    except Exception as e:
+        model_error = str(e)
+        print(f"Chatbot model failed to load: {e}", file=sys.stderr)
+    finally:
+        startup_timings['ready'] = time.perf_counter() - STARTED_AT
+        model_ready.set()
+        print("Chatbot startup (seconds since launch): " +
+              ", ".join(f"{k}={v:.2f}" for k, v in startup_timings.items()), file=sys.stderr)
+
+# Responses are cached by token ids; CHATBOT_PRECOMPUTE=1 also answers every
+# question in data.json at startup and pins those answers
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get('CHATBOT_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('CHATBOT_CACHE_TTL', 3600))
+)
+
+# Questions close enough to one in data.json (TF-IDF cosine similarity of at
+# least CHATBOT_RETRIEVAL_THRESHOLD) get its stored answer without running the
+# model; a threshold above 1 turns retrieval off
+retrieval = RetrievalIndex.load('data.json', float(os.environ.get('CHATBOT_RETRIEVAL_THRESHOLD', 0.6)))
+
+def decode_response(response_seq):
     response = ' '.join(tokenizer.index_word.get(idx, '') for idx in response_seq if idx != 0)
     return response.strip()
 
-@app.route('/api/plants', methods=['POST'])
-def add_plant():
-    try:
-        plant_data = request.json
-        result = mongo.db.plants.insert_one(plant_data)
-        plant_data['_id'] = str(result.inserted_id)
-        return jsonify({"message": "Plant uploaded successfully", "plant": plant_data}), 201
-    except Exception as e:
-        return jsonify({"message": "Error uploading plant", "error": str(e)}), 500
+def precompute_training_answers(path='data.json', batch_size=64):
+    with open(path) as f:
+        questions = [item['question'] for item in json.load(f)]
+    sequences = tokenizer.texts_to_sequences(questions)
+    for start in range(0, len(sequences), batch_size):
+        chunk = sequences[start:start + batch_size]
+        padded = pad_post(chunk, max_len)
+        for sequence, response_seq in zip(chunk, predict_tokens(padded)):
+            response_cache.pin(tuple(sequence), decode_response(response_seq))
 
-@app.route('/api/plants', methods=['GET'])
-def get_plants():
-    try:
-        plants = list(mongo.db.plants.find())
-        for plant in plants:
-            plant['_id'] = str(plant['_id'])
-        return jsonify(plants), 200
-    except Exception as e:
-        return jsonify({"message": "Error fetching plants", "error": str(e)}), 500
+def quick_response(input_text, sequence):
+    """Answer from retrieval or the response cache, or None if the model is needed"""
+    retrieved = retrieval.answer(input_text)
+    if retrieved is not None:
+        return retrieved
+    return response_cache.get(tuple(sequence))
+
+def submit_question(sequence):
+    """Queue a question for the model; the Future resolves to its answer's token ids"""
+    # Unpadded: the batcher pads to the longest question in its batch and the
+    # predictor picks the bucket; pad_sequences keeps the last max_len tokens
+    return batcher.enqueue(sequence[-max_len:])
+
+def remember_response(sequence, response_seq):
+    response = decode_response(response_seq)
+    response_cache.set(tuple(sequence), response)
+    return response
+
+def input_text_of(data):
+    """The question in a /generate_response body, or None if the body is malformed"""
+    if isinstance(data, dict) and isinstance(data.get('input_text'), str):
+        return data['input_text']
+    return None
+
+def generate_response(input_text):
+    sequence = tokenizer.texts_to_sequences([input_text])[0]
+    quick = quick_response(input_text, sequence)
+    if quick is not None:
+        return quick
+    return remember_response(sequence, submit_question(sequence).result())
+
+# Plant routes serve immediately while TensorFlow and the model load here
+threading.Thread(target=load_model, daemon=True).start()
 
 @app.route('/generate_response', methods=['POST'])
 def api_generate_response():
-    data = request.json
-    input_text = data['input_text']
+    input_text = input_text_of(request.get_json(silent=True))
+    if input_text is None:
+        return jsonify({'error': 'Expected a JSON object with an input_text string'}), 400
+    if not model_ready.wait(CHATBOT_READY_TIMEOUT) or model_error:
+        # Retrieved and cached answers don't need the model
+        quick = quick_response(input_text, tokenizer.texts_to_sequences([input_text])[0])
+        if quick is not None:
+            return jsonify({'response': quick})
+        return jsonify({'error': model_error or 'Chatbot model is still loading'}), 503
     response = generate_response(input_text)
     return jsonify({'response': response})
 
+@app.route('/api/chatbot/ready', methods=['GET'])
+def api_ready():
+    ready = model_ready.is_set() and not model_error
+    body = {'ready': ready, 'model': CHATBOT_MODEL, 'startup_seconds': startup_timings}
+    if model_error:
+        body['error'] = model_error
+    return jsonify(body), 200 if ready else 503
+
+@app.route('/api/chatbot/cache-stats', methods=['GET'])
+def api_cache_stats():
+    return jsonify(response_cache.stats())
+
+@app.route('/api/chatbot/retrieval-stats', methods=['GET'])
+def api_retrieval_stats():
+    return jsonify(retrieval.stats())
+
 if __name__ == '__main__':
     app.run(debug=True, port=3000)
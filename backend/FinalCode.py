@@ -1,9 +1,16 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from flask_pymongo import PyMongo
+from plantRoutes import create_plants_blueprint
+import os
 import re
+import sys
 import json
+import time
+import threading
+from concurrent.futures import Future
 import requests
+from requests.adapters import HTTPAdapter
 
 app = Flask(__name__)
 CORS(app)
@@ -11,9 +18,27 @@ CORS(app)
 # Configure MongoDB URI
 app.config["MONGO_URI"] = "mongodb://localhost:27017/Mpr_sem5"
 mongo = PyMongo(app)
+app.register_blueprint(create_plants_blueprint(mongo))
+
+# Shared HTTP session so upstream calls reuse keep-alive connections
+http = requests.Session()
+http.mount('https://', HTTPAdapter(pool_maxsize=20))
+http.mount('http://', HTTPAdapter(pool_maxsize=20))
+HTTP_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+
+# Weather is cached per grid cell; 0.1 degrees is roughly the resolution of
+# Open-Meteo's forecast models and "current" values refresh every 15 minutes
+WEATHER_URL = os.environ.get('OPEN_METEO_URL', 'https://api.open-meteo.com/v1/forecast')
+WEATHER_GRID = float(os.environ.get('WEATHER_GRID_DEGREES', 0.1))
+WEATHER_TTL = float(os.environ.get('WEATHER_CACHE_TTL', 15 * 60))
+WEATHER_CACHE_LIMIT = 4096
+weather_cache = {}
+weather_in_flight = {}
+weather_lock = threading.Lock()
 
 # Load predefined answers from a JSON file
-with open('responses.json', 'r') as file:
+RESPONSES_PATH = 'responses.json'
+with open(RESPONSES_PATH, 'r') as file:
     responses = json.load(file)
 
 # Keywords mapping to responses
@@ -24,7 +49,76 @@ keywords = {
     "why": ["compost", "mulch", "fertilize", "rotate", "divide", "pest_control", "weeding", "garden_design", "sunlight", "soil_health", "environment"]
 }
 
+TOKEN_PATTERN = re.compile(r'\w+')
+
+def build_chatbot_index(responses):
+    """Precompute the lookups chatbot_response needs for one responses table.
+
+    Returns (keyword_index, unknown) where keyword_index maps each question
+    type to {keyword: (rank, response)}; rank is the keyword's position in
+    keywords[question_type], which decides which keyword wins when a question
+    contains several.
+    """
+    unknown = responses["unknown"]
+    keyword_index = {
+        question_type: {
+            keyword: (rank, responses.get(f"{question_type}_{keyword}", unknown))
+            for rank, keyword in enumerate(type_keywords)
+        }
+        for question_type, type_keywords in keywords.items()
+    }
+    return keyword_index, unknown
+
+chatbot_index = build_chatbot_index(responses)
+responses_mtime = os.path.getmtime(RESPONSES_PATH)
+responses_checked_at = time.monotonic()
+responses_reload_lock = threading.Lock()
+RESPONSES_CHECK_INTERVAL = 1.0  # seconds between mtime checks
+
+def reload_responses_if_changed():
+    """Rebuild the chatbot index when responses.json changes on disk.
+
+    The new index is built aside and swapped in with a single assignment, so
+    requests in flight keep using a complete index.
+    """
+    global responses, chatbot_index, responses_mtime, responses_checked_at
+    if time.monotonic() - responses_checked_at < RESPONSES_CHECK_INTERVAL:
+        return
+    if not responses_reload_lock.acquire(blocking=False):
+        return
+    try:
+        responses_checked_at = time.monotonic()
+        mtime = os.path.getmtime(RESPONSES_PATH)
+        if mtime == responses_mtime:
+            return
+        with open(RESPONSES_PATH, 'r') as file:
+            new_responses = json.load(file)
+        new_index = build_chatbot_index(new_responses)
+        responses, chatbot_index, responses_mtime = new_responses, new_index, mtime
+    except (OSError, ValueError, KeyError) as e:
+        # Keep serving the previous index if the file is mid-write or invalid
+        print(f"Could not reload {RESPONSES_PATH}: {e}", file=sys.stderr)
+    finally:
+        responses_reload_lock.release()
+
 def chatbot_response(user_input):
+    reload_responses_if_changed()
+    keyword_index, unknown = chatbot_index
+    words = TOKEN_PATTERN.findall(user_input.lower())
+
+    # The first question word picks the table; every lookup after that is a dict hit
+    for word in words:
+        if word in keyword_index:
+            table = keyword_index[word]
+            break
+    else:
+        return unknown
+
+    matches = [table[word] for word in words if word in table]
+    return min(matches)[1] if matches else unknown
+
+def chatbot_response_linear(user_input):
+    """Original linear-scan matcher, kept as the baseline for benchmark_chatbot"""
     user_input = user_input.lower()
     user_input = re.sub(r'\W', ' ', user_input)
     
@@ -43,25 +137,93 @@ def chatbot_response(user_input):
     
     return responses["unknown"]
 
-@app.route('/api/plants', methods=['POST'])
-def add_plant():
-    try:
-        plant_data = request.json
-        result = mongo.db.plants.insert_one(plant_data)
-        plant_data['_id'] = str(result.inserted_id)
-        return jsonify({"message": "Plant uploaded successfully", "plant": plant_data}), 201
-    except Exception as e:
-        return jsonify({"message": "Error uploading plant", "error": str(e)}), 500
+def benchmark_chatbot(iterations=20000):
+    """Print queries/second for the linear matcher and the indexed one"""
+    queries = [
+        "What is soil?",
+        "How do I water and prune my roses?",
+        "When should I plant tomatoes and harvest them?",
+        "Why should I compost kitchen scraps in the garden?",
+        "Tell me something nice about sunflowers",
+        "why does mulch help? what about soil health and the environment",
+        "how " + "my little backyard vegetable patch keeps getting " * 20 + "water",
+    ]
+    for query in queries:
+        assert chatbot_response(query) == chatbot_response_linear(query), query
+
+    for name, func in (("linear", chatbot_response_linear), ("indexed", chatbot_response)):
+        start = time.perf_counter()
+        for i in range(iterations):
+            func(queries[i % len(queries)])
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {iterations / elapsed:,.0f} queries/s")
+
+def weather_cell(latitude, longitude):
+    return (round(float(latitude) / WEATHER_GRID), round(float(longitude) / WEATHER_GRID))
+
+def weather_params(cell):
+    return {
+        "latitude": round(cell[0] * WEATHER_GRID, 4),
+        "longitude": round(cell[1] * WEATHER_GRID, 4),
+        "current": "temperature_2m,wind_speed_10m",
+        "hourly": "temperature_2m,relative_humidity_2m,wind_speed_10m"
+    }
+
+def cached_weather(cell):
+    """Cached forecast for a cell if it is younger than WEATHER_TTL, else None"""
+    with weather_lock:
+        cached = weather_cache.get(cell)
+        if cached and time.time() - cached[0] < WEATHER_TTL:
+            return cached[1]
+    return None
+
+def store_weather(cell, weather_data):
+    with weather_lock:
+        if len(weather_cache) >= WEATHER_CACHE_LIMIT:
+            now = time.time()
+            for key in [k for k, (t, _) in weather_cache.items() if now - t >= WEATHER_TTL]:
+                del weather_cache[key]
+            if len(weather_cache) >= WEATHER_CACHE_LIMIT:
+                weather_cache.clear()
+        weather_cache[cell] = (time.time(), weather_data)
+
+def fetch_weather(latitude, longitude):
+    """Return the forecast for the grid cell containing (latitude, longitude).
+
+    Cached per cell for WEATHER_TTL seconds. Concurrent lookups for the same
+    cell share a single upstream request.
+    """
+    cell = weather_cell(latitude, longitude)
+    cached = cached_weather(cell)
+    if cached is not None:
+        return cached
+
+    with weather_lock:
+        future = weather_in_flight.get(cell)
+        leader = future is None
+        if leader:
+            future = Future()
+            weather_in_flight[cell] = future
+
+    if not leader:
+        # No deadline of our own: HTTP_TIMEOUT bounds the leader's call, and a
+        # shorter one could fail followers while the leader is still answering
+        return future.result()
 
-@app.route('/api/plants', methods=['GET'])
-def get_plants():
     try:
-        plants = list(mongo.db.plants.find())
-        for plant in plants:
-            plant['_id'] = str(plant['_id'])
-        return jsonify(plants), 200
-    except Exception as e:
-        return jsonify({"message": "Error fetching plants", "error": str(e)}), 500
+        response = http.get(WEATHER_URL, params=weather_params(cell), timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+        weather_data = response.json()
+        store_weather(cell, weather_data)
+        future.set_result(weather_data)
+        return weather_data
+    except BaseException as e:
+        # Settle the future whatever happens, since followers wait on it without a timeout
+        future.set_exception(e)
+        raise
+    finally:
+        with weather_lock:
+            weather_in_flight.pop(cell, None)
 
 @app.route('/generate_response', methods=['POST'])
 def api_generate_response():
@@ -77,13 +239,14 @@ def get_weather():
         latitude = data.get('latitude')
         longitude = data.get('longitude')
         
-        weather_url = f"https://api.open-meteo.com/v1/forecast?latitude={latitude}&longitude={longitude}&current=temperature_2m,wind_speed_10m&hourly=temperature_2m,relative_humidity_2m,wind_speed_10m"
-        response = requests.get(weather_url)
-        weather_data = response.json()
+        weather_data = fetch_weather(latitude, longitude)
         
         return jsonify(weather_data)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
-    app.run(debug=True, port=3000)
+    if '--benchmark-chatbot' in sys.argv:
+        benchmark_chatbot()
+    else:
+        app.run(debug=True, port=3000)
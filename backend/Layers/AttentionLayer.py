@@ -25,19 +25,147 @@ def attention(q, k, v, mask=None):
     return output, attention_weights
 
 
-# Example usage
-batch_size = 2
-seq_len = 5
-d_k = 4  # Dimension of key/query vectors
-d_v = 6  # Dimension of value vectors
-
-# Random input data for query (q), key (k), and value (v)
-q = np.random.rand(batch_size, seq_len, d_k)
-k = np.random.rand(batch_size, seq_len, d_k)
-v = np.random.rand(batch_size, seq_len, d_v)
-
-# Call attention layer
-output, attention_weights = attention(q, k, v)
-
-print("Attention Output:\n", output)
-print("Attention Weights:\n", attention_weights)
+def attention_backward(d_output, q, k, v, attention_weights):
+    """
+    Gradients of attention() with respect to q, k and v.
+    d_output: gradient of the output (batch_size, seq_len_q, d_v)
+    attention_weights: the weights attention() returned for the same inputs
+    Masked positions have zero weight, so they get no gradient.
+    """
+    d_k = q.shape[-1]
+    # output = P V
+    d_v = np.matmul(attention_weights.transpose(0, 2, 1), d_output)
+    d_weights = np.matmul(d_output, v.transpose(0, 2, 1))
+
+    # Softmax backward: dS = P * (dP - sum(dP * P))
+    d_scores = d_weights
+    d_scores -= np.sum(d_weights * attention_weights, axis=-1, keepdims=True)
+    d_scores *= attention_weights
+    d_scores /= np.sqrt(d_k)
+
+    # scores = Q K^T / sqrt(d_k)
+    d_q = np.matmul(d_scores, k)
+    d_k_grad = np.matmul(d_scores.transpose(0, 2, 1), q)
+    return d_q, d_k_grad, d_v
+
+
+def chunked_attention(q, k, v, key_mask=None, causal=False, block_size=256, out=None, dtype=np.float32):
+    """
+    Same result as attention(q, k, v, mask)[0], without the (seq_len_q, seq_len_k) matrix,
+    except that a query whose keys are all masked gets zeros instead of the mean of v.
+    key_mask: (batch_size, seq_len_k), 0 for keys to ignore, e.g. padding
+    causal: query i only sees keys up to i + seq_len_k - seq_len_q
+    out: optional (batch_size, seq_len_q, d_v) array of dtype to write into
+
+    Queries and keys are processed in block_size tiles. Each query block keeps
+    a running maximum and sum of its exponentiated scores (online softmax) and
+    rescales its accumulated output whenever the maximum grows, so only one
+    (batch_size, block_size, block_size) tile of scores exists at a time and
+    memory is linear in sequence length. Masks are applied per tile; tiles
+    that are entirely in the causal future are skipped.
+    """
+    q, k, v = (np.asarray(a, dtype=dtype) for a in (q, k, v))
+    batch_size, len_q, d_k = q.shape
+    len_k = k.shape[1]
+    if out is None:
+        out = np.empty((batch_size, len_q, v.shape[-1]), dtype=dtype)
+    scale = dtype(1 / np.sqrt(d_k))
+    offset = len_k - len_q
+    ignored = None if key_mask is None else np.asarray(key_mask) == 0
+
+    q_block = np.empty((batch_size, block_size, d_k), dtype=dtype)
+    tile = np.empty((batch_size, block_size, block_size), dtype=dtype)
+    tile_out = np.empty((batch_size, block_size, v.shape[-1]), dtype=dtype)
+    positions = np.arange(block_size)
+
+    for q_start in range(0, len_q, block_size):
+        q_end = min(q_start + block_size, len_q)
+        rows = q_end - q_start
+        qb = q_block[:, :rows]
+        np.multiply(q[:, q_start:q_end], scale, out=qb)
+        acc = out[:, q_start:q_end]
+        acc.fill(0)
+        running_max = np.full((batch_size, rows), -np.inf, dtype=dtype)
+        running_sum = np.zeros((batch_size, rows), dtype=dtype)
+
+        # Keys past the last visible position of this block's last query are never needed
+        k_stop = min(len_k, q_end + offset) if causal else len_k
+        for k_start in range(0, k_stop, block_size):
+            k_end = min(k_start + block_size, k_stop)
+            scores = tile[:, :rows, :k_end - k_start]
+            np.matmul(qb, k[:, k_start:k_end].transpose(0, 2, 1), out=scores)
+            # Masked scores become -1e9, as in attention()
+            if ignored is not None:
+                np.copyto(scores, -1e9, where=ignored[:, None, k_start:k_end])
+            if causal and k_end > q_start + offset + 1:
+                future = (k_start + positions[:k_end - k_start])[None, :] > (q_start + offset + positions[:rows])[:, None]
+                scores[:, future] = -1e9
+
+            tile_max = scores.max(axis=-1)
+            new_max = np.maximum(running_max, tile_max)
+            correction = np.exp(running_max - new_max)
+            scores -= new_max[:, :, None]
+            np.exp(scores, out=scores)
+            running_sum *= correction
+            running_sum += scores.sum(axis=-1)
+            acc *= correction[:, :, None]
+            acc += np.matmul(scores, v[:, k_start:k_end], out=tile_out[:, :rows])
+            running_max = new_max
+
+        # Queries that see no key at all (running max still at the -1e9 fill) output zeros
+        empty = running_max < -1e8
+        running_sum[empty] = 1
+        acc[empty] = 0
+        acc /= running_sum[:, :, None]
+    return out
+
+
+def benchmark(lengths=(64, 256, 1024, 2048, 4096, 8192), batch_size=1, d_k=64, naive_max=4096):
+    """Time and peak allocated memory of attention() vs. chunked_attention(), causal"""
+    import time
+    import tracemalloc
+
+    def measure(fn):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result, seconds, peak / 2**20
+
+    print(f"{'seq_len':>7} {'naive s':>9} {'naive MB':>9} {'chunked s':>10} {'chunked MB':>11} {'max diff':>9}")
+    for seq_len in lengths:
+        q, k, v = (np.random.randn(batch_size, seq_len, d_k).astype(np.float32) for _ in range(3))
+        chunked, chunked_s, chunked_mb = measure(lambda: chunked_attention(q, k, v, causal=True))
+        if seq_len > naive_max:
+            print(f"{seq_len:>7} {'-':>9} {'-':>9} {chunked_s:>10.3f} {chunked_mb:>11.1f} {'-':>9}")
+            continue
+        mask = np.tril(np.ones((seq_len, seq_len)))[None]
+        (naive, _), naive_s, naive_mb = measure(lambda: attention(q, k, v, mask))
+        diff = np.abs(naive - chunked).max()
+        print(f"{seq_len:>7} {naive_s:>9.3f} {naive_mb:>9.1f} {chunked_s:>10.3f} {chunked_mb:>11.1f} {diff:>9.1e}")
+
+
+if __name__ == '__main__':
+    import sys
+    if '--benchmark' in sys.argv:
+        benchmark()
+        sys.exit()
+
+    # Example usage
+    batch_size = 2
+    seq_len = 5
+    d_k = 4  # Dimension of key/query vectors
+    d_v = 6  # Dimension of value vectors
+
+    # Random input data for query (q), key (k), and value (v)
+    q = np.random.rand(batch_size, seq_len, d_k)
+    k = np.random.rand(batch_size, seq_len, d_k)
+    v = np.random.rand(batch_size, seq_len, d_v)
+
+    # Call attention layer
+    output, attention_weights = attention(q, k, v)
+
+    print("Attention Output:\n", output)
+    print("Attention Weights:\n", attention_weights)
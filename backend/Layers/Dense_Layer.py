@@ -1,23 +1,38 @@
 import numpy as np
 
-np.random.seed(0)
-
-
-X = [[1, 2, 3, 2.5],
-     [2.0, 5.0, -1.0, 2.0],
-     [-1.5, 2.7, 3.3, -0.8]]
 
 class layer_dense():
-    def _init_(self, n_inputs, n_neurons):
-        self.weights=0.10*np.random.randn(n_inputs, n_neurons)
-        self.bias=np.zeros((1, n_neurons))
+    def __init__(self, n_inputs, n_neurons, dtype=np.float64):
+        self.weights=(0.10*np.random.randn(n_inputs, n_neurons)).astype(dtype)
+        self.bias=np.zeros((1, n_neurons), dtype=dtype)
+        self.dweights=np.zeros_like(self.weights)
+        self.dbias=np.zeros_like(self.bias)
     def forward(self, inputs):
-        self.output=np.dot(inputs, self.weights) + self.bias
+        # Any leading dimensions, e.g. (batch, steps, n_inputs)
+        self.inputs=np.asarray(inputs, dtype=self.weights.dtype)
+        self.output=np.matmul(self.inputs, self.weights) + self.bias[0]
+        return self.output
+    def backward(self, dvalues):
+        """Gradient of the last forward(); fills dweights/dbias in place, returns dinputs"""
+        flat_inputs=self.inputs.reshape(-1, self.weights.shape[0])
+        flat_dvalues=dvalues.reshape(-1, self.weights.shape[1])
+        np.matmul(flat_inputs.T, flat_dvalues, out=self.dweights)
+        np.sum(flat_dvalues, axis=0, keepdims=True, out=self.dbias)
+        self.dinputs=np.matmul(dvalues, self.weights.T)
+        return self.dinputs
+
+
+if __name__ == '__main__':
+    np.random.seed(0)
+
+    X = [[1, 2, 3, 2.5],
+         [2.0, 5.0, -1.0, 2.0],
+         [-1.5, 2.7, 3.3, -0.8]]
 
-layer1= layer_dense(4,3)
-layer1.forward(X)
-print(layer1.output)
+    layer1= layer_dense(4,3)
+    layer1.forward(X)
+    print(layer1.output)
 
-layer2 = layer_dense(3,2)
-layer2.forward(layer1.output)
-print(layer2.output)
\ No newline at end of file
+    layer2 = layer_dense(3,2)
+    layer2.forward(layer1.output)
+    print(layer2.output)
@@ -59,18 +59,240 @@ class LSTM:
 
         return self.h
 
-# Test the LSTM implementation
-np.random.seed(42)
+class SequenceLSTM:
+    """Batch-first LSTM over whole sequences.
 
-input_size = 10   # Input dimension
-hidden_size = 20  # Number of LSTM units (hidden size)
-lstm = LSTM(input_size, hidden_size)
+    The four gates share one (4H, D+H) weight matrix W = [Wx | Wh], stacked
+    in the order input, forget, output, cell (i, f, o, g) so the three
+    sigmoid gates are one contiguous block. forward() projects the inputs
+    of every timestep with a single GEMM up front, leaving one (B, H) x (H, 4H)
+    product per step for the recurrence. Step buffers are allocated once per
+    batch size and updated in place.
+    """
 
-# Example input for one timestep (input size = 10)
-x_t = np.random.randn(input_size)
+    def __init__(self, input_size, hidden_size, dtype=np.float32):
+        self.input_size = input_size
+        self.hidden_size = hidden_size
+        self.dtype = dtype
+        scale = 1 / np.sqrt(hidden_size)
+        self.W = (np.random.randn(4 * hidden_size, input_size + hidden_size) * scale).astype(dtype)
+        self.b = np.zeros(4 * hidden_size, dtype=dtype)
+        self.dW = np.zeros_like(self.W)
+        self.db = np.zeros_like(self.b)
+        self.buffers = None
+        self.cache = None
+
+    @classmethod
+    def from_lstm(cls, lstm, dtype=np.float64):
+        """Copy the weights of a per-step LSTM, so both compute the same thing"""
+        layer = cls(lstm.input_size, lstm.hidden_size, dtype)
+        layer.W = np.block([[lstm.Wi, lstm.Ui], [lstm.Wf, lstm.Uf],
+                            [lstm.Wo, lstm.Uo], [lstm.Wg, lstm.Ug]]).astype(dtype)
+        layer.b = np.concatenate([lstm.bi, lstm.bf, lstm.bo, lstm.bg]).ravel().astype(dtype)
+        return layer
+
+    def step_buffers(self, batch_size):
+        if self.buffers is None or self.buffers['h'].shape[0] != batch_size:
+            H = self.hidden_size
+            self.buffers = {
+                'gates': np.empty((batch_size, 4 * H), dtype=self.dtype),
+                'h': np.empty((batch_size, H), dtype=self.dtype),
+                'c': np.empty((batch_size, H), dtype=self.dtype),
+                'tmp': np.empty((batch_size, H), dtype=self.dtype),
+            }
+        return self.buffers
+
+    def training_cache(self, steps, batch_size):
+        """Time-major activations for backward(), reallocated only when the shape changes"""
+        H = self.hidden_size
+        if self.cache is None or self.cache['gates'].shape[:2] != (steps, batch_size):
+            self.cache = {
+                'gates': np.empty((steps, batch_size, 4 * H), dtype=self.dtype),  # after activation
+                'h': np.empty((steps + 1, batch_size, H), dtype=self.dtype),      # h[0] is h0
+                'c': np.empty((steps + 1, batch_size, H), dtype=self.dtype),      # c[0] is c0
+                'tanh_c': np.empty((steps, batch_size, H), dtype=self.dtype),
+                'd_gates': np.empty((steps, batch_size, 4 * H), dtype=self.dtype),
+            }
+        return self.cache
+
+    @staticmethod
+    def sigmoid_(x):
+        # In place; tanh form of the sigmoid doesn't overflow in exp
+        x *= 0.5
+        np.tanh(x, out=x)
+        x *= 0.5
+        x += 0.5
+
+    def forward(self, x, h0=None, c0=None, train=False):
+        """x: (batch, steps, input_size). Returns (outputs (batch, steps, H), (h, c)).
+
+        h0 and c0 are (batch, H) initial states, zero by default. The returned
+        h and c are copies, so the layer's buffers can be reused on the next call.
+        With train=True every step's activations are kept for backward().
+        """
+        x = np.asarray(x, dtype=self.dtype)
+        B, T, D = x.shape
+        H = self.hidden_size
+
+        # Input projection for all timesteps in one GEMM, bias folded in;
+        # time-major so each step reads a contiguous (B, 4H) block
+        x_t = np.ascontiguousarray(x.transpose(1, 0, 2))
+        projected = (x_t.reshape(T * B, D) @ self.W[:, :D].T).reshape(T, B, 4 * H)
+        projected += self.b
+        Wh_T = np.ascontiguousarray(self.W[:, D:].T)
+
+        buf = self.step_buffers(B)
+        tmp = buf['tmp']
+        if train:
+            cache = self.training_cache(T, B)
+            cache['x'] = x_t
+            hs, cs = cache['h'], cache['c']
+        else:
+            hs, cs = (buf['h'],) * 2, (buf['c'],) * 2
+        hs[0][:] = 0 if h0 is None else h0
+        cs[0][:] = 0 if c0 is None else c0
+        outputs = np.empty((B, T, H), dtype=self.dtype)
+
+        for t in range(T):
+            if train:
+                gates, tanh_c = cache['gates'][t], cache['tanh_c'][t]
+                h_prev, c_prev, h, c = hs[t], cs[t], hs[t + 1], cs[t + 1]
+            else:
+                gates, tanh_c = buf['gates'], tmp
+                h_prev = h = buf['h']
+                c_prev = c = buf['c']
+            i, f, o, g = (gates[:, k * H:(k + 1) * H] for k in range(4))
+
+            np.matmul(h_prev, Wh_T, out=gates)
+            gates += projected[t]
+            self.sigmoid_(gates[:, :3 * H])
+            np.tanh(g, out=g)
+            # c = f * c + i * g; h = o * tanh(c)
+            np.multiply(f, c_prev, out=c)
+            np.multiply(i, g, out=tmp)
+            c += tmp
+            np.tanh(c, out=tanh_c)
+            np.multiply(o, tanh_c, out=h)
+            outputs[:, t] = h
+        # The last state slot; for an empty sequence that's h0/c0 unchanged
+        return outputs, (hs[-1].copy(), cs[-1].copy())
+
+    def backward(self, d_outputs, dh_last=None, dc_last=None):
+        """Backpropagation through time for the last forward(train=True) call.
+
+        d_outputs is the (batch, steps, H) gradient of the outputs; dh_last and
+        dc_last are gradients of the returned final (h, c), if they were used.
+        Writes self.dW and self.db in place and returns (dx, dh0, dc0).
+        """
+        cache = self.cache
+        T, B, _ = cache['gates'].shape
+        H, D = self.hidden_size, self.input_size
+        Wh = self.W[:, D:]
+        d_gates = cache['d_gates']
+
+        dh = np.zeros((B, H), dtype=self.dtype)
+        dc = np.zeros((B, H), dtype=self.dtype)
+        if dh_last is not None:
+            dh += dh_last
+        if dc_last is not None:
+            dc += dc_last
+        tmp = np.empty((B, H), dtype=self.dtype)
+
+        for t in reversed(range(T)):
+            dh += d_outputs[:, t]
+            gates, tanh_c, c_prev = cache['gates'][t], cache['tanh_c'][t], cache['c'][t]
+            i, f, o, g = (gates[:, k * H:(k + 1) * H] for k in range(4))
+            di, df, do, dg = (d_gates[t, :, k * H:(k + 1) * H] for k in range(4))
+
+            # dc += dh * o * (1 - tanh(c)^2)
+            np.multiply(tanh_c, tanh_c, out=tmp)
+            np.subtract(1, tmp, out=tmp)
+            tmp *= o
+            tmp *= dh
+            dc += tmp
+            # Gate gradients before activation: sigmoid' = s(1 - s), tanh' = 1 - t^2
+            np.multiply(dh, tanh_c, out=do)
+            np.multiply(dc, g, out=di)
+            np.multiply(dc, c_prev, out=df)
+            np.multiply(dc, i, out=dg)
+            sig = d_gates[t, :, :3 * H]
+            sig *= gates[:, :3 * H]
+            sig *= 1 - gates[:, :3 * H]
+            dg *= 1 - g * g
+
+            dc *= f
+            np.matmul(d_gates[t], Wh, out=dh)
+
+        # Weight gradients for all timesteps at once
+        flat = d_gates.reshape(T * B, 4 * H)
+        np.matmul(flat.T, cache['x'].reshape(T * B, D), out=self.dW[:, :D])
+        np.matmul(flat.T, cache['h'][:T].reshape(T * B, H), out=self.dW[:, D:])
+        np.sum(flat, axis=0, out=self.db)
+        dx = (flat @ self.W[:, :D]).reshape(T, B, D).transpose(1, 0, 2)
+        return dx, dh, dc
+
+
+def per_step_forward(lstm, x):
+    """Run the per-step LSTM over a (batch, steps, input_size) array, one sample and step at a time"""
+    outputs = np.empty((x.shape[0], x.shape[1], lstm.hidden_size))
+    for n, sequence in enumerate(x):
+        lstm.h = np.zeros((lstm.hidden_size, 1))
+        lstm.c = np.zeros((lstm.hidden_size, 1))
+        for t, x_t in enumerate(sequence):
+            outputs[n, t] = lstm.forward(x_t).ravel()
+    return outputs
+
+
+def benchmark(configs=((32, 47, 100, 256), (64, 47, 100, 512), (16, 200, 128, 256)), repeats=3):
+    """Per-step LSTM vs. SequenceLSTM over (batch, steps, input_size, hidden_size) configs"""
+    import time
+
+    def best_time(fn):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    print(f"{'batch':>5} {'steps':>5} {'input':>5} {'hidden':>6} {'per-step s':>11} "
+          f"{'fused f64 s':>11} {'fused f32 s':>11} {'speedup f32':>11} {'max diff':>9}")
+    for B, T, D, H in configs:
+        lstm = LSTM(D, H)
+        # Scaled down so the random weights don't saturate every gate
+        for name in ('Wf', 'Wi', 'Wg', 'Wo', 'Uf', 'Ui', 'Ug', 'Uo'):
+            setattr(lstm, name, getattr(lstm, name) / np.sqrt(D + H))
+        x = np.random.randn(B, T, D)
+        fused64 = SequenceLSTM.from_lstm(lstm, np.float64)
+        fused32 = SequenceLSTM.from_lstm(lstm, np.float32)
+
+        reference = per_step_forward(lstm, x)
+        diff = np.abs(fused64.forward(x)[0] - reference).max()
+        per_step = best_time(lambda: per_step_forward(lstm, x))
+        f64 = best_time(lambda: fused64.forward(x))
+        f32 = best_time(lambda: fused32.forward(x))
+        print(f"{B:>5} {T:>5} {D:>5} {H:>6} {per_step:>11.4f} {f64:>11.4f} {f32:>11.4f} "
+              f"{per_step / f32:>10.1f}x {diff:>9.1e}")
+
+
+if __name__ == '__main__':
+    import sys
+    if '--benchmark' in sys.argv:
+        benchmark()
+        sys.exit()
+
+    # Test the LSTM implementation
+    np.random.seed(42)
+
+    input_size = 10   # Input dimension
+    hidden_size = 20  # Number of LSTM units (hidden size)
+    lstm = LSTM(input_size, hidden_size)
+
+    # Example input for one timestep (input size = 10)
+    x_t = np.random.randn(input_size)
 
-# Forward pass through the LSTM for the current timestep
-h_t = lstm.forward(x_t)
+    # Forward pass through the LSTM for the current timestep
+    h_t = lstm.forward(x_t)
 
-print("Hidden state at current timestep:")
-print(h_t)
+    print("Hidden state at current timestep:")
+    print(h_t)
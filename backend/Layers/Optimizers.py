@@ -0,0 +1,65 @@
+import numpy as np
+
+
+def clip_by_global_norm(grads, max_norm):
+    """Scale every gradient in place so their combined L2 norm is at most max_norm; return the norm"""
+    norm = np.sqrt(sum(float(np.vdot(g, g)) for g in grads))
+    if norm > max_norm:
+        for g in grads:
+            g *= max_norm / norm
+    return norm
+
+
+class SGD:
+    """Minibatch SGD with optional momentum, updating the parameter arrays in place"""
+
+    def __init__(self, params, lr=0.01, momentum=0.0):
+        self.params = params
+        self.lr = lr
+        self.momentum = momentum
+        self.velocity = [np.zeros_like(p) for p in params] if momentum else None
+
+    def step(self, grads):
+        for i, (p, g) in enumerate(zip(self.params, grads)):
+            if self.velocity is None:
+                p -= self.lr * g
+                continue
+            v = self.velocity[i]
+            v *= self.momentum
+            v -= self.lr * g
+            p += v
+
+
+class Adam:
+    """Adam (Kingma & Ba), with moment buffers allocated once and updated in place"""
+
+    def __init__(self, params, lr=0.001, beta1=0.9, beta2=0.999, eps=1e-8):
+        self.params = params
+        self.lr = lr
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+        self.t = 0
+        self.m = [np.zeros_like(p) for p in params]
+        self.v = [np.zeros_like(p) for p in params]
+        self.tmp = [np.empty_like(p) for p in params]
+
+    def step(self, grads):
+        self.t += 1
+        # Bias corrections folded into the step size
+        lr = self.lr * np.sqrt(1 - self.beta2 ** self.t) / (1 - self.beta1 ** self.t)
+        for p, g, m, v, tmp in zip(self.params, grads, self.m, self.v, self.tmp):
+            # m = b1 m + (1 - b1) g; v = b2 v + (1 - b2) g^2
+            m *= self.beta1
+            np.multiply(g, 1 - self.beta1, out=tmp)
+            m += tmp
+            v *= self.beta2
+            np.multiply(g, g, out=tmp)
+            tmp *= 1 - self.beta2
+            v += tmp
+            # p -= lr m / (sqrt(v) + eps)
+            np.sqrt(v, out=tmp)
+            tmp += self.eps
+            np.divide(m, tmp, out=tmp)
+            tmp *= lr
+            p -= tmp
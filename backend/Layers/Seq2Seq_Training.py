@@ -0,0 +1,243 @@
+"""Train a small attention seq2seq chatbot with the NumPy layers, no TensorFlow.
+
+    python Seq2Seq_Training.py check                 # gradient check every layer
+    python Seq2Seq_Training.py train --epochs 30     # train on ../Chatbot/data.json
+
+The model mirrors Chatbot_Training.py at a smaller size: a shared embedding,
+an LSTM encoder whose final state seeds an LSTM decoder, dot-product
+attention from the decoder outputs over the encoder outputs, and a dense
+softmax over [decoder output, context].
+"""
+import argparse
+import json
+import os
+import re
+import time
+from collections import Counter
+
+import numpy as np
+
+from AttentionLayer import attention, attention_backward
+from Dense_Layer import layer_dense
+from Embedding_Layer import Embedding
+from LSTM_Layer import SequenceLSTM
+from Optimizers import SGD, Adam, clip_by_global_norm
+
+PAD, START, END, UNK = 0, 1, 2, 3
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def softmax_cross_entropy(logits, targets):
+    """Mean cross-entropy over non-PAD targets, and its gradient with respect to logits"""
+    probs = logits - logits.max(axis=-1, keepdims=True)
+    np.exp(probs, out=probs)
+    probs /= probs.sum(axis=-1, keepdims=True)
+
+    mask = targets != PAD
+    count = max(int(mask.sum()), 1)
+    picked = np.take_along_axis(probs, targets[..., None], axis=-1)[..., 0]
+    loss = -np.log(picked[mask] + 1e-12).sum() / count
+
+    # probs becomes the gradient: softmax - one_hot, zero on padding
+    np.put_along_axis(probs, targets[..., None], picked[..., None] - 1, axis=-1)
+    probs *= (mask / count)[..., None]
+    return loss, probs
+
+
+class Seq2Seq:
+    def __init__(self, vocab_size, embedding_dim=64, hidden_size=128, dtype=np.float32):
+        self.hidden_size = hidden_size
+        self.embedding = Embedding(vocab_size, embedding_dim, dtype)
+        self.encoder = SequenceLSTM(embedding_dim, hidden_size, dtype)
+        self.decoder = SequenceLSTM(embedding_dim, hidden_size, dtype)
+        self.output = layer_dense(2 * hidden_size, vocab_size, dtype)
+
+    def params(self):
+        return [self.embedding.weights, self.encoder.W, self.encoder.b,
+                self.decoder.W, self.decoder.b, self.output.weights, self.output.bias]
+
+    def grads(self):
+        return [self.embedding.dweights, self.encoder.dW, self.encoder.db,
+                self.decoder.dW, self.decoder.db, self.output.dweights, self.output.dbias]
+
+    def forward(self, encoder_ids, decoder_ids, train=False):
+        """Logits (batch, decoder_steps, vocab_size) for teacher-forced decoder input"""
+        # One gather for both sides of the shared embedding
+        embedded = self.embedding.forward(np.concatenate([encoder_ids, decoder_ids], axis=1))
+        split = encoder_ids.shape[1]
+
+        self.encoder_out, (h, c) = self.encoder.forward(embedded[:, :split], train=train)
+        self.decoder_out, _ = self.decoder.forward(embedded[:, split:], h, c, train=train)
+        mask = (encoder_ids != PAD)[:, None, :]
+        context, self.weights = attention(self.decoder_out, self.encoder_out, self.encoder_out, mask)
+        return self.output.forward(np.concatenate([self.decoder_out, context], axis=-1))
+
+    def backward(self, d_logits):
+        """Fill every layer's gradients from d_logits of the last forward(train=True)"""
+        H = self.hidden_size
+        d_features = self.output.backward(d_logits)
+        d_decoder = d_features[..., :H].copy()
+        d_query, d_keys, d_values = attention_backward(d_features[..., H:], self.decoder_out,
+                                                       self.encoder_out, self.encoder_out, self.weights)
+        d_decoder += d_query
+        dx_decoder, dh0, dc0 = self.decoder.backward(d_decoder)
+        dx_encoder, _, _ = self.encoder.backward(d_keys + d_values, dh0, dc0)
+        self.embedding.backward(np.concatenate([dx_encoder, dx_decoder], axis=1))
+
+    def loss(self, encoder_ids, decoder_ids, targets, train=False):
+        loss, d_logits = softmax_cross_entropy(self.forward(encoder_ids, decoder_ids, train), targets)
+        if train:
+            self.backward(d_logits)
+        return loss
+
+    def greedy(self, encoder_ids, max_len=50):
+        """Decode one token at a time, feeding back the previous prediction"""
+        embedded = self.embedding.weights[encoder_ids]
+        encoder_out, (h, c) = self.encoder.forward(embedded)
+        mask = (encoder_ids != PAD)[:, None, :]
+        tokens = np.full(len(encoder_ids), START)
+        result = []
+        for _ in range(max_len):
+            decoder_out, (h, c) = self.decoder.forward(self.embedding.weights[tokens][:, None], h, c)
+            context, _ = attention(decoder_out, encoder_out, encoder_out, mask)
+            logits = self.output.forward(np.concatenate([decoder_out, context], axis=-1))
+            tokens = logits[:, 0].argmax(axis=-1)
+            result.append(tokens)
+            if np.all(np.any(np.array(result) == END, axis=0)):
+                break
+        return np.array(result).T
+
+
+# ------------------------ GRADIENT CHECK ----------------------------
+
+def gradient_check(samples=20, eps=1e-5, seed=0):
+    """Compare backward() with central differences on a tiny float64 model"""
+    np.random.seed(seed)
+    vocab_size, batch, encoder_len, decoder_len = 13, 3, 4, 5
+    model = Seq2Seq(vocab_size, embedding_dim=4, hidden_size=5, dtype=np.float64)
+    encoder_ids = np.random.randint(1, vocab_size, (batch, encoder_len))
+    encoder_ids[0, :2] = PAD  # left padding, masked out of attention
+    decoder_ids = np.random.randint(1, vocab_size, (batch, decoder_len))
+    targets = np.random.randint(1, vocab_size, (batch, decoder_len))
+    targets[1, -2:] = PAD
+
+    model.loss(encoder_ids, decoder_ids, targets, train=True)
+    names = ['embedding', 'encoder W', 'encoder b', 'decoder W', 'decoder b', 'dense weights', 'dense bias']
+    worst = 0.0
+    for name, param, grad in zip(names, model.params(), [g.copy() for g in model.grads()]):
+        numeric, analytic = [], []
+        for index in zip(*(np.random.randint(0, n, samples) for n in param.shape)):
+            original = param[index]
+            param[index] = original + eps
+            plus = model.loss(encoder_ids, decoder_ids, targets)
+            param[index] = original - eps
+            minus = model.loss(encoder_ids, decoder_ids, targets)
+            param[index] = original
+            numeric.append((plus - minus) / (2 * eps))
+            analytic.append(grad[index])
+        numeric, analytic = np.array(numeric), np.array(analytic)
+        # Relative to the sampled gradient's norm, so near-zero entries don't dominate
+        error = np.linalg.norm(numeric - analytic) / max(np.linalg.norm(numeric) + np.linalg.norm(analytic), 1e-12)
+        worst = max(worst, error)
+        print(f"{name:<14} relative error {error:.2e}")
+    print("gradient check", "passed" if worst < 1e-5 else "FAILED")
+    return worst
+
+
+# ------------------------ TRAINING ----------------------------
+
+def tokenize(text):
+    return WORD_PATTERN.findall(text.lower())
+
+
+def build_vocab(pairs, max_words):
+    counts = Counter(word for q, a in pairs for word in tokenize(q) + tokenize(a))
+    words = [word for word, _ in counts.most_common(max_words)]
+    return {word: index for index, word in enumerate(words, start=4)}
+
+
+def encode(text, vocab, max_len):
+    return [vocab.get(word, UNK) for word in tokenize(text)][:max_len]
+
+
+def make_batch(pairs, vocab, max_question, max_answer):
+    """Left-padded questions, so the encoder's final state follows the last real word,
+    and right-padded <start> answer / answer <end> pairs for teacher forcing"""
+    questions = [encode(q, vocab, max_question) for q, _ in pairs]
+    answers = [encode(a, vocab, max_answer - 1) for _, a in pairs]
+    encoder_ids = np.zeros((len(pairs), max(map(len, questions))), dtype=np.int64)
+    decoder_ids = np.zeros((len(pairs), max(map(len, answers)) + 1), dtype=np.int64)
+    targets = np.zeros_like(decoder_ids)
+    for row, (question, answer) in enumerate(zip(questions, answers)):
+        if question:
+            encoder_ids[row, -len(question):] = question
+        decoder_ids[row, :len(answer) + 1] = [START] + answer
+        targets[row, :len(answer) + 1] = answer + [END]
+    return encoder_ids, decoder_ids, targets
+
+
+def train(args):
+    with open(args.data) as f:
+        pairs = [(item['question'], item['answer']) for item in json.load(f)]
+    np.random.seed(0)
+    vocab = build_vocab(pairs, args.vocab_size)
+    index_word = {index: word for word, index in vocab.items()}
+    index_word.update({START: '<start>', END: '<end>', UNK: '<unk>'})
+    model = Seq2Seq(len(vocab) + 4, args.embedding_dim, args.hidden_size)
+    optimizer = (Adam(model.params(), lr=args.lr) if args.optimizer == 'adam'
+                 else SGD(model.params(), lr=args.lr, momentum=0.9))
+    print(f"{len(pairs)} pairs, vocabulary {len(vocab) + 4}, "
+          f"{sum(p.size for p in model.params()):,} parameters")
+
+    rng = np.random.default_rng(0)
+    for epoch in range(args.epochs):
+        order = rng.permutation(len(pairs))
+        total, samples = 0.0, 0
+        start = time.perf_counter()
+        for begin in range(0, len(pairs), args.batch_size):
+            batch = [pairs[i] for i in order[begin:begin + args.batch_size]]
+            encoder_ids, decoder_ids, targets = make_batch(batch, vocab, args.max_question, args.max_answer)
+            loss = model.loss(encoder_ids, decoder_ids, targets, train=True)
+            clip_by_global_norm(model.grads(), args.clip)
+            optimizer.step(model.grads())
+            total += loss * len(batch)
+            samples += len(batch)
+        elapsed = time.perf_counter() - start
+        print(f"epoch {epoch + 1:>3}  loss {total / samples:.3f}  {samples / elapsed:,.0f} samples/s")
+
+    for question, _ in pairs[:3]:
+        encoder_ids, _, _ = make_batch([(question, '')], vocab, args.max_question, args.max_answer)
+        tokens = model.greedy(encoder_ids, args.max_answer)[0]
+        words = [index_word.get(t, '<unk>') for t in tokens if t not in (PAD, START)]
+        answer = ' '.join(words[:words.index('<end>')] if '<end>' in words else words)
+        print(f"Q: {question}\nA: {answer}")
+
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="NumPy seq2seq chatbot training")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('check', help=gradient_check.__doc__)
+
+    training = subparsers.add_parser('train', help="train on question/answer pairs")
+    training.add_argument('--data', default=os.path.join(here, '..', 'Chatbot', 'data.json'))
+    training.add_argument('--epochs', type=int, default=30)
+    training.add_argument('--batch-size', type=int, default=32)
+    training.add_argument('--embedding-dim', type=int, default=64)
+    training.add_argument('--hidden-size', type=int, default=128)
+    training.add_argument('--vocab-size', type=int, default=2000)
+    training.add_argument('--max-question', type=int, default=20)
+    training.add_argument('--max-answer', type=int, default=48)
+    training.add_argument('--optimizer', choices=['adam', 'sgd'], default='adam')
+    training.add_argument('--lr', type=float, default=0.005)
+    training.add_argument('--clip', type=float, default=5.0)
+    args = parser.parse_args()
+
+    if args.command == 'check':
+        gradient_check()
+    else:
+        train(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""ASGI entry points for the two Flask services.
+
+The slow routes get async implementations here, and everything else falls
+through to the original Flask app, so the routes and JSON bodies stay the same:
+
+  /api/weather        httpx.AsyncClient; concurrent lookups per cell share one task
+  /api/plants         pymongo's AsyncMongoClient; single inserts still go
+                      through PlantInsertBatcher, awaited instead of blocking
+  /api/plants/bulk    async insert_many in chunks
+  /generate_response  retrieval and cache inline; the model runs on the
+                      MicroBatcher thread and the request awaits its Future
+
+Run them with serve.py. create_main_app needs backend/ as the working
+directory (responses.json), create_chatbot_app needs backend/Chatbot
+(tokenizer.json, data.json and the model).
+"""
+import asyncio
+import contextlib
+import os
+import sys
+
+import httpx
+from a2wsgi import WSGIMiddleware
+from bson.errors import InvalidId
+from pymongo import AsyncMongoClient
+from pymongo.errors import BulkWriteError
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+
+import plantRoutes
+from plantRoutes import CURSOR_BATCH_SIZE, STREAM_CHUNK_SIZE, encode_plant
+
+# Upstream connections kept open per worker process
+HTTP_POOL_SIZE = int(os.environ.get('ASYNC_HTTP_POOL_SIZE', 100))
+# Threads a2wsgi uses for the routes that are still plain Flask
+WSGI_THREADS = int(os.environ.get('ASYNC_WSGI_THREADS', 10))
+
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+async def abuffered(pieces, chunk_size=STREAM_CHUNK_SIZE):
+    """plantRoutes.buffered for async generators"""
+    buffer = []
+    size = 0
+    async for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def plant_routes(flask_app, mongo):
+    """Async versions of the routes in plantRoutes.create_plants_blueprint"""
+    state = {}
+
+    def collection():
+        # One client per worker process, created on first use inside its event loop
+        if 'plants' not in state:
+            client = AsyncMongoClient(flask_app.config['MONGO_URI'])
+            state['client'] = client
+            state['plants'] = client.get_default_database().plants
+        return state['plants']
+
+    def batcher():
+        if 'batcher' not in state:
+            state['batcher'] = plantRoutes.PlantInsertBatcher(mongo.db.plants)
+        return state['batcher']
+
+    async def add_plant(request):
+        plant_data = await read_json(request)
+        error = plantRoutes.validate_plant(plant_data)
+        if error:
+            return JSONResponse({"message": "Error uploading plant", "error": error}, 400)
+        try:
+            # enqueue doesn't wait for room here, so a full queue can't stall the event loop;
+            # wait_for cancels the Future on timeout, which drops the document if it's still queued
+            inserted_id = await asyncio.wait_for(asyncio.wrap_future(batcher().enqueue(plant_data)),
+                                                 plantRoutes.INSERT_TIMEOUT)
+            plant_data['_id'] = str(inserted_id)
+            return JSONResponse({"message": "Plant uploaded successfully", "plant": plant_data}, 201)
+        except (TimeoutError, asyncio.TimeoutError) as e:
+            # enqueue raises the builtin; asyncio's is a separate class before Python 3.11
+            return JSONResponse({"message": "Error uploading plant",
+                                 "error": str(e) or "insert didn't complete in time"}, 503)
+        except Exception as e:
+            return JSONResponse({"message": "Error uploading plant", "error": str(e)}, 500)
+
+    async def add_plants_bulk(request):
+        try:
+            plants, parse_errors = plantRoutes.parse_bulk_plants(
+                request.headers.get('content-type', '').split(';')[0], await request.body())
+            chunk_size = plantRoutes.parse_chunk_size(request.query_params)
+        except ValueError as e:
+            return JSONResponse({"message": "Invalid bulk upload", "error": str(e)}, 400)
+
+        results, valid = plantRoutes.validate_bulk(plants, parse_errors)
+        for start in range(0, len(valid), chunk_size):
+            indices = valid[start:start + chunk_size]
+            try:
+                await collection().insert_many([plants[i] for i in indices], ordered=False)
+                errors = {}
+            except BulkWriteError as e:
+                errors = plantRoutes.write_errors(e)
+            except Exception as e:
+                plantRoutes.fail_chunk(results, indices, e)
+                continue
+            plantRoutes.record_chunk(results, plants, indices, errors)
+
+        body, status = plantRoutes.bulk_summary(results)
+        return JSONResponse(body, status)
+
+    async def get_plants(request):
+        args = request.query_params
+        try:
+            query, projection, limit = plantRoutes.parse_list_args(args)
+        except (InvalidId, ValueError) as e:
+            return JSONResponse({"message": "Invalid query parameters", "error": str(e)}, 400)
+
+        try:
+            cursor = collection().find(query, projection).sort('_id', 1).batch_size(CURSOR_BATCH_SIZE)
+            if limit:
+                cursor = cursor.limit(limit)
+
+            if limit and args.get('format') != 'ndjson':
+                return JSONResponse(plantRoutes.page_body(await cursor.to_list(), limit))
+
+            # Pull the first document now so connection errors still produce a 500
+            first = await anext(cursor, None)
+        except Exception as e:
+            return JSONResponse({"message": "Error fetching plants", "error": str(e)}, 500)
+
+        if args.get('format') == 'ndjson':
+            async def generate():
+                if first is None:
+                    return
+                yield encode_plant(first) + '\n'
+                async for plant in cursor:
+                    yield encode_plant(plant) + '\n'
+
+            return StreamingResponse(abuffered(generate()), media_type='application/x-ndjson')
+
+        async def generate():
+            if first is None:
+                yield '[]'
+                return
+            yield '[' + encode_plant(first)
+            async for plant in cursor:
+                yield ',' + encode_plant(plant)
+            yield ']'
+
+        return StreamingResponse(abuffered(generate()), media_type='application/json')
+
+    async def close():
+        if 'client' in state:
+            await state.pop('client').close()
+            del state['plants']
+
+    routes = [
+        Route('/api/plants', add_plant, methods=['POST']),
+        Route('/api/plants/bulk', add_plants_bulk, methods=['POST']),
+        Route('/api/plants', get_plants, methods=['GET']),
+    ]
+    return routes, close
+
+
+def build_app(flask_app, routes, lifespan):
+    return Starlette(
+        routes=routes + [Mount('/', WSGIMiddleware(flask_app, workers=WSGI_THREADS))],
+        middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+        lifespan=lifespan
+    )
+
+
+def create_main_app():
+    """FinalCode.py with async /api/weather and /api/plants"""
+    import FinalCode
+
+    client = None
+    in_flight = {}
+
+    async def fetch_weather(latitude, longitude):
+        """FinalCode.fetch_weather on the event loop, sharing its per-cell cache"""
+        cell = FinalCode.weather_cell(latitude, longitude)
+        cached = FinalCode.cached_weather(cell)
+        if cached is not None:
+            return cached
+
+        task = in_flight.get(cell)
+        if task is None:
+            async def fetch():
+                try:
+                    response = await client.get(FinalCode.WEATHER_URL, params=FinalCode.weather_params(cell))
+                    response.raise_for_status()
+                    weather_data = response.json()
+                    FinalCode.store_weather(cell, weather_data)
+                    return weather_data
+                finally:
+                    in_flight.pop(cell, None)
+
+            task = in_flight[cell] = asyncio.ensure_future(fetch())
+        # shield: one caller disconnecting mustn't cancel the lookup for the others
+        return await asyncio.shield(task)
+
+    async def get_weather(request):
+        try:
+            data = await read_json(request)
+            weather_data = await fetch_weather(data.get('latitude'), data.get('longitude'))
+            return JSONResponse(weather_data)
+        except Exception as e:
+            return JSONResponse({"error": str(e)}, 500)
+
+    plants, close_plants = plant_routes(FinalCode.app, FinalCode.mongo)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        nonlocal client
+        connect, read = FinalCode.HTTP_TIMEOUT
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE)
+        )
+        yield
+        await client.aclose()
+        await close_plants()
+
+    return build_app(FinalCode.app, [Route('/api/weather', get_weather, methods=['POST'])] + plants, lifespan)
+
+
+def create_chatbot_app():
+    """Chatbot_Usage.py with async /generate_response and /api/plants"""
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Chatbot'))
+    import Chatbot_Usage as chatbot
+
+    async def generate_response(request):
+        input_text = chatbot.input_text_of(await read_json(request))
+        if input_text is None:
+            return JSONResponse({'error': 'Expected a JSON object with an input_text string'}, 400)
+        sequence = chatbot.tokenizer.texts_to_sequences([input_text])[0]
+        quick = chatbot.quick_response(input_text, sequence)
+        if quick is not None:
+            return JSONResponse({'response': quick})
+
+        if not chatbot.model_ready.is_set() and chatbot.CHATBOT_READY_TIMEOUT > 0:
+            await asyncio.to_thread(chatbot.model_ready.wait, chatbot.CHATBOT_READY_TIMEOUT)
+        if not chatbot.model_ready.is_set() or chatbot.model_error:
+            return JSONResponse({'error': chatbot.model_error or 'Chatbot model is still loading'}, 503)
+
+        # The MicroBatcher thread is the inference executor; awaiting its Future
+        # leaves the event loop free while the batch runs
+        response_seq = await asyncio.wrap_future(chatbot.submit_question(sequence))
+        return JSONResponse({'response': chatbot.remember_response(sequence, response_seq)})
+
+    plants, close_plants = plant_routes(chatbot.app, chatbot.mongo)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        yield
+        await close_plants()
+
+    return build_app(chatbot.app, [Route('/generate_response', generate_response, methods=['POST'])] + plants,
+                     lifespan)
@@ -0,0 +1,173 @@
+"""Load test serve.py's sync and async modes against local stand-ins.
+
+    python loadTest.py weather --concurrency 1 8 32 128
+    python loadTest.py chatbot --concurrency 1 8 32
+
+weather points OPEN_METEO_URL at a local stub that answers after
+--upstream-delay-ms, with the weather cache off and random coordinates, so
+every request waits on the upstream call. chatbot turns retrieval off and
+asks random questions from the tokenizer's vocabulary, so every request
+runs the model (whichever CHATBOT_MODEL is in backend/Chatbot). Each mode
+is started in its own process with the same --workers, so the numbers show
+how many concurrent requests one worker can carry.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_weather_stub(delay_ms):
+    """Open-Meteo stand-in on a background thread; returns its URL"""
+    body = json.dumps({'current': {'temperature_2m': 21.5, 'wind_speed_10m': 3.2},
+                       'hourly': {'time': [], 'temperature_2m': []}}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; don't let Nagle hold the body back
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            time.sleep(delay_ms / 1000)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', free_port()), Handler)
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}/v1/forecast'
+
+
+def start_server(target, mode, workers, env, ready_path=None, timeout=300):
+    """Run serve.py in a subprocess and wait until it answers"""
+    port = free_port()
+    process = subprocess.Popen([sys.executable, os.path.join(BACKEND_DIR, 'serve.py'), target,
+                                '--mode', mode, '--host', '127.0.0.1', '--port', str(port),
+                                '--workers', str(workers)],
+                               env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"serve.py {target} --mode {mode} exited with {process.returncode}")
+        try:
+            response = httpx.get(url + (ready_path or '/'), timeout=1)
+            if ready_path is None or response.status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"serve.py {target} --mode {mode} didn't start within {timeout}s")
+
+
+async def run_load(url, path, make_body, concurrency, requests_per_client):
+    """POST from concurrency clients at once; return (throughput, latencies, errors)"""
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        async def one_client():
+            nonlocal errors
+            for _ in range(requests_per_client):
+                start = time.perf_counter()
+                response = await client.post(path, json=make_body())
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one_client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, latencies, errors
+
+
+def compare_modes(args, target, path, make_body, env, ready_path=None):
+    print(f"{'mode':<6} {'clients':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+    for mode in args.modes:
+        process, url = start_server(target, mode, args.workers, env, ready_path)
+        try:
+            for concurrency in args.concurrency:
+                # A short warm-up so connection setup and first-call tracing aren't timed
+                asyncio.run(run_load(url, path, make_body, min(concurrency, 4), 2))
+                throughput, latencies, errors = asyncio.run(
+                    run_load(url, path, make_body, concurrency, args.requests))
+                print(f"{mode:<6} {concurrency:>7} {throughput:>9.1f} "
+                      f"{1000 * np.percentile(latencies, 50):>9.1f} {1000 * np.percentile(latencies, 95):>9.1f} "
+                      f"{errors:>7}")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def load_test_weather(args):
+    """/api/weather with every request waiting on a slow upstream"""
+    env = {'OPEN_METEO_URL': start_weather_stub(args.upstream_delay_ms), 'WEATHER_CACHE_TTL': '0'}
+
+    def make_body():
+        return {'latitude': random.uniform(-80, 80), 'longitude': random.uniform(-170, 170)}
+
+    compare_modes(args, 'main', '/api/weather', make_body, env)
+
+
+def load_test_chatbot(args):
+    """/generate_response with every request running the model"""
+    with open(os.path.join(BACKEND_DIR, 'Chatbot', 'tokenizer.json')) as f:
+        words = [word for word in json.load(f)['word_index'] if word.isalpha()]
+    env = {'CHATBOT_RETRIEVAL_THRESHOLD': '2', 'CHATBOT_CACHE_TTL': '0.001'}
+
+    def make_body():
+        return {'input_text': ' '.join(random.choices(words, k=random.randint(3, 12)))}
+
+    compare_modes(args, 'chatbot', '/generate_response', make_body, env, ready_path='/api/chatbot/ready')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-request load tests for serve.py")
+    subparsers = parser.add_subparsers(dest='service', required=True)
+
+    weather = subparsers.add_parser('weather', help=load_test_weather.__doc__)
+    weather.add_argument('--upstream-delay-ms', type=float, default=100)
+    weather.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 128])
+    weather.add_argument('--requests', type=int, default=20, help="requests per client")
+    weather.set_defaults(func=load_test_weather)
+
+    chatbot = subparsers.add_parser('chatbot', help=load_test_chatbot.__doc__)
+    chatbot.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    chatbot.add_argument('--requests', type=int, default=10, help="requests per client")
+    chatbot.set_defaults(func=load_test_chatbot)
+
+    for subparser in (weather, chatbot):
+        subparser.add_argument('--modes', nargs='+', choices=['sync', 'async'], default=['sync', 'async'])
+        subparser.add_argument('--workers', type=int, default=1)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,72 @@
 import sys
 import json
-import requests
 import os
+import io
+import base64
+import time
+import argparse
+import queue
+import threading
+import contextlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import numpy as np
+from PIL import Image
+
+from plantNetClient import PlantNetClient
+from requestReader import InvalidRequest, RequestReader
+from resultCache import ResultCache
+
+# Shown when no PlantNet key is configured
+DEMO_SUGGESTIONS = [
+    {"name": "Ficus lyrata", "score": 0.82},
+    {"name": "Monstera deliciosa", "score": 0.11},
+    {"name": "Spathiphyllum", "score": 0.07}
+]
+
+# Shown when PlantNet is unreachable, failing or short-circuited
+FALLBACK_SUGGESTIONS = [
+    {"name": "Aloe vera", "score": 0.74},
+    {"name": "Dracaena trifasciata", "score": 0.18},
+    {"name": "Epipremnum aureum", "score": 0.08}
+]
+
+
+def build_success_response(suggestions, source='plantnet'):
+    """source is 'plantnet' for a real answer, or 'demo' / 'fallback' for the sample lists"""
+    top = suggestions[0]
+    return {
+        "success": True,
+        "plant_name": top["name"],
+        "description": "",  # description not provided by PlantNet basic endpoint
+        "confidence": float(top.get("score", 0)),
+        "all_predictions": [
+            {"name": s["name"], "confidence": float(s.get("score", 0))}
+            for s in suggestions
+        ],
+        "source": source,
+        "fallback": source != 'plantnet'
+    }
+
+
+def is_cacheable(action, result):
+    """Only replay identifications PlantNet actually made; demo and fallback
+    suggestions would otherwise outlive the outage that produced them"""
+    if not result.get('success'):
+        return False
+    return action == 'analyze_health' or result.get('source') == 'plantnet'
+
 
 class PlantIdentificationSystem:
     def __init__(self):
         # Mock initialization without ML dependencies
         self.plant_classes = self.load_plant_classes()
         self.confidence_threshold = 0.7
+        # Longest side the health analysis downsamples to before measuring
+        self.health_max_side = int(os.environ.get('PLANT_HEALTH_MAX_SIDE', 512))
+        self.cache = ResultCache()
+        self.plantnet = PlantNetClient()
         
     def load_plant_classes(self):
         """Load plant-specific classes from ImageNet"""
@@ -29,6 +88,70 @@ class PlantIdentificationSystem:
         
         return plant_classes
     
+    def process(self, action, image_data, image_path=None):
+        """Run identification or health analysis, reusing cached results for identical images"""
+        params = {'organs': 'leaf', 'lang': 'en'} if action == 'identify' else None
+        key = self.cache.make_key(action, image_data, image_path, params)
+        if key is not None:
+            cached = self.cache.get(key)
+            # Also skips fallback entries stored before results carried a source
+            if cached is not None and is_cacheable(action, cached):
+                return cached
+
+        if action == 'analyze_health':
+            result = self.analyze_plant_health(image_data, image_path)
+        else:
+            result = self.identify_plant(image_data, image_path)
+
+        if key is not None and is_cacheable(action, result):
+            self.cache.set(key, result)
+        return result
+    
+    def identify_plants_batch(self, images, max_in_flight=8, timeout=30.0):
+        """Identify many images, yielding one result per image in input order.
+
+        Each entry is a dict with 'image' or 'imagePath', or a plain string that
+        is treated as a path if it exists and as base64 otherwise. At most
+        max_in_flight images are decoded or waiting on the remote service at
+        once. Each image gets timeout seconds from when it is submitted; one
+        that runs past that yields an error result and is abandoned instead of
+        holding up the rest of the batch.
+        """
+        # An abandoned call keeps its thread until PlantNet's own timeouts end
+        # it, so leave room for as many of those as there are live slots
+        pool = ThreadPoolExecutor(max_workers=2 * max_in_flight)
+        in_flight = deque()
+
+        def next_result():
+            future, deadline = in_flight.popleft()
+            try:
+                return future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                future.cancel()
+                return {'error': f'Identification timed out after {timeout} seconds'}
+            except Exception as e:
+                return {'error': f'Identification failed: {str(e)}'}
+
+        try:
+            for item in images:
+                if isinstance(item, dict):
+                    image_data, image_path = item.get('image', ''), item.get('imagePath')
+                elif isinstance(item, str) and os.path.exists(item):
+                    image_data, image_path = '', item
+                else:
+                    image_data, image_path = item, None
+                future = pool.submit(self.process, 'identify', image_data, image_path)
+                in_flight.append((future, time.monotonic() + timeout))
+
+                if len(in_flight) >= max_in_flight:
+                    yield next_result()
+
+            while in_flight:
+                yield next_result()
+        finally:
+            # Don't wait for timed-out images still running in the pool
+            pool.shutdown(wait=False, cancel_futures=True)
+    
     def preprocess_image(self, image_data, image_path=None):
         """Mock preprocessing - returns True if image data or path exists"""
         try:
@@ -41,6 +164,10 @@ class PlantIdentificationSystem:
                     print(f"Image file not found: {image_path}", file=sys.stderr)
                     return None
             
+            # Handle a decoded upload streamed in by RequestReader
+            if hasattr(image_data, 'read'):
+                return True
+
             # Handle base64 or direct image data
             if isinstance(image_data, str) and len(image_data) > 0:
                 return True
@@ -49,169 +176,345 @@ class PlantIdentificationSystem:
             print(f"Error preprocessing image: {e}", file=sys.stderr)
             return None
     
+    @contextlib.contextmanager
+    def open_image(self, image_data, image_path=None):
+        """Yield a binary file object for the image, or None if there isn't one"""
+        if image_path and isinstance(image_path, str):
+            if not os.path.exists(image_path):
+                print(f"Image file not found: {image_path}", file=sys.stderr)
+                yield None
+                return
+            with open(image_path, 'rb') as f:
+                yield f
+        elif hasattr(image_data, 'read'):
+            # Owned by the request; close_image releases it
+            image_data.seek(0)
+            yield image_data
+        elif isinstance(image_data, str) and image_data:
+            payload = image_data.split(',', 1)[1] if image_data.startswith('data:') else image_data
+            yield io.BytesIO(base64.b64decode(payload))
+        else:
+            yield None
+    
     def identify_plant(self, image_data, image_path=None):
-        """Mock plant identification"""
+        """Identify a plant with PlantNet, falling back to sample suggestions when it's unavailable"""
         try:
-            # Mock preprocessing
             processed_image = self.preprocess_image(image_data, image_path)
             if processed_image is None:
                 return {'error': 'Failed to process image'}
-            
-            # Mock prediction results
-            import random
-            plant_names = ['Rose', 'Tulip', 'Sunflower', 'Oak Tree', 'Maple', 'Fern', 'Cactus']
-            selected_plant = random.choice(plant_names)
-            confidence = random.uniform(0.6, 0.95)
-            
-            if confidence > self.confidence_threshold:
-                return {
-                    "success": True,
-                    "plant_name": top["name"],
-                    "description": "",  # description not provided by PlantNet basic endpoint
-                    "confidence": float(top.get("score", 0)),
-                    "all_predictions": [
-                        {"name": s["name"], "confidence": float(s.get("score", 0))}
-                        for s in suggestions
-                    ]
-                }
-            else:
+
+            if not self.plantnet.configured:
+                return build_success_response(DEMO_SUGGESTIONS, source='demo')
+
+            with self.open_image(image_data, image_path) as image_file:
+                suggestions = self.plantnet.identify(image_file)
+
+            if suggestions is None:
+                return build_success_response(FALLBACK_SUGGESTIONS, source='fallback')
+            if not suggestions:
                 return {
                     'success': False,
-                    'message': 'Plant identification confidence too low',
-                    'confidence': confidence
+                    'message': 'No plant species recognised in the image',
+                    'confidence': 0.0
                 }
-                
+            return build_success_response(suggestions)
+
         except Exception as e:
             return {'error': f'Identification failed: {str(e)}'}
     
+    def load_pixels(self, image_data, image_path=None, max_side=None):
+        """Decode an image once into a downscaled RGB pixel buffer.
+
+        JPEGs use Pillow's draft mode so the decoder itself skips to the
+        nearest 1/2, 1/4 or 1/8 scale, which keeps large phone photos cheap.
+        Returns (rgb, hsv, source_size) or None if the image can't be read.
+        """
+        max_side = max_side or self.health_max_side
+        with self.open_image(image_data, image_path) as source:
+            if source is None:
+                return None
+            with Image.open(source) as img:
+                source_size = img.size
+                img.draft('RGB', (max_side, max_side))
+                img = img.convert('RGB')
+                img.thumbnail((max_side, max_side), Image.BILINEAR)
+                rgb = np.asarray(img)
+                hsv = np.asarray(img.convert('HSV'))
+        return rgb, hsv, source_size
+    
     def analyze_plant_health(self, image_data, image_path=None):
-        """Mock plant health analysis"""
+        """Estimate plant health from leaf colour and exposure"""
         try:
-            # Mock health analysis
-            import random
-            
-            green_percentage = random.uniform(40, 90)
-            brightness = random.uniform(80, 200)
-            health_score = random.uniform(50, 95)
-            
+            pixels = self.load_pixels(image_data, image_path)
+            if pixels is None:
+                return {'error': 'Failed to process image'}
+            rgb, hsv, source_size = pixels
+
+            # Pillow's HSV uses 0-255 for hue, so 255 == 360 degrees
+            hue, sat, val = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+            green_mask = (hue >= 45) & (hue <= 120) & (sat > 50) & (val > 40)
+            yellow_mask = (hue >= 25) & (hue < 45) & (sat > 80) & (val > 100)
+            brown_mask = (hue >= 5) & (hue < 25) & (sat > 60) & (val > 40) & (val <= 160)
+
+            green_pixels = int(np.count_nonzero(green_mask))
+            yellow_pixels = int(np.count_nonzero(yellow_mask))
+            brown_pixels = int(np.count_nonzero(brown_mask))
+            foliage_pixels = green_pixels + yellow_pixels + brown_pixels
+            total_pixels = hue.size
+
+            # Rec. 601 luma, computed on the whole buffer at once
+            luma = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+            brightness = float(luma.mean())
+            brightness_histogram = np.bincount(
+                luma.astype(np.uint8).ravel() >> 4, minlength=16
+            ) / total_pixels
+
+            # Colour shares are measured over foliage so background doesn't skew them
+            if foliage_pixels:
+                green_percentage = 100.0 * green_pixels / foliage_pixels
+                yellow_percentage = 100.0 * yellow_pixels / foliage_pixels
+                brown_percentage = 100.0 * brown_pixels / foliage_pixels
+            else:
+                green_percentage = yellow_percentage = brown_percentage = 0.0
+            foliage_coverage = 100.0 * foliage_pixels / total_pixels
+
             health_issues = []
             recommendations = []
-            
+
+            if foliage_coverage < 5:
+                health_issues.append('Very little foliage detected in the photo')
+                recommendations.append('Take a closer photo of the leaves in good light')
+
             if green_percentage < 50:
                 health_issues.append('Low green content - possible disease or stress')
                 recommendations.append('Check for pests and diseases')
-            
+
+            if yellow_percentage > 20:
+                health_issues.append('Yellowing leaves detected - possible nutrient deficiency or overwatering')
+                recommendations.append('Check drainage and consider a balanced fertilizer')
+
+            if brown_percentage > 15:
+                health_issues.append('Brown patches detected - possible dehydration, sunburn or fungal disease')
+                recommendations.append('Remove damaged leaves and check soil moisture')
+
             if brightness < 100:
                 health_issues.append('Low brightness - possible overwatering')
                 recommendations.append('Reduce watering frequency')
-            
+
             if brightness > 180:
                 health_issues.append('High brightness - possible dehydration')
                 recommendations.append('Increase watering and provide shade')
-            
+
+            health_score = green_percentage - 0.5 * yellow_percentage - brown_percentage
+            if brightness < 100 or brightness > 180:
+                health_score -= 10
+            health_score = float(np.clip(health_score, 0, 100))
+
             return {
                 'success': True,
-                'health_score': health_score,
-                'green_percentage': green_percentage,
-                'brightness': brightness,
+                'health_score': round(health_score, 1),
+                'green_percentage': round(green_percentage, 1),
+                'yellow_percentage': round(yellow_percentage, 1),
+                'brown_percentage': round(brown_percentage, 1),
+                'foliage_coverage': round(foliage_coverage, 1),
+                'brightness': round(brightness, 1),
+                'brightness_histogram': [round(float(b), 4) for b in brightness_histogram],
+                'image_size': list(source_size),
                 'health_issues': health_issues,
                 'recommendations': recommendations if recommendations else ['Plant appears healthy!']
             }
-            
+
         except Exception as e:
             return {'error': f'Health analysis failed: {str(e)}'}
 
-            if not self.api_key or self.api_key == "YOUR_PLANTNET_KEY_HERE":
-                mock = [
-                    {"name": "Ficus lyrata", "score": 0.82},
-                    {"name": "Monstera deliciosa", "score": 0.11},
-                    {"name": "Spathiphyllum", "score": 0.07}
-                ]
-                return build_success_response(mock)
-
-            with open(image_path, "rb") as img:
-                files = [("images", img)]
-                params = {
-                    "organs": "leaf",
-                    "lang": "en"
-                }
-                response = requests.post(self.endpoint, files=files, params=params)
-
-            if response.status_code != 200:
-                # Fallback mock on error for local resilience
-                mock = [
-                    {"name": "Aloe vera", "score": 0.74},
-                    {"name": "Dracaena trifasciata", "score": 0.18},
-                    {"name": "Epipremnum aureum", "score": 0.08}
-                ]
-                return build_success_response(mock)
-
-            data = response.json()
-            suggestions = [
-                {
-                    "name": r["species"].get("scientificNameWithoutAuthor") or r["species"].get("scientificName") or "Unknown",
-                    "score": r.get("score", 0)
-                }
-                for r in data.get("results", [])
-            ]
 
-            return build_success_response(suggestions)
+def benchmark_health(paths, repeat=5):
+    """Print health-analysis throughput in source megapixels per second"""
+    plant_id = PlantIdentificationSystem()
+    for path in paths:
+        with Image.open(path) as img:
+            megapixels = img.size[0] * img.size[1] / 1e6
+        plant_id.analyze_plant_health('', path)  # warm-up
+        start = time.perf_counter()
+        for _ in range(repeat):
+            plant_id.analyze_plant_health('', path)
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f"{path}: {megapixels:.2f} MP in {elapsed * 1000:.1f} ms "
+              f"({megapixels / elapsed:.1f} MP/s)")
 
-        except Exception as e:
-            # Fallback mock on unexpected exceptions
-            mock = [
-                {"name": "Pothos", "score": 0.66},
-                {"name": "Peace Lily", "score": 0.2},
-                {"name": "Snake Plant", "score": 0.14}
-            ]
-            return {
-                "success": True,
-                "plant_name": mock[0]["name"],
-                "description": "",
-                "confidence": float(mock[0]["score"]),
-                "all_predictions": [
-                    {"name": s["name"], "confidence": float(s.get("score", 0))}
-                    for s in mock
-                ]
-            }
 
-    def analyze_plant_health(self, image_data):
-        # Provide a structured mock health analysis compatible with frontend expectations
-        return {
-            "success": True,
-            "health_score": 82.5,
-            "green_percentage": 64.3,
-            "brightness": 72.0,
-            "health_issues": [
-                "Minor yellowing detected on lower leaves",
-                "Slight dryness at leaf edges"
-            ],
-            "recommendations": [
-                "Water when top 2 cm of soil is dry",
-                "Increase humidity to 50-60%",
-                "Provide bright, indirect light"
-            ]
-        }
+def handle_request(plant_id, data):
+    """Dispatch one decoded request to the matching PlantIdentificationSystem method"""
+    if data.get('action') == 'cache_stats':
+        return plant_id.cache.stats()
+
+    if data.get('action') == 'plantnet_stats':
+        return plant_id.plantnet.stats()
+
+    if data.get('action') == 'identify_batch':
+        results = plant_id.identify_plants_batch(
+            data.get('images', []),
+            max_in_flight=data.get('maxInFlight', 8),
+            timeout=data.get('timeout', 30.0)
+        )
+        return {'success': True, 'results': list(results)}
+
+    # Extract image data and path
+    image_data = data.get('image', '')
+    image_path = data.get('imagePath', None)
+
+    if data.get('action') == 'analyze_health':
+        return plant_id.process('analyze_health', image_data, image_path)
+    return plant_id.process('identify', image_data, image_path)
+
+
+def close_image(data):
+    """Release the spool file RequestReader attached to a request, if any"""
+    image = data.get('image')
+    if hasattr(image, 'close'):
+        image.close()
+
+
+def run_batch(max_in_flight=8, timeout=30.0, stream_in=None, stream_out=None):
+    """Read a batch from stdin and stream results back as they complete, in order.
+
+    Input is either a JSON array of images or an object with an "images" array.
+    Each output line is {"index": i, "result": {...}}.
+    """
+    stream_in = stream_in or sys.stdin
+    stream_out = stream_out or sys.stdout
+
+    data = json.load(stream_in)
+    images = data.get('images', []) if isinstance(data, dict) else data
+
+    plant_id = PlantIdentificationSystem()
+    results = plant_id.identify_plants_batch(images, max_in_flight=max_in_flight, timeout=timeout)
+    for index, result in enumerate(results):
+        stream_out.write(json.dumps({"index": index, "result": result}) + "\n")
+        stream_out.flush()
+
+
+def serve(workers=4, max_pending=None, stream_in=None, stream_out=None):
+    """Serve newline-delimited JSON requests until stdin closes.
+
+    Every request line may carry an "id" which is echoed back on its response
+    line so callers can match out-of-order replies. A single
+    PlantIdentificationSystem is built up front and shared by all workers.
+    When max_pending requests are queued the reader stops consuming stdin,
+    which pushes backpressure onto the caller's pipe.
+    """
+    stream_in = stream_in or sys.stdin.buffer
+    stream_out = stream_out or sys.stdout
+    max_pending = max_pending or workers * 4
+
+    plant_id = PlantIdentificationSystem()
+    pending = queue.Queue(maxsize=max_pending)
+    write_lock = threading.Lock()
+
+    def respond(request_id, result):
+        line = json.dumps({"id": request_id, "result": result})
+        with write_lock:
+            stream_out.write(line + "\n")
+            stream_out.flush()
+
+    def worker():
+        while True:
+            item = pending.get()
+            if item is None:
+                break
+            request_id, data = item
+            try:
+                result = handle_request(plant_id, data)
+            except Exception as e:
+                result = {"error": f"Processing failed: {str(e)}"}
+            finally:
+                close_image(data)
+            respond(request_id, result)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    # Tell the parent process the workers are warm and ready for requests
+    with write_lock:
+        stream_out.write(json.dumps({"ready": True, "workers": workers}) + "\n")
+        stream_out.flush()
+
+    reader = RequestReader(stream_in)
+    while True:
+        try:
+            data = reader.read()
+        except InvalidRequest as e:
+            respond(e.request_id, {"error": f"Invalid request: {str(e)}"})
+            continue
+        if data is None:
+            break
+        if not isinstance(data, dict):
+            respond(None, {"error": "Invalid request: expected a JSON object"})
+            continue
+        # Blocks while the queue is full
+        pending.put((data.get('id'), data))
+
+    for _ in threads:
+        pending.put(None)
+    for thread in threads:
+        thread.join()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Plant identification service")
+    parser.add_argument('--serve', action='store_true',
+                        help="run as a long-lived NDJSON server on stdin/stdout")
+    parser.add_argument('--batch', action='store_true',
+                        help="read a JSON list of images from stdin and stream NDJSON results")
+    parser.add_argument('--max-in-flight', type=int, default=8,
+                        help="images processed concurrently in batch mode")
+    parser.add_argument('--timeout', type=float, default=30.0,
+                        help="per-image timeout in seconds for batch mode")
+    parser.add_argument('--benchmark-health', nargs='+', metavar='IMAGE',
+                        help="time analyze_plant_health on the given images and report MP/s")
+    parser.add_argument('--workers', type=int,
+                        default=int(os.environ.get('PLANT_ID_WORKERS', 4)),
+                        help="number of worker threads in server mode")
+    parser.add_argument('--max-pending', type=int, default=None,
+                        help="queued requests before stdin reads block (default: 4 per worker)")
+    return parser.parse_args(argv)
+
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.benchmark_health:
+        benchmark_health(args.benchmark_health)
+        sys.exit(0)
+
+    if args.serve:
+        serve(workers=args.workers, max_pending=args.max_pending)
+        sys.exit(0)
+
+    if args.batch:
+        try:
+            run_batch(max_in_flight=args.max_in_flight, timeout=args.timeout)
+        except Exception as e:
+            print(json.dumps({"error": f"Processing failed: {str(e)}"}))
+            sys.exit(1)
+        sys.exit(0)
+
     try:
-        input_data = sys.stdin.read()
-        if not input_data.strip():
+        # Inline base64 images are decoded while reading so the payload is never held whole
+        data = RequestReader(sys.stdin.buffer).read()
+        if data is None:
             print(json.dumps({"error": "No input data received"}))
             sys.exit(1)
+        if not isinstance(data, dict):
+            print(json.dumps({"error": "Invalid request: expected a JSON object"}))
+            sys.exit(1)
 
-        data = json.loads(input_data)
         plant_id = PlantIdentificationSystem()
-        
-        # Extract image data and path
-        image_data = data.get('image', '')
-        image_path = data.get('imagePath', None)
-        
-        if data.get('action') == 'analyze_health':
-            result = plant_id.analyze_plant_health(image_data, image_path)
-        else:
-            result = plant_id.identify_plant(image_data, image_path)
-        
+        try:
+            result = handle_request(plant_id, data)
+        finally:
+            close_image(data)
+
         # Output result as JSON
         print(json.dumps(result))
 
@@ -0,0 +1,174 @@
+const { spawn } = require('child_process');
+const path = require('path');
+const readline = require('readline');
+
+// Keeps one long-lived `plantIdentification.py --serve` process and multiplexes
+// requests over its stdin/stdout using request ids, so the Python interpreter
+// and PlantIdentificationSystem are only set up once.
+//
+// At most maxInFlight requests are written to the process at a time (the
+// size of its own queue); up to maxQueued more wait here, and beyond that
+// request() fails straight away with statusCode 503. Writes also pause while
+// the child's stdin buffer is full and resume on 'drain'.
+class PlantIdentificationPool {
+  constructor(options = {}) {
+    this.workers = options.workers || Number(process.env.PLANT_ID_WORKERS) || 4;
+    this.timeoutMs = options.timeoutMs || Number(process.env.PLANT_ID_TIMEOUT_MS) || 30000;
+    this.scriptPath = options.scriptPath || path.join(__dirname, 'plantIdentification.py');
+    this.pythonCommand = options.pythonCommand || 'python3';
+    this.maxInFlight = options.maxInFlight || Number(process.env.PLANT_ID_MAX_IN_FLIGHT) || this.workers * 4;
+    this.maxQueued = options.maxQueued || Number(process.env.PLANT_ID_MAX_QUEUED) || 100;
+    this.child = null;
+    this.nextId = 1;
+    // Written to the child, awaiting a reply
+    this.pending = new Map();
+    // Not written yet, in arrival order
+    this.waiting = new Map();
+    this.stdinFull = false;
+  }
+
+  start() {
+    if (this.child) {
+      return this.child;
+    }
+
+    const child = spawn(this.pythonCommand, [
+      this.scriptPath,
+      '--serve',
+      '--workers', String(this.workers)
+    ]);
+
+    const lines = readline.createInterface({ input: child.stdout });
+    lines.on('line', (line) => this.handleLine(line));
+
+    child.stderr.on('data', (data) => {
+      console.error('Plant identification service:', data.toString().trim());
+    });
+
+    child.on('error', (error) => {
+      console.error('Plant identification service error:', error);
+      this.reset(error);
+    });
+
+    // A worker that died mid-write surfaces as EPIPE here; 'close' below does the cleanup
+    child.stdin.on('error', (error) => {
+      console.error('Plant identification service stdin error:', error.message);
+    });
+
+    child.stdin.on('drain', () => {
+      if (this.child === child) {
+        this.stdinFull = false;
+        this.pump();
+      }
+    });
+
+    child.on('close', (code) => {
+      if (this.child === child) {
+        this.reset(new Error(`Plant identification service exited with code ${code}`));
+      }
+    });
+
+    this.child = child;
+    return child;
+  }
+
+  handleLine(line) {
+    let message;
+    try {
+      message = JSON.parse(line);
+    } catch (parseError) {
+      console.error('Failed to parse Python response:', line);
+      return;
+    }
+
+    if (message.ready) {
+      console.log(`Plant identification service ready with ${message.workers} workers`);
+      return;
+    }
+
+    if (message.id === null || message.id === undefined) {
+      // No request to match it to; every line we write carries an id, so
+      // this shouldn't happen and no waiting request is at fault
+      console.error('Plant identification reply without an id:', line);
+      return;
+    }
+
+    const entry = this.settle(message.id);
+    if (entry) {
+      entry.resolve(message.result);
+    }
+  }
+
+  // Remove a request, wherever it is, and stop its timer; returns its entry, if any.
+  // A reply that arrives after its request timed out finds nothing here.
+  settle(id) {
+    const entry = this.pending.get(id) || this.waiting.get(id);
+    if (!entry) {
+      return null;
+    }
+    this.pending.delete(id);
+    this.waiting.delete(id);
+    clearTimeout(entry.timer);
+    this.pump();
+    return entry;
+  }
+
+  // Write waiting requests while there is room in the child and its stdin buffer
+  pump() {
+    while (this.waiting.size && this.pending.size < this.maxInFlight && !this.stdinFull) {
+      const [id, entry] = this.waiting.entries().next().value;
+      this.waiting.delete(id);
+      this.pending.set(id, entry);
+      const child = this.start();
+      if (!child.stdin.write(entry.line)) {
+        this.stdinFull = true;
+      }
+    }
+  }
+
+  // Fail everything still in flight and drop the process so the next
+  // request respawns it.
+  reset(error) {
+    this.child = null;
+    this.stdinFull = false;
+    for (const entry of [...this.pending.values(), ...this.waiting.values()]) {
+      clearTimeout(entry.timer);
+      entry.reject(error);
+    }
+    this.pending.clear();
+    this.waiting.clear();
+  }
+
+  request(payload) {
+    if (this.waiting.size >= this.maxQueued) {
+      const error = new Error('Plant identification service is busy');
+      error.statusCode = 503;
+      return Promise.reject(error);
+    }
+    this.start();
+    const id = this.nextId++;
+
+    return new Promise((resolve, reject) => {
+      // Counts time spent waiting here too, so callers get a bounded wait overall
+      const timer = setTimeout(() => {
+        if (this.settle(id)) {
+          reject(new Error('Plant identification request timed out'));
+        }
+      }, this.timeoutMs);
+
+      const line = JSON.stringify({ id, ...payload }) + '\n';
+      this.waiting.set(id, { resolve, reject, timer, line });
+      this.pump();
+    });
+  }
+
+  stop() {
+    if (this.child) {
+      this.child.stdin.end();
+      this.child = null;
+      this.stdinFull = false;
+    }
+  }
+}
+
+module.exports = PlantIdentificationPool;
@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+DEFAULT_ENDPOINT = "https://my-api.plantnet.org/v2/identify/all"
+
+# Status codes worth another attempt; anything else is final
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitBreaker:
+    """Stop calling PlantNet for a while once too many recent calls fail.
+
+    The breaker looks at the last `window` outcomes. When at least
+    `min_requests` of them exist and the failure rate reaches
+    `error_threshold`, it opens for `cooldown` seconds. After the cooldown a
+    single trial request is let through; success closes the breaker again.
+    """
+
+    def __init__(self, window=20, min_requests=5, error_threshold=0.5, cooldown=30.0):
+        self.outcomes = deque(maxlen=window)
+        self.min_requests = min_requests
+        self.error_threshold = error_threshold
+        self.cooldown = cooldown
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return 'open'
+        return 'half_open'
+
+    def allow(self):
+        """Return 'normal' or 'trial' if a call may go ahead, None if it's short-circuited.
+
+        Pass the token back to record() so a call that started before the
+        breaker opened isn't mistaken for the half-open trial.
+        """
+        with self.lock:
+            state = self.state
+            if state == 'closed':
+                return 'normal'
+            if state == 'half_open' and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return 'trial'
+            return None
+
+    def record(self, token, success):
+        with self.lock:
+            if token == 'trial':
+                # Result of the half-open trial decides whether we close again
+                self.trial_in_flight = False
+                if success:
+                    self.opened_at = None
+                    self.outcomes.clear()
+                else:
+                    self.opened_at = time.monotonic()
+                return
+
+            if self.opened_at is not None:
+                # Started while closed and finished after the breaker opened
+                return
+
+            self.outcomes.append(success)
+            failures = self.outcomes.count(False)
+            if (len(self.outcomes) >= self.min_requests
+                    and failures / len(self.outcomes) >= self.error_threshold):
+                self.opened_at = time.monotonic()
+
+
+class PlantNetClient:
+    """Shared PlantNet client with keep-alive pooling, retries and a circuit breaker.
+
+    identify() returns a list of {"name", "score"} suggestions, or None when
+    the service is unavailable and the caller should fall back.
+    """
+
+    def __init__(self, api_key=None, endpoint=None, connect_timeout=None, read_timeout=None,
+                 max_retries=None, backoff=None, pool_size=None, breaker=None):
+        self.api_key = api_key or os.environ.get('PLANTNET_API_KEY')
+        self.endpoint = endpoint or os.environ.get('PLANTNET_ENDPOINT', DEFAULT_ENDPOINT)
+        self.timeout = (
+            connect_timeout or float(os.environ.get('PLANTNET_CONNECT_TIMEOUT', 3.05)),
+            read_timeout or float(os.environ.get('PLANTNET_READ_TIMEOUT', 15))
+        )
+        self.max_retries = max_retries if max_retries is not None else int(os.environ.get('PLANTNET_MAX_RETRIES', 2))
+        self.backoff = backoff if backoff is not None else float(os.environ.get('PLANTNET_BACKOFF', 0.5))
+        self.breaker = breaker or CircuitBreaker()
+
+        pool_size = pool_size or int(os.environ.get('PLANTNET_POOL_SIZE', 10))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=1000)
+        self.counters = {'requests': 0, 'failures': 0, 'retries': 0, 'short_circuits': 0}
+
+    @property
+    def configured(self):
+        return bool(self.api_key) and self.api_key != "YOUR_PLANTNET_KEY_HERE"
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def post(self, image_file):
+        image_file.seek(0)
+        files = [("images", image_file)]
+        params = {"organs": "leaf", "lang": "en", "api-key": self.api_key}
+        start = time.perf_counter()
+        try:
+            return self.session.post(self.endpoint, files=files, params=params, timeout=self.timeout)
+        finally:
+            with self.lock:
+                self.latencies.append(time.perf_counter() - start)
+
+    def identify(self, image_file):
+        """POST one image to PlantNet, retrying transient errors with exponential backoff"""
+        token = self.breaker.allow()
+        if token is None:
+            self.count('short_circuits')
+            return None
+
+        self.count('requests')
+        suggestions = None
+        try:
+            suggestions = self.identify_with_retries(image_file)
+        finally:
+            # Also on unexpected errors, so a failed trial can't leave the breaker half-open for good
+            self.breaker.record(token, suggestions is not None)
+        if suggestions is None:
+            self.count('failures')
+        return suggestions
+
+    def identify_with_retries(self, image_file):
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.count('retries')
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+            try:
+                response = self.post(image_file)
+            except (requests.ConnectionError, requests.Timeout):
+                continue
+
+            if response.status_code in RETRY_STATUSES:
+                continue
+            if response.status_code == 404:
+                # PlantNet answers 404 when it recognises no species
+                return []
+            if response.status_code != 200:
+                return None
+
+            try:
+                data = response.json()
+            except ValueError:
+                return None
+            return [
+                {
+                    "name": r["species"].get("scientificNameWithoutAuthor") or r["species"].get("scientificName") or "Unknown",
+                    "score": r.get("score", 0)
+                }
+                for r in data.get("results", [])
+            ]
+        return None
+
+    def stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            counters = dict(self.counters)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))
+            return round(latencies[index] * 1000, 1)
+
+        return {
+            **counters,
+            'circuit': self.breaker.state,
+            'latency_ms': {'p50': percentile(50), 'p90': percentile(90), 'p99': percentile(99)}
+        }
@@ -0,0 +1,228 @@
+import base64
+import json
+import os
+import re
+import tempfile
+
+
+IMAGE_KEY = re.compile(rb'"image"\s*:\s*"')
+# Any prefix of an IMAGE_KEY match, to wait for more input when a chunk ends mid-key
+IMAGE_KEY_PREFIX = re.compile(rb'"(?:i(?:m(?:a(?:g(?:e(?:"\s*(?::\s*)?)?)?)?)?)?)?')
+# Bytes that change string state or nesting depth
+STRUCTURE = re.compile(rb'[\\"{}\[\]]')
+# Enough of a number or string "id" to answer a request that failed to parse
+ID_KEY = re.compile(rb'"id"\s*:\s*(-?\d+|"(?:[^"\\]|\\.)*")')
+
+
+class InvalidRequest(ValueError):
+    """A request that isn't valid JSON or base64; request_id is its "id" when it could be found"""
+
+    def __init__(self, message, request_id=None):
+        super().__init__(message)
+        self.request_id = request_id
+
+
+def recover_id(head):
+    match = ID_KEY.search(head)
+    if match is None:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except ValueError:
+        return None
+
+
+class RequestReader:
+    """Read JSON requests from a binary stream without buffering inline images.
+
+    The top-level "image" string of each request is base64-decoded as it
+    arrives, a chunk at a time, into a SpooledTemporaryFile that stays in memory up to
+    spool_threshold bytes and moves to disk beyond that. The rest of the
+    request is small and is parsed with json as usual, with "image" replaced by
+    the file object. Nested "image" keys, such as those in an identify_batch
+    "images" list, are left to json. Requests are separated by newlines (NDJSON); a single
+    request without a trailing newline ends at EOF.
+    """
+
+    def __init__(self, stream, spool_threshold=None, chunk_size=1 << 16):
+        self.stream = stream
+        self.spool_threshold = spool_threshold or int(os.environ.get('PLANT_ID_SPOOL_BYTES', 4 * 1024 * 1024))
+        self.chunk_size = chunk_size
+        self.leftover = b''
+
+    def read_chunk(self):
+        if self.leftover:
+            chunk, self.leftover = self.leftover, b''
+            return chunk
+        # read1 returns whatever is available so an open pipe doesn't block for a full chunk
+        read = getattr(self.stream, 'read1', self.stream.read)
+        return read(self.chunk_size)
+
+    def read(self):
+        """Return the next request as a dict, or None at end of stream.
+
+        Raises InvalidRequest if the request isn't valid JSON or base64; the
+        rest of its line is skipped so the next read starts on a new request.
+        """
+        head = bytearray()
+        image = None
+        found_image = False
+        self.reset_scan()
+        searched = 0
+
+        while True:
+            chunk = self.read_chunk()
+            if not chunk:
+                break
+            head += chunk
+
+            newline = head.find(b'\n', searched)
+            searched = len(head)
+            search_end = newline if newline != -1 else len(head)
+            match = None if found_image else self.scan(head, search_end, newline != -1)
+
+            if match:
+                found_image = True
+                self.leftover = bytes(head[match.end():])
+                del head[match.end():]
+                try:
+                    image = self.read_image()
+                except ValueError as e:
+                    self.skip_line()
+                    raise InvalidRequest(str(e), recover_id(head)) from e
+                head += b'"'
+                self.scan_pos = searched = len(head)
+                continue
+
+            if newline != -1:
+                self.leftover = bytes(head[newline + 1:])
+                del head[newline:]
+                if head.strip():
+                    break
+                # Skip blank lines between requests
+                head.clear()
+                self.reset_scan()
+                searched = 0
+
+        if not head.strip():
+            if image is not None:
+                image.close()
+            return None
+
+        try:
+            data = json.loads(bytes(head))
+        except ValueError as e:
+            if image is not None:
+                image.close()
+            raise InvalidRequest(str(e), recover_id(head)) from e
+        if image is not None:
+            data['image'] = image
+        return data
+
+    def reset_scan(self):
+        self.scan_pos = 0
+        self.depth = 0
+        self.in_string = False
+
+    def scan(self, head, end, complete):
+        """Track strings and nesting in head up to end; return the IMAGE_KEY match
+        of an "image" key directly inside the top-level object, if one is found.
+
+        complete says whether end is the end of the line. If it isn't, the scan
+        stops before an escape or a possible key that the chunk cut in half.
+        """
+        pos = self.scan_pos
+        while True:
+            token = STRUCTURE.search(head, pos, end)
+            if token is None:
+                pos = end
+                break
+            pos = token.start()
+            char = head[pos]
+            if self.in_string:
+                if char == ord('\\'):
+                    if pos + 1 >= end and not complete:
+                        break
+                    pos += 2
+                    continue
+                if char == ord('"'):
+                    self.in_string = False
+            elif char == ord('"'):
+                if self.depth == 1:
+                    match = IMAGE_KEY.match(head, pos, end)
+                    if match:
+                        self.scan_pos = match.end()
+                        return match
+                    if not complete and IMAGE_KEY_PREFIX.fullmatch(head, pos, end):
+                        break
+                self.in_string = True
+            elif char in b'{[':
+                self.depth += 1
+            else:
+                self.depth -= 1
+            pos += 1
+        self.scan_pos = pos
+        return None
+
+    def skip_line(self):
+        """Discard input up to and including the next newline"""
+        while True:
+            chunk = self.read_chunk()
+            if not chunk:
+                return
+            newline = chunk.find(b'\n')
+            if newline != -1:
+                self.leftover = chunk[newline + 1:]
+                return
+
+    def read_image(self):
+        """Decode the base64 string body up to its closing quote into a spool file"""
+        image = tempfile.SpooledTemporaryFile(max_size=self.spool_threshold)
+        carry = b''
+        prefix_checked = False
+
+        while True:
+            chunk = self.read_chunk()
+            if not chunk:
+                image.close()
+                raise ValueError('Unterminated image string')
+
+            end = chunk.find(b'"')
+            part = chunk if end == -1 else chunk[:end]
+            if end != -1:
+                self.leftover = chunk[end + 1:]
+
+            # JSON may escape "/" as "\/"; base64 itself never contains a backslash
+            data = carry + part.replace(b'\\', b'')
+
+            if not prefix_checked:
+                # Drop a data URL prefix such as "data:image/jpeg;base64,"
+                if data.startswith(b'data:'):
+                    comma = data.find(b',')
+                    if comma == -1 and end == -1:
+                        carry = data
+                        continue
+                    data = data[comma + 1:]
+                    prefix_checked = True
+                elif len(data) >= 5 or end != -1:
+                    prefix_checked = True
+                else:
+                    carry = data
+                    continue
+
+            if end != -1:
+                # Last piece: restore any padding the sender left off
+                data += b'=' * (-len(data) % 4)
+                image.write(base64.b64decode(data))
+                break
+
+            usable = len(data) - len(data) % 4
+            image.write(base64.b64decode(data[:usable]))
+            carry = data[usable:]
+
+        if image.tell() == 0:
+            # Empty string: leave "image" as "" in the parsed request
+            image.close()
+            return None
+        image.seek(0)
+        return image
@@ -0,0 +1,188 @@
+import base64
+import binascii
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'results')
+
+
+def hash_image(image_data=None, image_path=None, chunk_size=1 << 16):
+    """Return a sha256 hex digest of the raw image bytes, or None if there is no image.
+
+    Uploaded files are hashed from disk, and base64 payloads and streamed
+    image files are hashed after decoding, so the same photo sent either way
+    maps to the same key.
+    """
+    digest = hashlib.sha256()
+    if image_path and isinstance(image_path, str):
+        if not os.path.exists(image_path):
+            return None
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    if hasattr(image_data, 'read'):
+        image_data.seek(0)
+        for chunk in iter(lambda: image_data.read(chunk_size), b''):
+            digest.update(chunk)
+        image_data.seek(0)
+        return digest.hexdigest()
+
+    if isinstance(image_data, str) and image_data:
+        # Strip a data URL prefix such as "data:image/jpeg;base64,"
+        payload = image_data.split(',', 1)[1] if image_data.startswith('data:') else image_data
+        try:
+            digest.update(base64.b64decode(payload, validate=False))
+        except (binascii.Error, ValueError):
+            digest.update(payload.encode('utf-8'))
+        return digest.hexdigest()
+
+    return None
+
+
+class ResultCache:
+    """Two-tier cache of identification results keyed on image content.
+
+    The memory tier is an LRU of recent results. The disk tier stores one JSON
+    file per key, drops entries older than ttl seconds and evicts the oldest
+    files once the directory grows past max_disk_bytes.
+    """
+
+    def __init__(self, cache_dir=None, max_entries=None, ttl=None, max_disk_bytes=None):
+        self.cache_dir = cache_dir or os.environ.get('PLANT_ID_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.max_entries = max_entries or int(os.environ.get('PLANT_ID_CACHE_SIZE', 256))
+        self.ttl = ttl or float(os.environ.get('PLANT_ID_CACHE_TTL', 7 * 24 * 3600))
+        self.max_disk_bytes = max_disk_bytes or int(os.environ.get('PLANT_ID_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.disk_bytes = sum(size for _, _, size in self.disk_entries())
+
+    def make_key(self, action, image_data=None, image_path=None, params=None):
+        image_hash = hash_image(image_data, image_path)
+        if image_hash is None:
+            return None
+        params_part = json.dumps(params or {}, sort_keys=True)
+        return hashlib.sha256(f"{action}:{image_hash}:{params_part}".encode('utf-8')).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[1]
+            if entry is not None:
+                del self.memory[key]
+
+        path = self.path_for(key)
+        try:
+            stored_at = os.path.getmtime(path)
+            if now - stored_at >= self.ttl:
+                self.remove_file(path)
+                raise FileNotFoundError(path)
+            with open(path, 'r') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            with self.lock:
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.disk_hits += 1
+            self.remember(key, stored_at, result)
+        return result
+
+    def set(self, key, result):
+        now = time.time()
+        with self.lock:
+            self.remember(key, now, result)
+
+        path = self.path_for(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        data = json.dumps(result)
+        try:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+
+        with self.lock:
+            self.disk_bytes += len(data) - old_size
+            over_limit = self.disk_bytes > self.max_disk_bytes
+        if over_limit:
+            self.evict_disk()
+
+    def remember(self, key, stored_at, result):
+        # Caller holds self.lock
+        self.memory[key] = (stored_at, result)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def disk_entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def remove_file(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self.lock:
+            self.disk_bytes -= size
+
+    def evict_disk(self):
+        """Drop expired files, then the oldest ones until under max_disk_bytes"""
+        now = time.time()
+        entries = sorted(self.disk_entries())
+        total = sum(size for _, _, size in entries)
+        for stored_at, path, size in entries:
+            if total <= self.max_disk_bytes and now - stored_at < self.ttl:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        with self.lock:
+            self.disk_bytes = total
+
+    def stats(self):
+        with self.lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'memory_entries': len(self.memory),
+                'disk_bytes': self.disk_bytes
+            }
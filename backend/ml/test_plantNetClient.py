@@ -0,0 +1,144 @@
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from plantNetClient import CircuitBreaker, PlantNetClient
+
+RESULTS = {"results": [{"score": 0.9, "species": {"scientificNameWithoutAuthor": "Ficus lyrata"}}]}
+
+
+class StubPlantNet:
+    """Local stand-in for the PlantNet identify endpoint.
+
+    Answers POSTs with the queued (status, body) pairs in order, then with
+    `default` once the queue is empty, and counts the calls it received.
+    """
+
+    def __init__(self):
+        self.responses = []
+        self.default = (200, RESULTS)
+        self.calls = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                stub.calls += 1
+                status, body = stub.responses.pop(0) if stub.responses else stub.default
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}/v2/identify/all'
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    stub = StubPlantNet()
+    yield stub
+    stub.close()
+
+
+def make_client(stub, **breaker_args):
+    breaker = CircuitBreaker(**{'window': 4, 'min_requests': 2, 'error_threshold': 0.5,
+                                'cooldown': 0.2, **breaker_args})
+    return PlantNetClient(api_key='test', endpoint=stub.url, max_retries=2, backoff=0, breaker=breaker)
+
+
+def image():
+    return io.BytesIO(b'not really a jpeg')
+
+
+def test_retries_transient_errors(stub):
+    stub.responses = [(503, {}), (429, {})]
+    client = make_client(stub)
+    assert client.identify(image()) == [{"name": "Ficus lyrata", "score": 0.9}]
+    assert stub.calls == 3
+    assert client.stats()['retries'] == 2
+
+
+def test_gives_up_after_max_retries(stub):
+    stub.default = (500, {})
+    client = make_client(stub)
+    assert client.identify(image()) is None
+    assert stub.calls == 3
+    assert client.stats()['failures'] == 1
+
+
+def test_not_found_means_no_species(stub):
+    stub.responses = [(404, {"message": "Species not found"})]
+    client = make_client(stub)
+    assert client.identify(image()) == []
+    assert client.breaker.state == 'closed'
+
+
+def test_breaker_opens_and_short_circuits(stub):
+    stub.default = (500, {})
+    client = make_client(stub)
+    client.identify(image())
+    client.identify(image())
+    assert client.breaker.state == 'open'
+
+    calls = stub.calls
+    assert client.identify(image()) is None
+    assert stub.calls == calls
+    assert client.stats()['short_circuits'] == 1
+
+
+def test_half_open_trial_recovers(stub):
+    stub.default = (500, {})
+    client = make_client(stub)
+    client.identify(image())
+    client.identify(image())
+    time.sleep(0.25)
+    assert client.breaker.state == 'half_open'
+
+    stub.default = (200, RESULTS)
+    assert client.identify(image()) == [{"name": "Ficus lyrata", "score": 0.9}]
+    assert client.breaker.state == 'closed'
+
+
+def test_half_open_trial_failure_reopens(stub):
+    stub.default = (500, {})
+    client = make_client(stub)
+    client.identify(image())
+    client.identify(image())
+    time.sleep(0.25)
+    assert client.identify(image()) is None
+    assert client.breaker.state == 'open'
+
+
+def test_late_results_do_not_decide_the_trial():
+    breaker = CircuitBreaker(window=4, min_requests=2, cooldown=0.05)
+    late = breaker.allow()
+    breaker.record(breaker.allow(), False)
+    breaker.record(breaker.allow(), False)
+    time.sleep(0.06)
+    trial = breaker.allow()
+    assert trial == 'trial'
+
+    # A call that started while closed finishes during the trial
+    breaker.record(late, True)
+    assert breaker.state == 'half_open'
+    assert breaker.trial_in_flight
+    assert breaker.allow() is None
+
+    breaker.record(trial, True)
+    assert breaker.state == 'closed'
@@ -0,0 +1,71 @@
+import base64
+import io
+import json
+
+import pytest
+
+from requestReader import InvalidRequest, RequestReader
+
+FIRST = bytes(range(256)) * 40
+SECOND = b'second image' * 500
+
+
+def encode(data):
+    return base64.b64encode(data).decode()
+
+
+def read_all(payload, chunk_size):
+    reader = RequestReader(io.BytesIO(payload), chunk_size=chunk_size)
+    requests = []
+    while True:
+        data = reader.read()
+        if data is None:
+            return requests
+        requests.append(data)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 64, 1 << 16])
+def test_single_image_is_streamed(chunk_size):
+    line = json.dumps({"id": 1, "action": "identify", "image": "data:image/png;base64," + encode(FIRST)})
+    [data] = read_all(line.encode() + b'\n', chunk_size)
+    assert data['id'] == 1
+    assert data['action'] == 'identify'
+    assert data['image'].read() == FIRST
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 64, 1 << 16])
+def test_batch_images_are_left_to_json(chunk_size):
+    line = json.dumps({"id": 2, "action": "identify_batch",
+                       "images": [{"image": encode(FIRST)}, {"image": encode(SECOND)}]})
+    [data] = read_all(line.encode() + b'\n', chunk_size)
+    assert 'image' not in data
+    assert [item['image'] for item in data['images']] == [encode(FIRST), encode(SECOND)]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 1 << 16])
+def test_top_level_image_after_nested_and_quoted_keys(chunk_size):
+    line = json.dumps({"note": 'has "image": "inside" a string \\', "meta": {"image": "abc="},
+                       "image": encode(SECOND)})
+    [data] = read_all(line.encode() + b'\n', chunk_size)
+    assert data['note'] == 'has "image": "inside" a string \\'
+    assert data['meta'] == {"image": "abc="}
+    assert data['image'].read() == SECOND
+
+
+def test_requests_on_consecutive_lines():
+    payload = (json.dumps({"id": 1, "image": encode(FIRST)}) + '\n\n' +
+               json.dumps({"id": 2, "images": [{"image": encode(SECOND)}]}) + '\n' +
+               json.dumps({"id": 3, "image": encode(SECOND)}))
+    first, second, third = read_all(payload.encode(), 32)
+    assert first['image'].read() == FIRST
+    assert second['images'][0]['image'] == encode(SECOND)
+    assert third['image'].read() == SECOND
+
+
+def test_invalid_request_keeps_its_id_and_the_next_line():
+    payload = b'{"id": 7, "action": oops}\n{"id": 8, "action": "cache_stats"}\n'
+    reader = RequestReader(io.BytesIO(payload), chunk_size=4)
+    with pytest.raises(InvalidRequest) as error:
+        reader.read()
+    assert error.value.request_id == 7
+    assert reader.read() == {"id": 8, "action": "cache_stats"}
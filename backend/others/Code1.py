@@ -2,8 +2,16 @@ import numpy as np
 
 # Function for one-hot encoding
 def one_hot_encode(sequences, num_classes):
-    """Convert sequences of integers into one-hot encoded vectors."""
-    return np.eye(num_classes)[sequences]
+    """Convert sequences of integers into one-hot encoded vectors.
+
+    Only the output is allocated; indexing np.eye(num_classes) would first
+    build a num_classes x num_classes identity matrix. Prefer passing the
+    integer ids to Embedding.forward, which gathers rows directly.
+    """
+    sequences = np.asarray(sequences)
+    encoded = np.zeros(sequences.shape + (num_classes,))
+    np.put_along_axis(encoded, sequences[..., None], 1, axis=-1)
+    return encoded
 
 # Embedding Layer
 class Embedding:
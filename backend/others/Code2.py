@@ -44,69 +44,167 @@ Y = [text_to_sequence(pair['answer'], vocab, max_len) for pair in data]
 # ------------------------ MODEL ARCHITECTURE ----------------------------
 
 class Encoder:
+    """Tanh RNN over a (batch, steps) array of token ids.
+
+    Wxh holds one row per token: row v equals the old Wxh @ one_hot(v), so
+    the input term is a row gather instead of a (hidden x vocab) GEMV.
+    """
     def __init__(self, vocab_size, hidden_size):
-        self.Wxh = np.random.randn(hidden_size, vocab_size) * 0.01
+        self.Wxh = np.random.randn(vocab_size, hidden_size) * 0.01
         self.Whh = np.random.randn(hidden_size, hidden_size) * 0.01
-        self.bh = np.zeros((hidden_size, 1))
+        self.bh = np.zeros(hidden_size)
         self.hidden_size = hidden_size
-    
+
     def forward(self, inputs):
-        h = np.zeros((self.hidden_size, 1))
-        self.hidden_states = []
-        for word_idx in inputs:
-            x = np.zeros((len(self.Wxh[0]), 1))
-            x[word_idx] = 1
-            h = np.tanh(np.dot(self.Wxh, x) + np.dot(self.Whh, h) + self.bh)
-            self.hidden_states.append(h)
-        return self.hidden_states
+        self.inputs = np.atleast_2d(inputs)
+        batch, steps = self.inputs.shape
+        # hidden_states[0] is the zero initial state; returns the (steps, batch, hidden) rest
+        self.hidden_states = np.zeros((steps + 1, batch, self.hidden_size))
+        x = self.Wxh[self.inputs.T]  # (steps, batch, hidden) row gather for every step at once
+        for t in range(steps):
+            self.hidden_states[t + 1] = np.tanh(x[t] + self.hidden_states[t] @ self.Whh.T + self.bh)
+        return self.hidden_states[1:]
 
     def backward(self, d_hidden):
-        d_Wxh, d_Whh, d_bh = np.zeros_like(self.Wxh), np.zeros_like(self.Whh), np.zeros_like(self.bh)
-        for dh in reversed(d_hidden):
-            d_bh += dh
-            d_Wxh += np.outer(dh, self.hidden_states)
-            d_Whh += np.outer(dh, self.hidden_states)
+        """Backpropagation through time; d_hidden is the gradient of each returned hidden state"""
+        d_Whh, d_bh = np.zeros_like(self.Whh), np.zeros_like(self.bh)
+        d_x = np.empty_like(d_hidden)
+        dh_next = np.zeros_like(d_hidden[0])
+        for t in reversed(range(len(d_hidden))):
+            dz = (d_hidden[t] + dh_next) * (1 - self.hidden_states[t + 1] ** 2)
+            d_Whh += dz.T @ self.hidden_states[t]
+            d_bh += dz.sum(axis=0)
+            d_x[t] = dz
+            dh_next = dz @ self.Whh
+        # Scatter-add onto the rows that were looked up; repeated ids accumulate
+        d_Wxh = np.zeros_like(self.Wxh)
+        np.add.at(d_Wxh, self.inputs.T.ravel(), d_x.reshape(-1, self.hidden_size))
         return d_Wxh, d_Whh, d_bh
 
 class Attention:
-    def calculate_attention(self, query, keys, values):
-        scores = [np.dot(query.T, k) for k in keys]
-        attention_weights = np.exp(scores) / np.sum(np.exp(scores))
-        context_vector = sum(w * v for w, v in zip(attention_weights, values))
-        return context_vector, attention_weights
-
-    def backward(self, d_context, keys, values):
-        d_query = sum(d_context * k for k in keys)
-        return d_query
+    """Additive (Bahdanau) attention, batched: score_t = v . tanh(Wk key_t + Wq query).
+
+    precompute() stacks the encoder states once into a (batch, steps, hidden)
+    array and projects them with Wk. Every decoding step then reuses that
+    memory, so a step costs one query projection plus one matmul each for
+    the scores, the softmax normalisation and the context.
+    """
+    def __init__(self, hidden_size, attention_size=None):
+        attention_size = attention_size or hidden_size
+        self.Wq = np.random.randn(attention_size, hidden_size) * 0.01
+        self.Wk = np.random.randn(attention_size, hidden_size) * 0.01
+        self.v = np.random.randn(attention_size) * 0.01
+
+    def precompute(self, encoder_hidden_states):
+        """(values, keys) for (steps, batch, hidden) states; also resets the gradients"""
+        values = np.ascontiguousarray(np.asarray(encoder_hidden_states).transpose(1, 0, 2))
+        keys = values @ self.Wk.T
+        self.dWq, self.dWk, self.dv = np.zeros_like(self.Wq), np.zeros_like(self.Wk), np.zeros_like(self.v)
+        return values, keys
+
+    def calculate_attention(self, query, values, keys):
+        """query: (batch, hidden). Returns context (batch, hidden), weights (batch, steps) and the tanh energies"""
+        energy = np.tanh(keys + (query @ self.Wq.T)[:, None, :])
+        scores = energy @ self.v
+        # Max-subtracted softmax over the encoder steps
+        attention_weights = np.exp(scores - scores.max(axis=1, keepdims=True))
+        attention_weights /= attention_weights.sum(axis=1, keepdims=True)
+        context_vector = (attention_weights[:, None, :] @ values)[:, 0]
+        return context_vector, attention_weights, energy
+
+    def backward(self, d_context, query, values, keys, attention_weights, energy):
+        """Accumulates dWq and dv; returns the gradients of query, values and keys"""
+        d_values = attention_weights[:, :, None] * d_context[:, None, :]
+        d_weights = (values @ d_context[:, :, None])[:, :, 0]
+        d_scores = attention_weights * (d_weights - np.sum(attention_weights * d_weights, axis=1, keepdims=True))
+        self.dv += np.einsum('bt,bta->a', d_scores, energy)
+        d_keys = d_scores[:, :, None] * self.v * (1 - energy ** 2)
+        d_query_projection = d_keys.sum(axis=1)
+        self.dWq += d_query_projection.T @ query
+        return d_query_projection @ self.Wq, d_values, d_keys
+
+    def precompute_backward(self, values, d_values, d_keys):
+        """Sets dWk and returns the gradient of the (steps, batch, hidden) encoder states"""
+        self.dWk += np.einsum('bta,bth->ah', d_keys, values)
+        return (d_values + d_keys @ self.Wk).transpose(1, 0, 2)
 
 class Decoder:
+    """Tanh RNN decoder over (batch, steps) token ids, attending at every step.
+
+    Wxh is a per-token row table like the encoder's; Wch brings in the
+    attention context, computed from the previous hidden state, and Who
+    projects each hidden state to vocabulary logits.
+    """
     def __init__(self, vocab_size, hidden_size):
-        self.Wxh = np.random.randn(hidden_size, vocab_size) * 0.01
+        self.Wxh = np.random.randn(vocab_size, hidden_size) * 0.01
         self.Whh = np.random.randn(hidden_size, hidden_size) * 0.01
+        self.Wch = np.random.randn(hidden_size, hidden_size) * 0.01
         self.Who = np.random.randn(vocab_size, hidden_size) * 0.01
-        self.bh = np.zeros((hidden_size, 1))
-        self.bo = np.zeros((vocab_size, 1))
+        self.bh = np.zeros(hidden_size)
+        self.bo = np.zeros(vocab_size)
         self.hidden_size = hidden_size
-    
-    def forward(self, inputs, hidden, context):
-        outputs = []
-        h = hidden
-        for word_idx in inputs:
-            x = np.zeros((len(self.Wxh[0]), 1))
-            x[word_idx] = 1
-            h = np.tanh(np.dot(self.Wxh, x) + np.dot(self.Whh, h) + np.dot(self.Who, context) + self.bh)
-            o = np.dot(self.Who, h) + self.bo
-            outputs.append(o)
-        return outputs
-
-    def backward(self, d_output, hidden, context, inputs):
-        d_Wxh, d_Whh, d_Who, d_bh = np.zeros_like(self.Wxh), np.zeros_like(self.Whh), np.zeros_like(self.Who), np.zeros_like(self.bh)
-        for do in d_output:
-            d_Wxh += np.outer(do, hidden)
-            d_Whh += np.outer(do, hidden)
-            d_Who += np.outer(do, context)
-            d_bh += do
-        return d_Who, d_Wxh, d_Whh, d_bh
+
+    def forward(self, inputs, hidden, attention, memory):
+        """memory is attention.precompute(encoder states). Returns (batch, steps, vocab_size) logits;
+        the last state is hidden_states[-1]"""
+        self.inputs = np.atleast_2d(inputs)
+        self.attention, self.memory = attention, memory
+        batch, steps = self.inputs.shape
+        self.hidden_states = np.empty((steps + 1, batch, self.hidden_size))
+        self.hidden_states[0] = hidden
+        self.contexts = np.empty((steps, batch, self.hidden_size))
+        self.attention_cache = []
+        # The input term doesn't depend on h, so it's gathered for all steps up front
+        x = self.Wxh[self.inputs.T] + self.bh
+        for t in range(steps):
+            h = self.hidden_states[t]
+            context, weights, energy = attention.calculate_attention(h, *memory)
+            self.contexts[t] = context
+            self.attention_cache.append((weights, energy))
+            self.hidden_states[t + 1] = np.tanh(x[t] + h @ self.Whh.T + context @ self.Wch.T)
+        return self.hidden_states[1:].transpose(1, 0, 2) @ self.Who.T + self.bo
+
+    def backward(self, d_output):
+        """d_output: gradient of the logits. Returns weight gradients, that of the initial
+        hidden state, and those of the attention memory (values, keys)"""
+        hs = self.hidden_states
+        values, keys = self.memory
+        d_output = d_output.transpose(1, 0, 2)  # (steps, batch, vocab)
+        d_Who = np.einsum('tbv,tbh->vh', d_output, hs[1:])
+        d_bo = d_output.sum(axis=(0, 1))
+        d_h_out = d_output @ self.Who
+
+        d_Whh = np.zeros_like(self.Whh)
+        d_x = np.empty_like(d_h_out)
+        d_values, d_keys = np.zeros_like(values), np.zeros_like(keys)
+        dh_next = np.zeros_like(hs[0])
+        for t in reversed(range(len(d_h_out))):
+            dz = (d_h_out[t] + dh_next) * (1 - hs[t + 1] ** 2)
+            d_Whh += dz.T @ hs[t]
+            d_x[t] = dz
+            dh_next = dz @ self.Whh
+            d_query, d_step_values, d_step_keys = self.attention.backward(
+                dz @ self.Wch, hs[t], values, keys, *self.attention_cache[t])
+            dh_next += d_query
+            d_values += d_step_values
+            d_keys += d_step_keys
+
+        d_Wch = np.einsum('tbh,tbc->hc', d_x, self.contexts)
+        d_bh = d_x.sum(axis=(0, 1))
+        d_Wxh = np.zeros_like(self.Wxh)
+        np.add.at(d_Wxh, self.inputs.T.ravel(), d_x.reshape(-1, self.hidden_size))
+        return (d_Who, d_Wxh, d_Whh, d_Wch, d_bh, d_bo), dh_next, (d_values, d_keys)
+
+def softmax_cross_entropy(logits, targets, pad=0):
+    """Mean loss over non-padding targets and its gradient with respect to the logits"""
+    probs = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    probs /= probs.sum(axis=-1, keepdims=True)
+    mask = targets != pad
+    count = max(mask.sum(), 1)
+    picked = np.take_along_axis(probs, targets[..., None], axis=-1)[..., 0]
+    loss = -np.log(picked[mask] + 1e-12).sum() / count
+    np.put_along_axis(probs, targets[..., None], picked[..., None] - 1, axis=-1)
+    return loss, probs * (mask / count)[..., None]
 
 # ------------------------ TRAINING ----------------------------
 
@@ -127,7 +225,7 @@ batch_size = 2
 
 # Initialize model
 encoder = Encoder(vocab_size, hidden_size)
-attention = Attention()
+attention = Attention(hidden_size)
 decoder = Decoder(vocab_size, hidden_size)
 optimizer = GradientDescentOptimizer(lr=learning_rate)
 
@@ -138,31 +236,27 @@ for epoch in range(epochs):
         X_batch = np.array(X[i:i + batch_size])
         Y_batch = np.array(Y[i:i + batch_size])
 
-        for j in range(len(X_batch)):
-            # Forward pass through encoder
-            encoder_hidden_states = encoder.forward(X_batch[j])
-
-            # Forward pass through decoder
-            batch_loss = 0
-            context_vector, _ = attention.calculate_attention(encoder_hidden_states[-1], encoder_hidden_states, encoder_hidden_states)
-            decoder_output = decoder.forward(Y_batch[j], encoder_hidden_states[-1], context_vector)
-            
-            # Simplified loss calculation
-            loss = np.sum((decoder_output[-1] - Y_batch[j]) ** 2)  # Mean squared error loss
-            batch_loss += loss
-
-            # Backpropagation
-            d_output = decoder_output[-1] - Y_batch[j]
-            d_Who, d_Wxh, d_Whh, d_bh = decoder.backward(d_output, encoder_hidden_states[-1], context_vector, Y_batch[j])
-            d_context_vector = np.sum(d_output, axis=0)
-            d_query = attention.backward(d_context_vector, encoder_hidden_states, encoder_hidden_states)
-            d_Wxh_enc, d_Whh_enc, d_bh_enc = encoder.backward(d_query)
-            
-            # Update weights
-            optimizer.update([decoder.Who, decoder.Wxh, decoder.Whh, decoder.bh], [d_Who, d_Wxh, d_Whh, d_bh])
-            optimizer.update([encoder.Wxh, encoder.Whh, encoder.bh], [d_Wxh_enc, d_Whh_enc, d_bh_enc])
-
-        total_loss += batch_loss
+        # Forward pass through encoder, one call for the whole batch; the
+        # attention memory is built once and shared by every decoder step
+        encoder_hidden_states = encoder.forward(X_batch)
+        memory = attention.precompute(encoder_hidden_states)
+
+        # Teacher forcing: the decoder reads Y[:, :-1] and predicts Y[:, 1:]
+        decoder_output = decoder.forward(Y_batch[:, :-1], encoder_hidden_states[-1], attention, memory)
+        batch_loss, d_output = softmax_cross_entropy(decoder_output, Y_batch[:, 1:])
+
+        # Backpropagation
+        decoder_grads, d_hidden, d_memory = decoder.backward(d_output)
+        d_encoder_states = attention.precompute_backward(memory[0], *d_memory)
+        d_encoder_states[-1] += d_hidden
+        d_Wxh_enc, d_Whh_enc, d_bh_enc = encoder.backward(d_encoder_states)
+
+        # Update weights
+        optimizer.update([decoder.Who, decoder.Wxh, decoder.Whh, decoder.Wch, decoder.bh, decoder.bo], decoder_grads)
+        optimizer.update([attention.Wq, attention.Wk, attention.v], [attention.dWq, attention.dWk, attention.dv])
+        optimizer.update([encoder.Wxh, encoder.Whh, encoder.bh], [d_Wxh_enc, d_Whh_enc, d_bh_enc])
+
+        total_loss += batch_loss * len(X_batch)
 
     if epoch % 100 == 0:
         print(f'Epoch {epoch+1}/{epochs}, Loss: {total_loss / len(X)}')
@@ -172,17 +266,20 @@ for epoch in range(epochs):
 def generate_response(query, encoder, decoder, attention, vocab, max_len=20):
     query_sequence = text_to_sequence(query, vocab, max_len)
 
-    # Forward pass through encoder
-    encoder_hidden_states = encoder.forward(query_sequence)
+    # Forward pass through encoder, as a batch of one
+    encoder_hidden_states = encoder.forward([query_sequence])
+    hidden = encoder_hidden_states[-1]
+    memory = attention.precompute(encoder_hidden_states)
 
-    # Start decoding process (greedy search)
+    # Start decoding process (greedy search), carrying the decoder state between
+    # steps; each step attends over the same precomputed keys
     response_sequence = [vocab['<SOS>']]
     for _ in range(max_len):
-        context_vector, _ = attention.calculate_attention(encoder_hidden_states[-1], encoder_hidden_states, encoder_hidden_states)
-        decoder_output = decoder.forward(response_sequence[-1:], encoder_hidden_states[-1], context_vector)
-        
+        decoder_output = decoder.forward([response_sequence[-1:]], hidden, attention, memory)
+        hidden = decoder.hidden_states[-1]
+
         # Get the token with the highest probability (greedy decoding)
-        next_token = np.argmax(decoder_output[-1], axis=-1)
+        next_token = int(np.argmax(decoder_output[0, -1]))
         
         # Append to response
         response_sequence.append(next_token)
@@ -1,18 +1,25 @@
 import json
+import os
+import sys
 import numpy as np
 from tensorflow.keras.preprocessing.text import Tokenizer
 from tensorflow.keras.preprocessing.sequence import pad_sequences
 from tensorflow.keras.models import Model, load_model
 from tensorflow.keras.layers import Input, LSTM, Dense, Embedding
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Chatbot'))
+from Chatbot_Decoder import IncrementalDecoder
+
 # Step 1: Loading and Processing Data
 with open('questions_answers.json', 'r') as f:
     data = json.load(f)
 
 questions = [item['question'] for item in data]
-answers = [item['answer'] for item in data]
+# <start> and <end> mark where generation begins and stops; they are kept out
+# of the tokenizer's filters so they survive as tokens
+answers = ['<start> ' + item['answer'] + ' <end>' for item in data]
 
-tokenizer = Tokenizer()
+tokenizer = Tokenizer(filters='!"#$%&()*+,-./:;=?@[\\]^_`{|}~\t\n')
 tokenizer.fit_on_texts(questions + answers)
 
 questions_seq = tokenizer.texts_to_sequences(questions)
@@ -55,30 +62,26 @@ def preprocess_input(text):
     padded_seq = pad_sequences(seq, maxlen=max_len, padding='post')
     return padded_seq
 
-def decode_sequence(predicted_seq):
+start_token = tokenizer.word_index['<start>']
+end_token = tokenizer.word_index['<end>']
+# Encodes each question once, then feeds back one predicted token per step
+decoder = IncrementalDecoder(model, start_token=start_token, end_token=end_token, max_len=max_len)
+
+def decode_sequence(token_ids):
     decoded_sentence = []
-    for idx in np.argmax(predicted_seq[0], axis=1):
-        word = tokenizer.index_word.get(idx)
-        if word == '<end>' or word is None:
+    for idx in token_ids:
+        if idx == end_token or idx == 0:
             break
-        decoded_sentence.append(word)
+        decoded_sentence.append(tokenizer.index_word.get(idx, ''))
     return ' '.join(decoded_sentence)
 
-def generate_response(user_input):
+def generate_response(user_input, beam_width=1):
     input_seq = preprocess_input(user_input)
-    decoder_input = np.zeros((1, max_len))
-    encoder_outputs, state_h, state_c = encoder_lstm.predict(input_seq)
-    encoder_states = [state_h, state_c]
-    response = ''
-    for _ in range(max_len):
-        output_tokens, h, c = decoder_lstm.predict([decoder_input] + encoder_states)
-        decoded_word = decode_sequence(output_tokens)
-        response += ' ' + decoded_word
-        if decoded_word == '<end>':
-            break
-        decoder_input = np.argmax(output_tokens, axis=-1)
-        encoder_states = [h, c]
-    return response.strip()
+    if beam_width > 1:
+        output_tokens = decoder.beam_search(input_seq, beam_width=beam_width)
+    else:
+        output_tokens = decoder.greedy(input_seq)
+    return decode_sequence(output_tokens[0]).strip()
 
 # Step 5: Setting Up a Chat Loop
 def chatbot():
@@ -18,6 +18,9 @@ keyword_responses = {
 # Extract keywords and responses
 keywords = list(keyword_responses.keys())
 responses = list(keyword_responses.values())
+keyword_index = {keyword: i for i, keyword in enumerate(keywords)}
+# Longest keyword in words, so multi-word keywords like "pest control" can match
+max_keyword_words = max(len(keyword.split()) for keyword in keywords)
 
 # Step 2: Tokenization Function
 def tokenize(text):
@@ -26,13 +29,15 @@ def tokenize(text):
     return tokens
 
 # Step 3: Manual Vectorization
-def vectorize(tokens, keywords):
-    """Create a bag-of-words representation of the tokens based on the keywords."""
+def vectorize(tokens):
+    """Create a bag-of-words representation of the tokens over the module's keywords."""
     vector = np.zeros(len(keywords), dtype=int)
-    for token in tokens:
-        if token in keywords:
-            index = keywords.index(token)
-            vector[index] += 1  # Increment the count for this keyword
+    # Check every run of up to max_keyword_words tokens with a dict lookup
+    for n in range(1, max_keyword_words + 1):
+        for start in range(len(tokens) - n + 1):
+            index = keyword_index.get(' '.join(tokens[start:start + n]))
+            if index is not None:
+                vector[index] += 1  # Increment the count for this keyword
     return vector
 
 # Step 4: Calculate Cosine Similarity
@@ -45,22 +50,21 @@ def cosine_similarity(vec1, vec2):
         return 0.0
     return dot_product / (norm_a * norm_b)
 
+# Each keyword's vector, L2-normalized, as one row of a matrix; built once
+keyword_matrix = np.array([vectorize(keyword.split()) for keyword in keywords], dtype=float)
+keyword_matrix /= np.linalg.norm(keyword_matrix, axis=1, keepdims=True)
+
 # Step 5: Get the Most Similar Response
 def get_most_similar_response(user_query):
     """Get the best response based on the user's query."""
     user_tokens = tokenize(user_query)
-    user_vector = vectorize(user_tokens, keywords)
-    
-    best_index = -1
-    best_score = -1
+    user_vector = vectorize(user_tokens)
     
-    for i, keyword in enumerate(keywords):
-        keyword_vector = vectorize([keyword], keywords)
-        score = cosine_similarity(user_vector, keyword_vector)
-        
-        if score > best_score:
-            best_score = score
-            best_index = i
+    # Cosine similarity against every keyword at once
+    norm = np.linalg.norm(user_vector)
+    scores = keyword_matrix @ user_vector / norm if norm else np.zeros(len(keywords))
+    best_index = int(np.argmax(scores))
+    best_score = scores[best_index]
     
     # Check if the similarity score is significant
     if best_score > 0.1:  # You can adjust this threshold
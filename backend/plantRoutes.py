@@ -0,0 +1,373 @@
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from pymongo.errors import BulkWriteError
+
+# Largest page a client can ask for with ?limit=
+MAX_PAGE_SIZE = 1000
+# Documents fetched from Mongo per round trip while streaming
+CURSOR_BATCH_SIZE = 500
+# Bytes of encoded documents gathered before each write to the client
+STREAM_CHUNK_SIZE = 64 * 1024
+# Documents per insert_many call on the bulk endpoint
+BULK_CHUNK_SIZE = int(os.environ.get('PLANT_BULK_CHUNK_SIZE', 500))
+# Grouping of concurrent single inserts
+INSERT_BATCH_SIZE = int(os.environ.get('PLANT_INSERT_BATCH_SIZE', 100))
+INSERT_MAX_WAIT_MS = float(os.environ.get('PLANT_INSERT_MAX_WAIT_MS', 5))
+# Single inserts waiting for the batcher, and how long a request waits before a 503
+INSERT_QUEUE_SIZE = int(os.environ.get('PLANT_INSERT_QUEUE_SIZE', 10000))
+INSERT_TIMEOUT = float(os.environ.get('PLANT_INSERT_TIMEOUT', 10))
+
+# Optional fields checked by validate_plant, mirroring the schema in server.js
+STRING_FIELDS = ('description', 'image', 'waterNeeds', 'sunlight', 'temperature')
+NUMBER_FIELDS = ('rating', 'reviews')
+
+
+def encode_plant(plant):
+    plant['_id'] = str(plant['_id'])
+    return json.dumps(plant, default=str)
+
+
+def buffered(pieces, chunk_size=STREAM_CHUNK_SIZE):
+    """Join small string pieces into chunks of roughly chunk_size characters"""
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def validate_plant(plant):
+    """Return an error message for an invalid plant document, or None"""
+    if not isinstance(plant, dict):
+        return "plant must be a JSON object"
+    if not isinstance(plant.get('name'), str) or not plant['name'].strip():
+        return "name is required"
+    for field in STRING_FIELDS:
+        if field in plant and not isinstance(plant[field], str):
+            return f"{field} must be a string"
+    for field in NUMBER_FIELDS:
+        if field in plant and (isinstance(plant[field], bool) or not isinstance(plant[field], (int, float))):
+            return f"{field} must be a number"
+    if 'tags' in plant and not (isinstance(plant['tags'], list) and all(isinstance(t, str) for t in plant['tags'])):
+        return "tags must be a list of strings"
+    return None
+
+
+def write_errors(error):
+    """Error message per failed position of a BulkWriteError"""
+    return {err['index']: err.get('errmsg', 'write failed') for err in error.details.get('writeErrors', [])}
+
+
+def insert_chunk(collection, plants):
+    """insert_many(ordered=False) one chunk; return an error message per failed position"""
+    try:
+        collection.insert_many(plants, ordered=False)
+        return {}
+    except BulkWriteError as e:
+        return write_errors(e)
+
+
+class PlantInsertBatcher:
+    """Group concurrent single-plant inserts into insert_many calls.
+
+    insert() queues a document and blocks until the background thread has
+    written it, returning its _id. The thread flushes when max_batch
+    documents are waiting or max_wait_ms has passed since the first one.
+    Documents are written with ordered=False, so one rejected document only
+    fails its own caller. Callers validate documents before queueing them.
+    """
+
+    def __init__(self, collection, max_batch=INSERT_BATCH_SIZE, max_wait_ms=INSERT_MAX_WAIT_MS,
+                 max_queue=INSERT_QUEUE_SIZE):
+        self.collection = collection
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.pending = queue.Queue(maxsize=max_queue)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def insert(self, plant, timeout=INSERT_TIMEOUT):
+        """Raises TimeoutError if the document isn't written within timeout seconds"""
+        deadline = time.monotonic() + timeout
+        future = self.enqueue(plant, timeout)
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            # Not written yet; drop it from the queue if the batcher hasn't taken it
+            future.cancel()
+            raise TimeoutError(f"insert didn't complete within {timeout} seconds") from None
+
+    def enqueue(self, plant, timeout=0):
+        """Queue a document; the returned Future resolves to its _id.
+
+        Waits up to timeout seconds for room in the queue, then raises TimeoutError.
+        """
+        future = Future()
+        try:
+            self.pending.put((plant, future), block=timeout > 0, timeout=timeout or None)
+        except queue.Full:
+            raise TimeoutError("too many inserts waiting") from None
+        return future
+
+    def run(self):
+        while True:
+            batch = [self.pending.get()]
+            try:
+                while len(batch) < self.max_batch:
+                    batch.append(self.pending.get(timeout=self.max_wait))
+            except queue.Empty:
+                pass
+            self.flush(batch)
+
+    def flush(self, batch):
+        # Skip documents whose caller already timed out and cancelled
+        batch = [(plant, future) for plant, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        plants = [plant for plant, _ in batch]
+        try:
+            errors = insert_chunk(self.collection, plants)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for index, (plant, future) in enumerate(batch):
+            if index in errors:
+                future.set_exception(RuntimeError(errors[index]))
+            else:
+                future.set_result(plant['_id'])
+
+
+def parse_bulk_plants(mimetype, body):
+    """Parse a bulk request body: a JSON array, {"plants": [...]}, or NDJSON.
+
+    Returns (plants, errors), where errors maps the index of each NDJSON line
+    that isn't valid JSON to a message; its slot in plants is None. Raises
+    ValueError if a JSON body can't be parsed at all.
+    """
+    if mimetype == 'application/x-ndjson':
+        plants, errors = [], {}
+        for line in body.decode('utf-8', errors='replace').splitlines():
+            if not line.strip():
+                continue
+            try:
+                plants.append(json.loads(line))
+            except ValueError as e:
+                errors[len(plants)] = f"invalid JSON: {e}"
+                plants.append(None)
+        return plants, errors
+    data = json.loads(body)
+    if isinstance(data, dict):
+        data = data.get('plants')
+    if not isinstance(data, list):
+        raise ValueError("expected a JSON array of plants")
+    return data, {}
+
+
+def int_arg(args, name, default=None):
+    """args.get(name, default, type=int) for any mapping of query parameters"""
+    try:
+        return int(args[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def parse_chunk_size(args):
+    chunk_size = int_arg(args, 'chunk_size', BULK_CHUNK_SIZE)
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    return chunk_size
+
+
+def validate_bulk(plants, parse_errors=None):
+    """Per-record results with invalid records filled in, and the indices of valid ones"""
+    parse_errors = parse_errors or {}
+    results = [None] * len(plants)
+    valid = []
+    for index, plant in enumerate(plants):
+        error = parse_errors.get(index) or validate_plant(plant)
+        if error:
+            results[index] = {"index": index, "status": "invalid", "error": error}
+        else:
+            valid.append(index)
+    return results, valid
+
+
+def fail_chunk(results, indices, error):
+    """Mark every record of a chunk whose insert_many raised something other than BulkWriteError"""
+    for index in indices:
+        results[index] = {"index": index, "status": "error", "error": str(error)}
+
+
+def record_chunk(results, plants, indices, errors):
+    for position, index in enumerate(indices):
+        if position in errors:
+            results[index] = {"index": index, "status": "error", "error": errors[position]}
+        else:
+            results[index] = {"index": index, "status": "inserted", "_id": str(plants[index]['_id'])}
+
+
+def bulk_summary(results):
+    """Response body and status code for a finished bulk upload"""
+    inserted = sum(1 for r in results if r['status'] == 'inserted')
+    return {
+        "message": f"Inserted {inserted} of {len(results)} plants",
+        "inserted": inserted,
+        "failed": len(results) - inserted,
+        "results": results
+    }, 201 if inserted == len(results) else 207
+
+
+def parse_list_args(args):
+    """Mongo query, projection and page size for GET /api/plants.
+
+    Raises InvalidId or ValueError for bad parameters.
+    """
+    query = {}
+    after = args.get('after')
+    if after:
+        query['_id'] = {'$gt': ObjectId(after)}
+
+    fields = args.get('fields')
+    projection = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+
+    limit = int_arg(args, 'limit')
+    if limit is not None and not 0 < limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return query, projection, limit
+
+
+def page_body(plants, limit):
+    for plant in plants:
+        plant['_id'] = str(plant['_id'])
+    next_after = plants[-1]['_id'] if len(plants) == limit else None
+    return {"plants": plants, "next_after": next_after}
+
+
+def create_plants_blueprint(mongo):
+    """Plant catalogue routes shared by FinalCode.py and Chatbot_Usage.py"""
+    plants_bp = Blueprint('plants', __name__)
+    batcher = None
+    batcher_lock = threading.Lock()
+
+    def get_batcher():
+        # Started on first use so importing the app doesn't spawn threads
+        nonlocal batcher
+        with batcher_lock:
+            if batcher is None:
+                batcher = PlantInsertBatcher(mongo.db.plants)
+            return batcher
+
+    @plants_bp.route('/api/plants', methods=['POST'])
+    def add_plant():
+        plant_data = request.get_json(silent=True)
+        error = validate_plant(plant_data)
+        if error:
+            return jsonify({"message": "Error uploading plant", "error": error}), 400
+        try:
+            inserted_id = get_batcher().insert(plant_data)
+            plant_data['_id'] = str(inserted_id)
+            return jsonify({"message": "Plant uploaded successfully", "plant": plant_data}), 201
+        except TimeoutError as e:
+            return jsonify({"message": "Error uploading plant", "error": str(e)}), 503
+        except Exception as e:
+            return jsonify({"message": "Error uploading plant", "error": str(e)}), 500
+
+    @plants_bp.route('/api/plants/bulk', methods=['POST'])
+    def add_plants_bulk():
+        """Insert many plants at once.
+
+        Accepts a JSON array, {"plants": [...]}, or NDJSON
+        (Content-Type: application/x-ndjson); an NDJSON line that isn't valid
+        JSON is reported as invalid at its index. Valid documents are written with
+        insert_many(ordered=False) in chunks of ?chunk_size= (default
+        PLANT_BULK_CHUNK_SIZE). The response lists a status per input record.
+        """
+        try:
+            plants, parse_errors = parse_bulk_plants(request.mimetype, request.get_data())
+            chunk_size = parse_chunk_size(request.args)
+        except ValueError as e:
+            return jsonify({"message": "Invalid bulk upload", "error": str(e)}), 400
+
+        results, valid = validate_bulk(plants, parse_errors)
+        for start in range(0, len(valid), chunk_size):
+            indices = valid[start:start + chunk_size]
+            # A failed chunk is reported per record, so the _ids of chunks already
+            # written still reach the client and a retry can skip them
+            try:
+                errors = insert_chunk(mongo.db.plants, [plants[i] for i in indices])
+            except Exception as e:
+                fail_chunk(results, indices, e)
+                continue
+            record_chunk(results, plants, indices, errors)
+
+        body, status = bulk_summary(results)
+        return jsonify(body), status
+
+    @plants_bp.route('/api/plants', methods=['GET'])
+    def get_plants():
+        """List plants in _id order.
+
+        Query parameters:
+          after   - only return plants whose _id is greater than this (keyset pagination)
+          limit   - page size; returns {"plants": [...], "next_after": id-or-null}
+          fields  - comma-separated fields to return (_id is always included)
+          format  - "ndjson" streams one document per line
+
+        Without limit the whole catalogue is streamed as a JSON array, encoded
+        document by document as the cursor yields them.
+        """
+        try:
+            query, projection, limit = parse_list_args(request.args)
+        except (InvalidId, ValueError) as e:
+            return jsonify({"message": "Invalid query parameters", "error": str(e)}), 400
+
+        try:
+            cursor = mongo.db.plants.find(query, projection).sort('_id', 1).batch_size(CURSOR_BATCH_SIZE)
+            if limit:
+                cursor = cursor.limit(limit)
+
+            if limit and request.args.get('format') != 'ndjson':
+                return jsonify(page_body(list(cursor), limit)), 200
+
+            # Pull the first document now so connection errors still produce a 500
+            first = next(cursor, None)
+        except Exception as e:
+            return jsonify({"message": "Error fetching plants", "error": str(e)}), 500
+
+        if request.args.get('format') == 'ndjson':
+            def generate():
+                if first is None:
+                    return
+                yield encode_plant(first) + '\n'
+                for plant in cursor:
+                    yield encode_plant(plant) + '\n'
+
+            return Response(stream_with_context(buffered(generate())), mimetype='application/x-ndjson')
+
+        def generate():
+            if first is None:
+                yield '[]'
+                return
+            yield '[' + encode_plant(first)
+            for plant in cursor:
+                yield ',' + encode_plant(plant)
+            yield ']'
+
+        return Response(stream_with_context(buffered(generate())), mimetype='application/json')
+
+    return plants_bp
@@ -0,0 +1,109 @@
+"""Production launcher for FinalCode.py and Chatbot_Usage.py.
+
+    python serve.py main                  # FinalCode routes on port 3000
+    python serve.py chatbot --mode sync   # Chatbot_Usage routes, thread per request
+
+--mode async (the default) serves asyncServer's ASGI apps with uvicorn.
+--mode sync serves the Flask apps unchanged with gunicorn's threaded workers,
+or with waitress where gunicorn isn't available (Windows).
+
+Workers default per core: every async worker is one event loop, so main gets
+one per core; sync workers block on I/O, so main gets gunicorn's usual
+2 * cores + 1. The chatbot defaults to a single worker because each one loads
+its own copy of the model, and TensorFlow already spreads a batch over all
+cores; pass --workers (or SERVE_WORKERS) to trade memory for more processes.
+"""
+import argparse
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+CHATBOT_DIR = os.path.join(BACKEND_DIR, 'Chatbot')
+
+TARGETS = {
+    # target: (working directory, Flask app, ASGI factory)
+    'main': (BACKEND_DIR, 'FinalCode:app', 'asyncServer:create_main_app'),
+    'chatbot': (CHATBOT_DIR, 'Chatbot_Usage:app', 'asyncServer:create_chatbot_app'),
+}
+
+
+def default_workers(target, mode, cores=None):
+    cores = cores or os.cpu_count() or 1
+    if target == 'chatbot':
+        return 1
+    return cores if mode == 'async' else 2 * cores + 1
+
+
+def default_threads(target):
+    # Enough concurrent requests per sync chatbot worker to fill a MicroBatcher batch
+    if target == 'chatbot':
+        return 2 * int(os.environ.get('CHATBOT_MAX_BATCH', 16))
+    return 4
+
+
+def serve_async(factory, host, port, workers):
+    import uvicorn
+    uvicorn.run(factory, factory=True, host=host, port=port, workers=workers,
+                app_dir=BACKEND_DIR, log_level='warning', access_log=False)
+
+
+def serve_gunicorn(flask_app, host, port, workers, threads):
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{host}:{port}')
+            self.cfg.set('workers', workers)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('threads', threads)
+            # The chatbot model can take a while to load in a fresh worker
+            self.cfg.set('timeout', 120)
+
+        def load(self):
+            module, name = flask_app.split(':')
+            return getattr(__import__(module), name)
+
+    Application().run()
+
+
+def serve_waitress(flask_app, host, port, threads):
+    from waitress import serve
+    module, name = flask_app.split(':')
+    serve(getattr(__import__(module), name), host=host, port=port, threads=threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the backend without the Flask development server")
+    parser.add_argument('target', choices=sorted(TARGETS))
+    parser.add_argument('--mode', choices=['async', 'sync'], default=os.environ.get('SERVE_MODE', 'async'))
+    parser.add_argument('--host', default=os.environ.get('SERVE_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 3000)))
+    parser.add_argument('--workers', type=int, default=os.environ.get('SERVE_WORKERS'),
+                        help="processes (default: see module docstring)")
+    parser.add_argument('--threads', type=int, default=os.environ.get('SERVE_THREADS'),
+                        help="threads per sync worker")
+    args = parser.parse_args()
+
+    directory, flask_app, factory = TARGETS[args.target]
+    # responses.json, tokenizer.json, data.json and the model load from relative paths
+    os.chdir(directory)
+    sys.path[:0] = [directory, BACKEND_DIR]
+    workers = int(args.workers or default_workers(args.target, args.mode))
+    threads = int(args.threads or default_threads(args.target))
+    print(f"Serving {args.target} ({args.mode}) on {args.host}:{args.port} with {workers} worker(s)", file=sys.stderr)
+
+    if args.mode == 'async':
+        serve_async(factory, args.host, args.port, workers)
+        return
+    try:
+        import gunicorn  # noqa: F401 - not installable on Windows
+    except ImportError:
+        if workers > 1:
+            print("gunicorn is unavailable; waitress serves from a single process", file=sys.stderr)
+        serve_waitress(flask_app, args.host, args.port, threads)
+        return
+    serve_gunicorn(flask_app, args.host, args.port, workers, threads)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,7 +6,7 @@ const path = require('path');
 const multer = require('multer');
 require('dotenv').config();
 const { GoogleGenerativeAI } = require('@google/generative-ai');
-const { spawn } = require('child_process');
+const PlantIdentificationPool = require('./ml/plantIdentificationPool');
 
 const app = express();
 const PORT = process.env.PORT || 3000;
@@ -14,6 +14,9 @@ const PORT = process.env.PORT || 3000;
 // Initialize Gemini AI
 const genAI = new GoogleGenerativeAI(process.env.GEMINI_API_KEY);
 
+// Long-lived Python plant identification service shared by all requests
+const plantIdentification = new PlantIdentificationPool();
+
 const mongoURI = 'mongodb://localhost:27017/Mpr_sem5';
 
 mongoose.connect(mongoURI)
@@ -245,54 +248,47 @@ app.post('/api/identify-plant', upload.single("image"), async (req, res) => {
       });
     }
     
-    // Call Python plant identification service
-    const pythonProcess = spawn('python3', ['ml/plantIdentification.py']);
-    
     // Send appropriate data based on input type
     const inputData = req.file 
       ? { imagePath: imageData }  // File path for uploaded files
       : { image: imageData };     // Base64 for direct image data
     
-    pythonProcess.stdin.write(JSON.stringify(inputData));
-    pythonProcess.stdin.end();
-    
-    let result = '';
-    pythonProcess.stdout.on('data', (data) => {
-      result += data.toString();
-    });
-    
-    pythonProcess.on('close', (code) => {
-      if (code === 0) {
-        try {
-          const identification = JSON.parse(result);
-          res.json(identification);
-        } catch (parseError) {
-          console.error('Failed to parse Python response:', result);
-          res.status(500).json({ error: 'Invalid response from identification service' });
-        } 
-      } else {
-        console.error('Python process exited with code:', code);
-        res.status(500).json({ error: 'Plant identification failed' });
-        console.error('Python process exited with code:', code);
-        res.status(500).json({ error: 'Plant identification failed' });
-      }
-    });
-
-    pythonProcess.on('error', (error) => {
-      console.error('Python process error:', error);
-      res.status(500).json({ error: 'Failed to start identification service' });
-    });
-
-    pythonProcess.on('error', (error) => {
-      console.error('Python process error:', error);
-      res.status(500).json({ error: 'Failed to start identification service' });
-    });
+    try {
+      const identification = await plantIdentification.request(inputData);
+      res.json(identification);
+    } catch (serviceError) {
+      console.error('Plant identification service error:', serviceError);
+      // 503 when the identification pool is already at its queue limit
+      res.status(serviceError.statusCode || 500).json({ error: 'Plant identification failed' });
+    }
   } catch (error) {
     console.error('Plant identification error:', error);
     res.status(500).json({ error: 'Plant identification failed' });
   }
 });
 
+// Hit/miss counters of the plant identification result cache
+app.get('/api/identify-plant/cache-stats', async (req, res) => {
+  try {
+    const stats = await plantIdentification.request({ action: 'cache_stats' });
+    res.json(stats);
+  } catch (error) {
+    console.error('Cache stats error:', error);
+    res.status(500).json({ error: 'Failed to read cache stats' });
+  }
+});
+
+// PlantNet call counts, circuit breaker state and latency percentiles
+app.get('/api/identify-plant/upstream-stats', async (req, res) => {
+  try {
+    const stats = await plantIdentification.request({ action: 'plantnet_stats' });
+    res.json(stats);
+  } catch (error) {
+    console.error('Upstream stats error:', error);
+    res.status(500).json({ error: 'Failed to read upstream stats' });
+  }
+});
+
 // Plant health analysis endpoint - handles both file uploads and base64 images
 app.post('/api/analyze-health', upload.single("image"), async (req, res) => {
   try {
@@ -314,55 +310,20 @@ app.post('/api/analyze-health', upload.single("image"), async (req, res) => {
       });
     }
     
-    // Call Python health analysis service
-    const pythonProcess = spawn('python3', ['ml/plantIdentification.py']);
-    
     // Send appropriate data based on input type
     const inputData = {
       action: 'analyze_health',
       ...(req.file ? { imagePath: imageData } : { image: imageData })
     };
     
-    pythonProcess.stdin.write(JSON.stringify(inputData));
-    pythonProcess.stdin.end();
-    
-    let result = '';
-    pythonProcess.stdout.on('data', (data) => {
-      result += data.toString();
-    });
-    
-    pythonProcess.on('close', (code) => {
-      if (code === 0) {
-        try {
-          const analysis = JSON.parse(result);
-          res.json(analysis);
-        } catch (parseError) {
-          console.error('Failed to parse Python response:', result);
-          res.status(500).json({ error: 'Invalid response from health analysis service' });
-        }
-        try {
-          const analysis = JSON.parse(result);
-          res.json(analysis);
-        } catch (parseError) {
-          console.error('Failed to parse Python response:', result);
-          res.status(500).json({ error: 'Invalid response from health analysis service' });
-        }
-      } else {
-        console.error('Python process exited with code:', code);
-        console.error('Python process exited with code:', code);
-        res.status(500).json({ error: 'Health analysis failed' });
-      }
-    });
-
-    pythonProcess.on('error', (error) => {
-      console.error('Python process error:', error);
-      res.status(500).json({ error: 'Failed to start health analysis service' });
-    });
-
-    pythonProcess.on('error', (error) => {
-      console.error('Python process error:', error);
-      res.status(500).json({ error: 'Failed to start health analysis service' });
-    });
+    try {
+      const analysis = await plantIdentification.request(inputData);
+      res.json(analysis);
+    } catch (serviceError) {
+      console.error('Health analysis service error:', serviceError);
+      // 503 when the identification pool is already at its queue limit
+      res.status(serviceError.statusCode || 500).json({ error: 'Health analysis failed' });
+    }
   } catch (error) {
     console.error('Health analysis error:', error);
     res.status(500).json({ error: 'Health analysis failed' });
@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+
+class StubOpenMeteo:
+    """Local stand-in for the Open-Meteo forecast endpoint.
+
+    Answers every GET after `delay` seconds with `status`, echoing the
+    requested coordinates, and counts the calls it received.
+    """
+
+    def __init__(self):
+        self.delay = 0.0
+        self.status = 200
+        self.calls = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.calls += 1
+                time.sleep(stub.delay)
+                query = dict(pair.split('=', 1) for pair in self.path.split('?', 1)[1].split('&'))
+                body = json.dumps({'latitude': float(query['latitude']), 'longitude': float(query['longitude']),
+                                   'current': {'temperature_2m': 21.5}}).encode()
+                self.send_response(stub.status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}/v1/forecast'
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+
+# FinalCode reads OPEN_METEO_URL and responses.json (relative to backend/) on import
+STUB = StubOpenMeteo()
+os.environ['OPEN_METEO_URL'] = STUB.url
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+import FinalCode  # noqa: E402
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    STUB.delay, STUB.status, STUB.calls = 0.0, 200, 0
+    monkeypatch.setattr(FinalCode, 'WEATHER_TTL', 60.0)
+    FinalCode.weather_cache.clear()
+    yield STUB
+    FinalCode.weather_cache.clear()
+
+
+def fetch_concurrently(count, latitude=12.34, longitude=56.78):
+    results = [None] * count
+
+    def fetch(i):
+        try:
+            results[i] = FinalCode.fetch_weather(latitude, longitude)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=fetch, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_nearby_coordinates_share_a_grid_cell(stub):
+    first = FinalCode.fetch_weather(10.01, 20.01)
+    assert FinalCode.fetch_weather(10.04, 19.98) == first
+    assert stub.calls == 1
+    # Requested at the cell centre, not the caller's exact position
+    assert (first['latitude'], first['longitude']) == (10.0, 20.0)
+
+    FinalCode.fetch_weather(10.2, 20.01)
+    assert stub.calls == 2
+
+
+def test_cached_forecast_expires_after_ttl(stub, monkeypatch):
+    monkeypatch.setattr(FinalCode, 'WEATHER_TTL', 0.1)
+    FinalCode.fetch_weather(1.0, 2.0)
+    FinalCode.fetch_weather(1.0, 2.0)
+    assert stub.calls == 1
+    time.sleep(0.15)
+    FinalCode.fetch_weather(1.0, 2.0)
+    assert stub.calls == 2
+
+
+def test_concurrent_lookups_share_one_upstream_call(stub):
+    stub.delay = 0.3
+    results = fetch_concurrently(8)
+    assert stub.calls == 1
+    assert all(result == results[0] for result in results)
+    assert not FinalCode.weather_in_flight
+
+
+def test_upstream_error_reaches_every_follower_and_is_not_cached(stub):
+    stub.delay, stub.status = 0.3, 500
+    results = fetch_concurrently(5)
+    assert stub.calls == 1
+    assert all(isinstance(result, requests.HTTPError) for result in results)
+    assert not FinalCode.weather_cache
+
+    stub.delay, stub.status = 0.0, 200
+    FinalCode.fetch_weather(12.34, 56.78)
+    assert stub.calls == 2
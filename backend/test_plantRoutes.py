@@ -0,0 +1,91 @@
+import itertools
+import json
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from plantRoutes import create_plants_blueprint
+
+NDJSON = 'application/x-ndjson'
+
+
+class FakeCollection:
+    """insert_many stand-in: assigns _ids and fails the calls listed in `failures`."""
+
+    def __init__(self, failures=None):
+        self.failures = failures or {}
+        self.calls = 0
+        self.ids = itertools.count(1)
+        self.docs = []
+
+    def insert_many(self, documents, ordered=True):
+        self.calls += 1
+        for document in documents:
+            document.setdefault('_id', next(self.ids))
+        failure = self.failures.get(self.calls)
+        if failure is not None:
+            raise failure
+        self.docs.extend(documents)
+
+
+@pytest.fixture
+def collection():
+    return FakeCollection()
+
+
+@pytest.fixture
+def client(collection):
+    app = Flask(__name__)
+    app.register_blueprint(create_plants_blueprint(SimpleNamespace(db=SimpleNamespace(plants=collection))))
+    return app.test_client()
+
+
+def post_bulk(client, body, mimetype='application/json', chunk_size=2):
+    return client.post(f'/api/plants/bulk?chunk_size={chunk_size}', data=body, content_type=mimetype)
+
+
+def statuses(response):
+    return [(r['index'], r['status']) for r in response.get_json()['results']]
+
+
+def test_all_inserted(client, collection):
+    response = post_bulk(client, json.dumps([{"name": "Fern"}, {"name": "Ivy"}, {"name": "Moss"}]))
+    assert response.status_code == 201
+    assert statuses(response) == [(0, 'inserted'), (1, 'inserted'), (2, 'inserted')]
+    assert collection.calls == 2
+
+
+def test_bad_ndjson_line_is_invalid_at_its_index(client, collection):
+    body = '{"name": "Fern"}\n{"name": oops}\n\n{"name": "Ivy"}\n'
+    response = post_bulk(client, body, NDJSON)
+    assert response.status_code == 207
+    assert statuses(response) == [(0, 'inserted'), (1, 'invalid'), (2, 'inserted')]
+    assert 'invalid JSON' in response.get_json()['results'][1]['error']
+    assert [doc['name'] for doc in collection.docs] == ['Fern', 'Ivy']
+
+
+def test_malformed_json_body_is_rejected(client, collection):
+    response = post_bulk(client, '[{"name": "Fern"},')
+    assert response.status_code == 400
+    assert collection.calls == 0
+
+
+def test_write_errors_are_reported_per_record(client, collection):
+    collection.failures[1] = BulkWriteError({'writeErrors': [{'index': 1, 'errmsg': 'duplicate key'}]})
+    response = post_bulk(client, json.dumps([{"name": "Fern"}, {"name": "Ivy"}]))
+    assert response.status_code == 207
+    assert response.get_json()['results'][1] == {"index": 1, "status": "error", "error": "duplicate key"}
+
+
+def test_failed_chunk_keeps_earlier_results(client, collection):
+    collection.failures[2] = AutoReconnect('connection reset')
+    plants = [{"name": name} for name in ['Fern', 'Ivy', 'Moss', 'Sage', 'Mint']]
+    response = post_bulk(client, json.dumps(plants))
+    assert response.status_code == 207
+    assert statuses(response) == [(0, 'inserted'), (1, 'inserted'), (2, 'error'), (3, 'error'), (4, 'inserted')]
+    body = response.get_json()
+    assert body['inserted'] == 3
+    assert body['results'][2]['error'] == 'connection reset'
+    assert body['results'][0]['_id'] == '1'